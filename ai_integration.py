@@ -5,6 +5,9 @@ Bridges the gap between game logic and AI player
 
 import time
 from threading import Timer
+from log_config import get_logger
+
+logger = get_logger('ai')
 
 def handle_ai_turn(room, room_code, socketio, emit):
     """
@@ -74,7 +77,7 @@ def handle_ai_turn(room, room_code, socketio, emit):
                     Timer(0.5, lambda: handle_ai_turn(room, room_code, socketio, emit)).start()
                     
         except Exception as e:
-            print(f"Error in AI turn: {e}")
+            logger.exception('Error in AI turn in room %s: %s', room_code, e)
     
     # Schedule the AI move with thinking delay
     Timer(thinking_time, execute_ai_move).start()
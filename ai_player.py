@@ -6,6 +6,8 @@ Implements different difficulty levels and strategies
 import random
 import time
 from typing import List, Dict, Optional
+from policy_table import policy_table, state_key, pick_card
+from policy_model import policy_model, option_features
 
 class AIPlayer:
     """AI player with configurable difficulty and strategies"""
@@ -16,14 +18,21 @@ class AIPlayer:
         self.thinking_time = {
             'easy': (1.0, 2.5),
             'medium': (0.8, 2.0),
-            'hard': (0.5, 1.5)
+            'hard': (0.5, 1.5),
+            'expert': (0.5, 1.5),
+            'learned': (0.5, 1.5)
         }
+        self.tracker = None  # CardTracker of the running game, see card_tracker.attach_trackers
+        self.planned = None  # (card or None to draw,) decided in a batch, see simple_ai_handler.ModelBatcher
         
     def choose_card(self, hand: List[Dict], current_color: str, current_value: str, 
-                   must_draw_cards: int, special_effect: str = None) -> Optional[Dict]:
+                   must_draw_cards: int, special_effect: str = None,
+                   opponent_cards: int = None, deck_size: int = None) -> Optional[Dict]:
         """
         Choose which card to play based on difficulty
         Returns None if no playable card (should draw)
+        opponent_cards (smallest opponent hand) and deck_size are used by the expert
+        and learned bots
         """
         playable_cards = self._get_playable_cards(hand, current_color, current_value, must_draw_cards, special_effect)
         
@@ -34,6 +43,12 @@ class AIPlayer:
             return self._easy_strategy(playable_cards)
         elif self.difficulty == 'medium':
             return self._medium_strategy(playable_cards, hand)
+        elif self.difficulty == 'expert':
+            return self._expert_strategy(playable_cards, hand, current_color, must_draw_cards,
+                                         special_effect, opponent_cards, deck_size)
+        elif self.difficulty == 'learned':
+            return self._learned_strategy(playable_cards, hand, current_color, must_draw_cards,
+                                          special_effect, opponent_cards, deck_size)
         else:  # hard
             return self._hard_strategy(playable_cards, hand, current_color)
     
@@ -97,6 +112,7 @@ class AIPlayer:
         - Saves Jacks for color changes
         - Uses special cards strategically
         - Tries to get rid of colors with few cards
+        - With a card tracker: leads colors the next player is unlikely to hold
         """
         # Count cards by color
         color_counts = {'rosen': 0, 'schellen': 0, 'schilten': 0, 'eichel': 0}
@@ -119,7 +135,8 @@ class AIPlayer:
             # Early game: save special cards, play from colors with few cards
             if normal_cards:
                 # Play from color with fewest cards
-                normal_cards.sort(key=lambda c: color_counts[c['suit']])
+                follow = self._follow_chances()
+                normal_cards.sort(key=lambda c: color_counts[c['suit']] + follow[c['suit']])
                 return normal_cards[0]
             
             # Use defensive cards before offensive
@@ -155,9 +172,54 @@ class AIPlayer:
         
         # Default: play any available card, prefer normal cards
         if normal_cards:
+            if self.tracker:
+                follow = self._follow_chances()
+                return min(normal_cards, key=lambda c: follow[c['suit']])
             return random.choice(normal_cards)
         return random.choice(playable_cards)
     
+    def _follow_chances(self) -> Dict[str, float]:
+        """Chance per suit that the next player holds it, unknown (0.5) without a tracker"""
+        if not self.tracker:
+            return dict.fromkeys(['rosen', 'schellen', 'schilten', 'eichel'], 0.5)
+        return self.tracker.suit_chances()
+    
+    def _expert_strategy(self, playable_cards: List[Dict], hand: List[Dict], current_color: str,
+                         must_draw_cards: int, special_effect: str, opponent_cards: int,
+                         deck_size: int) -> Optional[Dict]:
+        """
+        Expert AI: Looks the move up in the precomputed policy table
+        (train_policy.py), plays like hard AI in states the table does not know
+        """
+        table = policy_table()
+        if table is not None:
+            action = table.lookup(state_key(hand, playable_cards, current_color, must_draw_cards,
+                                            special_effect, opponent_cards, deck_size))
+            if action == 'draw':
+                return None
+            if action is not None:
+                card = pick_card(action, playable_cards, hand)
+                if card:
+                    return card
+        return self._hard_strategy(playable_cards, hand, current_color)
+    
+    def _learned_strategy(self, playable_cards: List[Dict], hand: List[Dict], current_color: str,
+                          must_draw_cards: int, special_effect: str, opponent_cards: int,
+                          deck_size: int) -> Optional[Dict]:
+        """
+        Learned AI: Takes the option the policy model scores best, or the
+        move planned for it in a batch. Plays like hard AI without the model
+        """
+        planned, self.planned = self.planned, None
+        if planned is not None and (planned[0] is None or planned[0] in playable_cards):
+            return planned[0]
+        model = policy_model()
+        if model is None:
+            return self._hard_strategy(playable_cards, hand, current_color)
+        rows, options = option_features(hand, playable_cards, current_color, must_draw_cards,
+                                        special_effect, opponent_cards, deck_size, self._follow_chances())
+        return model.choose(rows, options)
+    
     def choose_color(self, hand: List[Dict]) -> str:
         """Choose color after playing Jack"""
         if self.difficulty == 'easy':
@@ -169,8 +231,10 @@ class AIPlayer:
             for card in hand:
                 color_counts[card['suit']] += 1
             
-            # Return color with most cards
-            return max(color_counts, key=color_counts.get)
+            # Return color with most cards, among those the one the next
+            # player is least likely to hold
+            follow = self._follow_chances()
+            return max(color_counts, key=lambda suit: color_counts[suit] - follow[suit])
     
     def should_call_tschau(self, hand_size: int) -> bool:
         """Decide whether to call Tschau"""
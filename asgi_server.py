@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+ASGI server for Tschau-Sepp
+Runs the game on asyncio with python-socketio's AsyncServer under uvicorn,
+as an alternative to the eventlet server in game_server.py. The event
+handlers, rooms and game core are the ones from game_server; only the
+transport differs:
+    - every handler is registered as an async handler that runs the
+      game_server handler inside a Flask request context
+    - emits and room changes go through SocketIOBridge, which offers the
+      Flask-SocketIO calls the game code makes and delivers them in order
+    - turn timers and bot think-delays are loop callbacks
+      (AsyncioScheduler), bot compute runs in the loop's default executor
+    - the HTTP routes of the Flask app are served through a WSGI adapter
+Start it with `python asgi_server.py` or `uvicorn asgi_server:app`, it
+listens on the same port and speaks the same protocol as run_server.py,
+so the two can be benchmarked against each other with the same load.
+Needs uvicorn (with wsproto or websockets), a2wsgi is used if installed.
+"""
+
+import asyncio
+import os
+import flask
+import socketio
+import game_server
+import scheduler
+from payloads import MAX_FRAME_BYTES
+from log_config import get_logger
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:
+    from uvicorn.middleware.wsgi import WSGIMiddleware
+
+logger = get_logger('server')
+
+class SocketIOBridge:
+    """
+    The part of Flask-SocketIO the game code uses (emit, close_room,
+    server.enter_room and the join_room/leave_room/emit functions, which
+    look the bridge up in app.extensions) on top of an AsyncServer. Calls
+    return right away and a sender task performs them in call order, so a
+    join_room followed by an emit to that room works as before.
+    """
+
+    async_mode = 'asgi'
+
+    def __init__(self, sio):
+        self.sio = sio
+        self.server = self  # flask_socketio.join_room() calls socketio.server.enter_room()
+        self.eio = sio.eio  # Send queues, read by backpressure
+        self.manager = sio.manager
+        self.loop = None
+        self.outbox = None
+        self.sender = None
+
+    def start(self, loop):
+        self.loop = loop
+        self.outbox = asyncio.Queue()
+        self.sender = loop.create_task(self._send_loop())
+
+    def _submit(self, method, *args, **kwargs):
+        item = (method, args, kwargs)
+        try:
+            on_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self.outbox.put_nowait(item)
+        else:
+            # HTTP routes run in the WSGI adapter's worker threads
+            self.loop.call_soon_threadsafe(self.outbox.put_nowait, item)
+
+    async def _send_loop(self):
+        while True:
+            method, args, kwargs = await self.outbox.get()
+            try:
+                await method(*args, **kwargs)
+            except Exception as e:
+                logger.exception('Error in %s: %s', method.__name__, e)
+
+    def emit(self, event, data=None, to=None, room=None, include_self=True, skip_sid=None,
+             namespace=None, callback=None, **kwargs):
+        if not include_self and not skip_sid:
+            skip_sid = flask.request.sid
+        self._submit(self.sio.emit, event, data, to=to or room, skip_sid=skip_sid,
+                     namespace=namespace or '/', callback=callback)
+
+    def enter_room(self, sid, room, namespace=None):
+        self._submit(self.sio.enter_room, sid, room, namespace=namespace or '/')
+
+    def leave_room(self, sid, room, namespace=None):
+        self._submit(self.sio.leave_room, sid, room, namespace=namespace or '/')
+
+    def close_room(self, room, namespace=None):
+        self._submit(self.sio.close_room, room, namespace=namespace or '/')
+
+    def rooms(self, sid, namespace=None):
+        return self.sio.rooms(sid, namespace=namespace or '/')
+
+def event_handler(sio, event, handler):
+    """Async handler running a game_server handler the way Flask-SocketIO would"""
+    async def on_event(sid, *args):
+        environ = sio.get_environ(sid)
+        if environ is None:
+            return
+        with game_server.app.request_context(environ):
+            flask.request.sid = sid
+            flask.request.namespace = '/'
+            flask.request.event = {'message': event, 'args': args}
+            if event == 'connect':
+                # AsyncServer passes (environ, auth)
+                return handler(args[1] if len(args) > 1 else None)
+            if event == 'disconnect':
+                return handler()
+            return handler(*args)
+    return on_event
+
+def create_app():
+    sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins=game_server.cors_origins,
+                               ping_timeout=60, ping_interval=25, max_http_buffer_size=MAX_FRAME_BYTES)
+
+    # The @socketio.on decorators in game_server registered Flask-SocketIO
+    # wrappers, the handlers themselves are their __wrapped__
+    for event, wrapper in game_server.socketio.server.handlers['/'].items():
+        sio.on(event, event_handler(sio, event, wrapper.__wrapped__))
+
+    bridge = SocketIOBridge(sio)
+    game_server.socketio = bridge
+    game_server.app.extensions['socketio'] = bridge
+
+    def on_startup():
+        loop = asyncio.get_running_loop()
+        bridge.start(loop)
+        scheduler.install(scheduler.AsyncioScheduler(loop))
+        # Runs after uvicorn installed its signal handlers, so SIGTERM
+        # drains the games like on the eventlet server
+        game_server.install_restart_handoff()
+        logger.info('ASGI server ready')
+
+    return socketio.ASGIApp(sio, other_asgi_app=WSGIMiddleware(game_server.app), on_startup=on_startup)
+
+app = create_app()
+
+if __name__ == '__main__':
+    import uvicorn
+    port = int(os.environ.get('PORT', 5000))
+    uvicorn.run(app, host='0.0.0.0', port=port, log_level='warning')
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""
+Backpressure and admission control for Tschau-Sepp
+Every connection has an Engine.IO send queue that grows without bound
+while the client does not read. Its length is the client's backlog:
+    - above OUTBOUND_SOFT_LIMIT state updates (game_update) are held back
+      and superseded by newer ones, only the latest is sent once the
+      client catches up, and chat and emotes to it are dropped
+    - above OUTBOUND_HARD_LIMIT the connection is aborted, the player gets
+      the usual reconnect grace period and a fresh state on reconnect
+New rooms are refused while the event loop lags or the process uses more
+memory than configured, so a spike does not slow down running games.
+"""
+
+import asyncio
+import inspect
+import os
+import time
+from metrics import (OUTBOUND_COALESCED_TOTAL, OUTBOUND_DROPPED_TOTAL, SLOW_CLIENTS_DISCONNECTED_TOTAL,
+                     EVENT_LOOP_LAG_SECONDS)
+from room_gc import process_rss_bytes
+from log_config import get_logger
+
+logger = get_logger('server')
+
+# Queued packets of one client before its updates are coalesced and chat is dropped
+OUTBOUND_SOFT_LIMIT = int(os.environ.get('OUTBOUND_SOFT_LIMIT', 32))
+
+# Queued packets of one client before it is disconnected
+OUTBOUND_HARD_LIMIT = int(os.environ.get('OUTBOUND_HARD_LIMIT', 256))
+
+# Seconds between two backlog checks, also the resolution of the loop lag
+OUTBOUND_CHECK_INTERVAL = float(os.environ.get('OUTBOUND_CHECK_INTERVAL', 0.5))
+
+# Event loop lag in seconds above which no new rooms are created
+ADMISSION_MAX_LOOP_LAG = float(os.environ.get('ADMISSION_MAX_LOOP_LAG', 0.25))
+
+# Resident memory in MB above which no new rooms are created, 0 disables the check
+ADMISSION_MAX_RSS_MB = int(os.environ.get('ADMISSION_MAX_RSS_MB', 0))
+
+class Backpressure:
+    def __init__(self, soft_limit=OUTBOUND_SOFT_LIMIT, hard_limit=OUTBOUND_HARD_LIMIT,
+                 interval=OUTBOUND_CHECK_INTERVAL):
+        self.soft_limit = soft_limit
+        self.hard_limit = hard_limit
+        self.interval = interval
+        self.pending = {}  # sid -> (event, data), latest state update held back
+        self.loop_lag = 0.0  # Seconds the last check started late
+        self.last_check = None
+
+    def backlog(self, server, sid):
+        """Packets queued for a client, None if it is gone"""
+        eio_sid = server.manager.eio_sid_from_sid(sid, '/')
+        sock = server.eio.sockets.get(eio_sid) if eio_sid else None
+        if sock is None or sock.closed:
+            return None
+        return sock.queue.qsize()
+
+    def send_state(self, socketio, event, data, sid):
+        """Emit a state update that makes all earlier ones of the client obsolete"""
+        if self.pending.pop(sid, None):
+            OUTBOUND_COALESCED_TOTAL.inc(event)
+        backlog = self.backlog(socketio.server, sid)
+        if backlog is not None and backlog >= self.soft_limit:
+            self.pending[sid] = (event, data)
+            return
+        socketio.emit(event, data, to=sid)
+
+    def lagging(self, socketio, sids):
+        """Clients that are behind, to be skipped for chat and emotes"""
+        server = socketio.server
+        behind = []
+        for sid in sids:
+            backlog = self.backlog(server, sid)
+            if backlog is not None and backlog >= self.soft_limit:
+                behind.append(sid)
+        return behind
+
+    def drop_for_lagging(self, socketio, event, sids):
+        """lagging() that counts the event as dropped for them"""
+        behind = self.lagging(socketio, sids)
+        if behind:
+            OUTBOUND_DROPPED_TOTAL.inc(event, amount=len(behind))
+        return behind
+
+    def check(self, socketio):
+        """Periodic job: measure loop lag, abort hopeless clients, deliver held back updates"""
+        started = time.monotonic()
+        if self.last_check is not None:
+            self.loop_lag = max(0.0, started - self.last_check - self.interval)
+            EVENT_LOOP_LAG_SECONDS.observe(self.loop_lag)
+
+        server = socketio.server
+        for eio_sid, sock in list(server.eio.sockets.items()):
+            if not sock.closed and sock.queue.qsize() >= self.hard_limit:
+                self._abort(server, eio_sid, sock)
+
+        for sid, held in list(self.pending.items()):
+            backlog = self.backlog(server, sid)
+            if backlog is None:
+                self.pending.pop(sid, None)
+            elif backlog < self.soft_limit and self.pending.get(sid) is held:
+                del self.pending[sid]
+                socketio.emit(*held, to=sid)
+
+        self.last_check = time.monotonic()
+
+    def _abort(self, server, eio_sid, sock):
+        logger.warning('Disconnecting slow client %s, %d packets queued', eio_sid, sock.queue.qsize())
+        SLOW_CLIENTS_DISCONNECTED_TOTAL.inc()
+        # No close packet and no waiting for the queue, the client does not read it anyway
+        closing = sock.close(wait=False, abort=True)
+        if inspect.isawaitable(closing):
+            # AsyncServer, the check runs on its loop
+            asyncio.ensure_future(closing)
+        server.eio.sockets.pop(eio_sid, None)
+
+    def admission(self):
+        """Reason to refuse a new room right now, None if it can be created"""
+        if self.loop_lag > ADMISSION_MAX_LOOP_LAG:
+            return 'loop_lag'
+        if ADMISSION_MAX_RSS_MB:
+            rss = process_rss_bytes()
+            if rss and rss > ADMISSION_MAX_RSS_MB * 1024 * 1024:
+                return 'memory'
+        return None
+
+backpressure = Backpressure()
\ No newline at end of file
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Asset build step for Tschau-Sepp
+1. Packs the 36 card JPEGs from static/images/karten into one sprite atlas
+   (AVIF, WebP and a JPEG fallback) plus a JSON map with the position of
+   every card, so the client loads a single image instead of 36.
+2. Copies static/ into static/dist under content-hashed names, writes
+   gzip/brotli variants of the text files and a manifest that
+   static_assets.py serves with immutable cache headers. Optionally the
+   CSS and JS are concatenated into one bundle each and minified.
+
+The atlas requires Pillow, brotli output the brotli package and JS
+minification rjsmin, all at build time only:
+    pip install pillow brotli rjsmin
+    python build_assets.py                  # atlas + dist
+    python build_assets.py --skip-atlas --bundle --minify
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+
+from static_assets import (STATIC_DIR, DIST_DIR, MANIFEST_PATH, ASSET_URL_PREFIX,
+                           CSS_FILES, JS_FILES)
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CARDS_DIR = os.path.join(STATIC_DIR, 'images', 'karten')
+ATLAS_DIR = os.path.join(STATIC_DIR, 'images', 'atlas')
+CARD_MAP = 'images/atlas/cards.json'
+
+# Same order as the Jasskarten-Deutsch-images-N.jpg numbering
+SUITS = ('eichel', 'rosen', 'schellen', 'schilten')
+VALUES = ('6', '7', '8', '9', 'U', 'O', 'K', 'A', 'B')
+
+# Cards are shown at 70x100 CSS pixels, cells are sized for 2x screens
+# plus the hover zoom. The 7:10 aspect matches the card elements, so the
+# source images are center-cropped exactly like background-size: cover did.
+CELL_WIDTH = 168
+CELL_HEIGHT = 240
+COLUMNS = 6
+
+# Gutter around every cell, filled with the stretched card, so neighbouring
+# cards never bleed in when the browser scales the atlas
+PADDING = 2
+
+QUALITY = {'avif': 50, 'webp': 80, 'jpg': 82}
+
+HASH_LENGTH = 10
+
+# Only these are worth precompressing, images are compressed already
+COMPRESSIBLE = ('.css', '.js', '.json', '.svg', '.html', '.txt')
+
+def card_image_path(index):
+    return os.path.join(CARDS_DIR, f'Jasskarten-Deutsch-images-{index}.jpg')
+
+def crop_to_cell(image, width, height):
+    """Center-crop to the cell aspect ratio, then downscale"""
+    target_ratio = width / height
+    src_width, src_height = image.size
+    if src_width / src_height > target_ratio:
+        crop_width = round(src_height * target_ratio)
+        left = (src_width - crop_width) // 2
+        box = (left, 0, left + crop_width, src_height)
+    else:
+        crop_height = round(src_width / target_ratio)
+        top = (src_height - crop_height) // 2
+        box = (0, top, src_width, top + crop_height)
+    return image.crop(box).resize((width, height), Image.LANCZOS)
+
+def build_atlas(cell_width=CELL_WIDTH, cell_height=CELL_HEIGHT, columns=COLUMNS, out_dir=ATLAS_DIR):
+    if Image is None:
+        sys.exit('Building the card atlas requires Pillow (pip install pillow), '
+                 'use --skip-atlas to only build static/dist')
+
+    cards = [(suit, value) for suit in SUITS for value in VALUES]
+    rows = -(-len(cards) // columns)
+    stride_x = cell_width + 2 * PADDING
+    stride_y = cell_height + 2 * PADDING
+    atlas = Image.new('RGB', (columns * stride_x, rows * stride_y), 'white')
+
+    positions = {}
+    for index, (suit, value) in enumerate(cards):
+        with Image.open(card_image_path(index)) as source:
+            cell = crop_to_cell(source.convert('RGB'), cell_width, cell_height)
+
+        x = (index % columns) * stride_x + PADDING
+        y = (index // columns) * stride_y + PADDING
+        atlas.paste(cell.resize((cell_width + 2 * PADDING, cell_height + 2 * PADDING)),
+                    (x - PADDING, y - PADDING))
+        atlas.paste(cell, (x, y))
+        positions[f'{suit}-{value}'] = [x, y]
+
+    os.makedirs(out_dir, exist_ok=True)
+    images = {}
+    for fmt, pil_format in (('avif', 'AVIF'), ('webp', 'WEBP'), ('jpg', 'JPEG')):
+        if fmt == 'avif' and not features.check('avif'):
+            print('AVIF not supported by this Pillow build, skipping cards.avif')
+            continue
+        filename = f'cards.{fmt}'
+        options = {'quality': QUALITY[fmt]}
+        if fmt == 'jpg':
+            options.update(optimize=True, progressive=True)
+        elif fmt == 'webp':
+            options['method'] = 6
+        atlas.save(os.path.join(out_dir, filename), pil_format, **options)
+        images[fmt] = filename
+
+    card_map = {
+        'version': 1,
+        'width': atlas.width,
+        'height': atlas.height,
+        'cell': [cell_width, cell_height],
+        'images': images,
+        'cards': positions
+    }
+    with open(os.path.join(out_dir, 'cards.json'), 'w') as f:
+        json.dump(card_map, f, separators=(',', ':'))
+
+    return card_map
+
+# Strings and comments are matched first so minifying never touches them
+_CSS_TOKEN = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+_CSS_URL = re.compile(r'url\(\s*(?:"([^"]*)"|\'([^\']*)\'|([^)\'"\s]+))\s*\)')
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+def hashed_name(path, data):
+    """css/style.css -> css/style.<hash>.css"""
+    root, ext = posixpath.splitext(path)
+    return f'{root}.{content_hash(data)}{ext}'
+
+def minify_css(css):
+    """Drop comments and redundant whitespace, string literals stay as they are"""
+    def squeeze(text):
+        text = re.sub(r'\s+', ' ', text)
+        text = re.sub(r' ?([{};,]) ?', r'\1', text)
+        return re.sub(r': ', ':', text)
+
+    parts = []
+    pending = ''
+    position = 0
+    for match in _CSS_TOKEN.finditer(css):
+        pending += css[position:match.start()]
+        if match.group(1):
+            parts.append(squeeze(pending))
+            parts.append(match.group(1))
+            pending = ''
+        position = match.end()
+    parts.append(squeeze(pending + css[position:]))
+    return ''.join(parts).replace(';}', '}').strip()
+
+def minify_js(js):
+    if rjsmin is None:
+        return js
+    return rjsmin.jsmin(js)
+
+def rewrite_css_urls(css, css_path, files):
+    """Point url() references at the hashed files"""
+    def replace(match):
+        url = match.group(1) or match.group(2) or match.group(3)
+        if url.startswith(('data:', 'http:', 'https:', '//', '#')):
+            return match.group(0)
+        if url.startswith('/static/'):
+            target = url[len('/static/'):]
+        else:
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(css_path), url))
+        hashed = files.get(target)
+        if hashed is None:
+            return match.group(0)
+        return f"url('{ASSET_URL_PREFIX}{hashed}')"
+
+    return _CSS_URL.sub(replace, css)
+
+def rewrite_card_map(data, files):
+    """The atlas images are resolved relative to cards.json, use the hashed names"""
+    card_map = json.loads(data)
+    base = posixpath.dirname(CARD_MAP)
+    for fmt, filename in card_map['images'].items():
+        hashed = files.get(posixpath.join(base, filename))
+        if hashed:
+            card_map['images'][fmt] = posixpath.basename(hashed)
+    return json.dumps(card_map, separators=(',', ':')).encode()
+
+def write_compressed(path):
+    """Write .gz/.br next to a file if they are smaller, returns the encodings"""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    encodings = []
+    variants = [('gzip', '.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.insert(0, ('br', '.br', lambda raw: brotli.compress(raw, quality=11)))
+
+    for encoding, suffix, compress in variants:
+        compressed = compress(data)
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+            encodings.append(encoding)
+    return encodings
+
+def build_dist(bundle=False, minify=False):
+    """Copy static/ into static/dist under hashed names and write the manifest"""
+    sources = []
+    for root, dirs, filenames in os.walk(STATIC_DIR):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != DIST_DIR)
+        for filename in sorted(filenames):
+            if filename.startswith('.'):
+                continue
+            path = os.path.relpath(os.path.join(root, filename), STATIC_DIR).replace(os.sep, '/')
+            sources.append(path)
+
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    os.makedirs(DIST_DIR)
+
+    # CSS and the card map reference other files, they are hashed last
+    def build_order(path):
+        return (path.endswith('.css'), path == CARD_MAP)
+
+    files = {}
+    contents = {}
+    for path in sorted(sources, key=build_order):
+        with open(os.path.join(STATIC_DIR, path), 'rb') as f:
+            data = f.read()
+        if path.endswith('.css'):
+            css = rewrite_css_urls(data.decode('utf-8'), path, files)
+            data = (minify_css(css) if minify else css).encode('utf-8')
+        elif path.endswith('.js') and minify:
+            data = minify_js(data.decode('utf-8')).encode('utf-8')
+        elif path == CARD_MAP:
+            data = rewrite_card_map(data, files)
+
+        files[path] = hashed_name(path, data)
+        contents[path] = data
+
+    outputs = dict(files)
+    bundles = {}
+    if bundle:
+        css = '\n'.join(contents[path].decode('utf-8') for path in CSS_FILES)
+        # A semicolon between scripts guards against files without a trailing one
+        js = '\n;\n'.join(contents[path].decode('utf-8') for path in JS_FILES)
+        for kind, text in (('css', css), ('js', js)):
+            data = text.encode('utf-8')
+            bundles[kind] = hashed_name(f'{kind}/bundle.{kind}', data)
+            contents[f'{kind}/bundle.{kind}'] = data
+            outputs[f'{kind}/bundle.{kind}'] = bundles[kind]
+
+    compressed = {}
+    for path, hashed in outputs.items():
+        target = os.path.join(DIST_DIR, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(contents[path])
+        if path.endswith(COMPRESSIBLE):
+            encodings = write_compressed(target)
+            if encodings:
+                compressed[hashed] = encodings
+
+    manifest = {
+        'version': 1,
+        'files': files,
+        'bundles': bundles,
+        'compressed': compressed
+    }
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tschau-Sepp Asset-Build')
+    parser.add_argument('--cell-width', type=int, default=CELL_WIDTH)
+    parser.add_argument('--cell-height', type=int, default=CELL_HEIGHT)
+    parser.add_argument('--columns', type=int, default=COLUMNS)
+    parser.add_argument('--out', default=ATLAS_DIR, help='atlas output directory')
+    parser.add_argument('--skip-atlas', action='store_true',
+                        help='do not rebuild the card atlas (no Pillow needed)')
+    parser.add_argument('--skip-dist', action='store_true', help='only build the card atlas')
+    parser.add_argument('--bundle', action='store_true',
+                        help='concatenate the CSS and JS into one file each')
+    parser.add_argument('--minify', action='store_true',
+                        help='minify CSS (and JS if rjsmin is installed)')
+    args = parser.parse_args(argv)
+
+    if not args.skip_atlas:
+        card_map = build_atlas(args.cell_width, args.cell_height, args.columns, args.out)
+        source_bytes = sum(os.path.getsize(card_image_path(i)) for i in range(len(card_map['cards'])))
+        print(f"{len(card_map['cards'])} Karten, Einzelbilder: {source_bytes / 1024:.0f} KB")
+        for fmt, filename in card_map['images'].items():
+            size = os.path.getsize(os.path.join(args.out, filename))
+            print(f"  {filename:<12} {card_map['width']}x{card_map['height']}  {size / 1024:.0f} KB")
+
+    if not args.skip_dist:
+        if args.minify and rjsmin is None:
+            print('rjsmin not installed, JS is not minified')
+        if brotli is None:
+            print('brotli not installed, only gzip variants are written')
+        manifest = build_dist(bundle=args.bundle, minify=args.minify)
+        print(f"{len(manifest['files'])} Dateien -> {os.path.relpath(DIST_DIR, BASE_DIR)}, "
+              f"{len(manifest['compressed'])} vorkomprimiert"
+              + (f", Bundles: {', '.join(manifest['bundles'].values())}" if manifest['bundles'] else ''))
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+Card tracking for Tschau-Sepp bots
+A CardTracker follows one game from one bot's seat. GameEngine notifies
+its observers of every card movement (played, drawn, reshuffled) and of
+color choices. The tracker keeps what the bot can know as bitmasks over
+CARD_ORDER, so every event is a few bit operations:
+    - the unseen cards: neither in the bot's hand nor on the discard pile,
+      i.e. in the deck or in an opponent's hand
+    - per opponent and suit, whether it drew instead of answering that
+      suit (it had none then) and how many cards it drew since
+Bots query the chances that an opponent holds a suit, computed from the
+unseen cards of the suit and the opponent's unexplained cards, without
+replaying the game. Trackers are opt-in, attach_trackers gives one to
+every bot whose difficulty is in TRACKED_DIFFICULTIES.
+"""
+
+import os
+from game_logic import GameEngine, CARD_INDEX
+
+# Attach trackers at all, off makes the engine skip them entirely
+CARD_TRACKING = os.environ.get('CARD_TRACKING', 'true').lower() in ('1', 'true', 'yes')
+
+# Bot difficulties that play with a tracker
+TRACKED_DIFFICULTIES = ('hard', 'expert', 'learned')
+
+ALL_CARDS = (1 << len(CARD_INDEX)) - 1
+SUIT_MASKS = {suit: sum(1 << CARD_INDEX[(suit, value)] for value in GameEngine.VALUES)
+              for suit in GameEngine.SUITS}
+
+def card_bit(card) -> int:
+    return 1 << CARD_INDEX[(card.suit, card.value)]
+
+def cards_mask(cards) -> int:
+    mask = 0
+    for card in cards:
+        mask |= 1 << CARD_INDEX[(card.suit, card.value)]
+    return mask
+
+class CardTracker:
+    """Belief state of one seat, built from the game as it is when attached"""
+
+    def __init__(self, game, player_id):
+        self.game = game
+        self.player_id = player_id
+        player = game.get_player_by_id(player_id)
+        self.seat = game.players.index(player)
+        self.own = cards_mask(player.hand)
+        self.discard = cards_mask(game.discard_pile)
+        self.top = card_bit(game.discard_pile[-1]) if game.discard_pile else 0
+        # Opponent id -> suit -> cards drawn since it showed to have none, None if unknown
+        self.voids = {p.id: dict.fromkeys(GameEngine.SUITS) for p in game.players if p.id != player_id}
+
+    @property
+    def unseen(self) -> int:
+        return ALL_CARDS & ~self.own & ~self.discard
+
+    # Engine events
+
+    def card_played(self, player_id, card):
+        bit = card_bit(card)
+        self.discard |= bit
+        self.top = bit
+        if player_id == self.player_id:
+            self.own &= ~bit
+            return
+        voids = self.voids.get(player_id)
+        if voids and voids[card.suit]:
+            # One of the cards drawn since is accounted for
+            voids[card.suit] -= 1
+
+    def cards_drawn(self, player_id, cards, refused):
+        """refused: a voluntary draw, the player could not (or would not) answer"""
+        if player_id == self.player_id:
+            self.own |= cards_mask(cards)
+            return
+        voids = self.voids.get(player_id)
+        if voids is None:
+            return
+        for suit, drawn in voids.items():
+            if drawn is not None:
+                voids[suit] = drawn + len(cards)
+        if refused and self.game.current_color in voids:
+            voids[self.game.current_color] = len(cards)
+
+    def reshuffled(self):
+        # Everything below the top card goes back into the deck
+        self.discard = self.top
+
+    def color_selected(self, player_id, color):
+        voids = self.voids.get(player_id)
+        if voids:
+            # Nobody asks for a color they do not hold
+            voids[color] = None
+
+    # Queries
+
+    def unseen_in_suit(self, suit) -> int:
+        return (self.unseen & SUIT_MASKS[suit]).bit_count()
+
+    def suit_chances(self, opponent=None) -> dict:
+        """
+        Chance per suit that the opponent (a player object, default the next
+        player) holds at least one card of it
+        """
+        game = self.game
+        if opponent is None:
+            opponent = game.players[(self.seat + game.direction) % len(game.players)]
+        unseen = self.unseen
+        total = unseen.bit_count()
+        voids = self.voids.get(opponent.id)
+        chances = {}
+        for suit, mask in SUIT_MASKS.items():
+            in_suit = (unseen & mask).bit_count()
+            unknown = len(opponent.hand)
+            if voids and voids[suit] is not None:
+                unknown = min(unknown, voids[suit])
+            if not in_suit or not unknown:
+                chances[suit] = 0.0
+            else:
+                # Each unexplained card is one of the unseen ones
+                chances[suit] = 1.0 - (1.0 - in_suit / total) ** unknown
+        return chances
+
+def attach_trackers(game):
+    """Give every tracked bot of the game a fresh tracker, call after start or restore"""
+    if not CARD_TRACKING:
+        return
+    for player in game.players:
+        ai = getattr(player, 'ai', None)
+        if ai is not None and ai.difficulty in TRACKED_DIFFICULTIES:
+            ai.tracker = CardTracker(game, player.id)
+            game.observers.append(ai.tracker)
\ No newline at end of file
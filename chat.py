@@ -0,0 +1,122 @@
+"""
+Chat moderation and history for Tschau-Sepp
+Messages are checked against a word list (CHAT_FILTER_PATH, one word per
+line, '#' starts a comment) compiled once into an Aho-Corasick automaton:
+one pass over the message finds every listed word, however long the list
+is, and the matches are masked with '*'. Words match case-insensitively
+anywhere in the text, so compounds are caught too.
+Every room keeps its last CHAT_HISTORY messages in a ring buffer, which
+is sent along with 'reconnected'.
+"""
+
+import os
+from collections import deque
+from log_config import get_logger
+
+logger = get_logger('server')
+
+# Word list for the chat filter, empty disables it
+CHAT_FILTER_PATH = os.environ.get('CHAT_FILTER_PATH', '')
+
+# Messages kept per room for players who reconnect
+CHAT_HISTORY = int(os.environ.get('CHAT_HISTORY', 50))
+
+# Seconds chat messages of a room are collected into one batch under bursts
+CHAT_BATCH_WINDOW = float(os.environ.get('CHAT_BATCH_WINDOW', 0.1))
+
+def _lower(text):
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters lower to more than one, keep the positions
+    return ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+class WordFilter:
+    """Aho-Corasick automaton over lowercase words"""
+
+    def __init__(self, words):
+        self.goto = [{}]   # State -> character -> next state
+        self.fail = [0]    # State -> longest proper suffix that is also a state
+        self.longest = [0]  # State -> length of the longest word ending here, 0 for none
+        self.words = 0
+        for word in words:
+            self._add(_lower(word.strip()))
+        self._link()
+
+    def __len__(self):
+        return self.words
+
+    def _add(self, word):
+        if not word:
+            return
+        self.words += 1
+        state = 0
+        for ch in word:
+            following = self.goto[state].get(ch)
+            if following is None:
+                following = len(self.goto)
+                self.goto[state][ch] = following
+                self.goto.append({})
+                self.fail.append(0)
+                self.longest.append(0)
+            state = following
+        self.longest[state] = len(word)
+
+    def _link(self):
+        # Breadth first, a state's failure link is known before its children's
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, following in self.goto[state].items():
+                queue.append(following)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[following] = self.goto[fallback].get(ch, 0)
+                if not self.longest[following]:
+                    self.longest[following] = self.longest[self.fail[following]]
+
+    def mask(self, text):
+        """text with every listed word replaced by '*', text itself if nothing matched"""
+        goto, fail, longest = self.goto, self.fail, self.longest
+        state = 0
+        spans = None
+        for end, ch in enumerate(_lower(text), 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if longest[state]:
+                # Shorter words ending here lie inside the longest one
+                if spans is None:
+                    spans = []
+                spans.append((end - longest[state], end))
+        if spans is None:
+            return text
+        chars = list(text)
+        for start, end in spans:
+            chars[start:end] = '*' * (end - start)
+        return ''.join(chars)
+
+def load_filter(path=CHAT_FILTER_PATH):
+    """The filter for the word list at path, None without a list"""
+    if not path:
+        return None
+    try:
+        with open(path, encoding='utf-8') as f:
+            words = [line.split('#', 1)[0].strip() for line in f]
+    except OSError as e:
+        logger.warning('Chat filter list %s not readable, chat is not filtered: %s', path, e)
+        return None
+    words = [word for word in words if word]
+    word_filter = WordFilter(words)
+    logger.info('Chat filter loaded from %s (%d words)', path, len(word_filter))
+    return word_filter
+
+word_filter = load_filter()
+
+def moderate(message):
+    return word_filter.mask(message) if word_filter else message
+
+def new_history():
+    """Ring buffer of a room's recent chat messages"""
+    return deque(maxlen=CHAT_HISTORY)
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""
+Burst coalescing for Tschau-Sepp
+Small messages that come in bursts (chat, emotes) are collected per key,
+usually the room code, and handed to a flush callback as one batch per
+window instead of one emit each. With leading=True the first message of
+a quiet key goes out right away and only the ones that follow within the
+window wait, so a single message is not delayed. A window that flushed
+something stays open for another round, a sustained burst costs one
+flush per window.
+"""
+
+import threading
+import scheduler
+from log_config import get_logger
+
+logger = get_logger('server')
+
+class Coalescer:
+    def __init__(self, window, flush, leading=True):
+        self.window = window
+        self.flush = flush  # flush(key, items)
+        self.leading = leading
+        self.pending = {}  # Key -> items collected in its open window
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, key, item):
+        with self.lock:
+            items = self.pending.get(key)
+            if items is not None:
+                items.append(item)
+                return
+            self.pending[key] = [] if self.leading else [item]
+        scheduler.call_later(self.window, self._close, key)
+        if self.leading:
+            self.flush(key, [item])
+
+    def _close(self, key):
+        with self.lock:
+            items = self.pending.pop(key, None)
+            if items:
+                self.pending[key] = []
+        if not items:
+            return
+        scheduler.call_later(self.window, self._close, key)
+        try:
+            self.flush(key, items)
+        except Exception as e:
+            logger.exception('Error flushing %d coalesced items for %s: %s', len(items), key, e)
\ No newline at end of file
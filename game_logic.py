@@ -1,3 +1,4 @@
+import hashlib
 import random
 from typing import List, Dict, Optional, Any
 
@@ -11,12 +12,25 @@ class Card:
     
     def __eq__(self, other):
         return self.suit == other.suit and self.value == other.value
+    
+    def to_index(self) -> int:
+        """Position in the unshuffled deck (0-31), a compact card encoding"""
+        return CARD_INDEX[(self.suit, self.value)]
+    
+    @staticmethod
+    def from_index(index: int) -> 'Card':
+        return Card(*CARD_ORDER[index])
 
 class GameEngine:
     SUITS = ['rosen', 'schellen', 'schilten', 'eichel']
     VALUES = ['6', '7', '8', '9', 'U', 'O', 'K', 'A']
     CARDS_PER_PLAYER = 7
     
+    # Fields that fully describe a running game besides the cards
+    SNAPSHOT_FIELDS = ('current_player_index', 'current_color', 'current_value', 'direction',
+                       'special_effect_active', 'waiting_for_color_selection', 'skip_next_player',
+                       'must_draw_cards', 'ace_played', 'game_started', 'winner', 'game_messages')
+    
     def __init__(self, players):
         self.players = players
         self.deck = []
@@ -33,6 +47,8 @@ class GameEngine:
         self.game_started = False
         self.winner = None
         self.game_messages = []
+        self.state_version = 0  # Bumped with every message, i.e. every state change
+        self.observers = []  # Opt-in, e.g. card_tracker.CardTracker, told about every card movement
         
     def start_game(self):
         """Initialize and start a new game"""
@@ -124,6 +140,7 @@ class GameEngine:
         self.discard_pile.append(card)
         self.current_color = card.suit
         self.current_value = card.value
+        self.notify('card_played', player_id, card)
         
         # Reset player's tschau/sepp calls
         player.has_called_tschau = False
@@ -137,11 +154,7 @@ class GameEngine:
         # Check for Tschau penalty (after playing card, check if now has 1 card)
         if len(player.hand) == 1 and not player.has_called_tschau:
             # Penalty for not calling Tschau before playing penultimate card
-            for _ in range(2):
-                if len(self.deck) == 0:
-                    self.reshuffle_deck()
-                if len(self.deck) > 0:
-                    player.hand.append(self.deck.pop())
+            self.draw_cards(player, 2)
             self.add_message(f"{player.name} hat vergessen TSCHAU zu rufen! +2 Strafkarten")
         
         # Check for winner
@@ -151,11 +164,7 @@ class GameEngine:
                 return {'success': True, 'winner': player.id}
             else:
                 # Penalty for not calling Sepp
-                for _ in range(2):
-                    if len(self.deck) == 0:
-                        self.reshuffle_deck()
-                    if len(self.deck) > 0:
-                        player.hand.append(self.deck.pop())
+                self.draw_cards(player, 2)
                 self.add_message(f"{player.name} hat vergessen SEPP zu rufen! +2 Strafkarten")
         
         # Move to next player if no color selection needed
@@ -177,12 +186,7 @@ class GameEngine:
             return {'success': False, 'reason': 'Warte auf Farbauswahl'}
         
         cards_to_draw = max(1, self.must_draw_cards)
-        
-        for _ in range(cards_to_draw):
-            if len(self.deck) == 0:
-                self.reshuffle_deck()
-            if len(self.deck) > 0:
-                player.hand.append(self.deck.pop())
+        self.draw_cards(player, cards_to_draw, refused=self.must_draw_cards == 0)
         
         self.add_message(f"{player.name} zieht {cards_to_draw} Karte(n)")
         
@@ -195,6 +199,27 @@ class GameEngine:
         
         return {'success': True}
     
+    def draw_cards(self, player, count: int, refused: bool = False) -> list:
+        """
+        Move up to count cards from the deck to the player's hand, reshuffling
+        when it runs out. refused marks a voluntary draw instead of a play
+        """
+        drawn = []
+        for _ in range(count):
+            if len(self.deck) == 0:
+                self.reshuffle_deck()
+            if len(self.deck) > 0:
+                drawn.append(self.deck.pop())
+        player.hand.extend(drawn)
+        if drawn:
+            self.notify('cards_drawn', player.id, drawn, refused)
+        return drawn
+    
+    def notify(self, event: str, *args):
+        """Call event(*args) on every observer"""
+        for observer in self.observers:
+            getattr(observer, event)(*args)
+    
     def select_color(self, player_id: str, color: str) -> dict:
         """Select color after playing a Jack (Bube/Under)"""
         if not self.waiting_for_color_selection:
@@ -208,6 +233,7 @@ class GameEngine:
         
         self.current_color = color
         self.waiting_for_color_selection = False
+        self.notify('color_selected', player_id, color)
         
         player = self.get_player_by_id(player_id)
         self.add_message(f"{player.name} wählt {color}")
@@ -228,11 +254,7 @@ class GameEngine:
             return {'success': True, 'message': 'Tschau erfolgreich gerufen'}
         else:
             # Penalty for wrong call
-            for _ in range(2):
-                if len(self.deck) == 0:
-                    self.reshuffle_deck()
-                if len(self.deck) > 0:
-                    player.hand.append(self.deck.pop())
+            self.draw_cards(player, 2)
             self.add_message(f"{player.name} ruft TSCHAU zur falschen Zeit! +2 Strafkarten")
             return {'success': False, 'message': 'Falsche Zeit für Tschau! +2 Strafkarten'}
     
@@ -249,11 +271,7 @@ class GameEngine:
             return {'success': True, 'message': 'Sepp! Du hast gewonnen!'}
         else:
             # Penalty for wrong call
-            for _ in range(2):
-                if len(self.deck) == 0:
-                    self.reshuffle_deck()
-                if len(self.deck) > 0:
-                    player.hand.append(self.deck.pop())
+            self.draw_cards(player, 2)
             self.add_message(f"{player.name} ruft SEPP zur falschen Zeit! +2 Strafkarten")
             return {'success': False, 'message': 'Falsche Zeit für Sepp! +2 Strafkarten'}
     
@@ -277,6 +295,25 @@ class GameEngine:
         # Standard rules: match color or value
         return card.suit == self.current_color or card.value == self.current_value
     
+    def rule_state(self) -> int:
+        """
+        Index into RULE_TABLE: everything can_play_card looks at, as
+        mode * 32 + color * 8 + value (color and value only where they matter)
+        """
+        if not self.game_started:
+            return RULE_MODES.index('not_started') * 32
+        if self.must_draw_cards > 0:
+            if self.special_effect_active == '7':
+                return RULE_MODES.index('stack_7') * 32
+            if self.special_effect_active == 'O':
+                return RULE_MODES.index('stack_rose_ober') * 32
+            return RULE_MODES.index('must_draw') * 32
+        color = self.SUITS.index(self.current_color) if self.current_color in self.SUITS else 0
+        if self.ace_played:
+            return RULE_MODES.index('ace') * 32 + color * 8
+        value = self.VALUES.index(self.current_value) if self.current_value in self.VALUES else 0
+        return RULE_MODES.index('normal') * 32 + color * 8 + value
+    
     def handle_special_effects(self, card: Card, is_start_card: bool = False):
         """Handle special card effects"""
         self.special_effect_active = None
@@ -338,6 +375,7 @@ class GameEngine:
         self.deck = self.discard_pile
         self.discard_pile = [top_card]
         random.shuffle(self.deck)
+        self.notify('reshuffled')
         
         self.add_message("Ablagestapel wurde neu gemischt")
     
@@ -351,6 +389,7 @@ class GameEngine:
     def add_message(self, message: str):
         """Add a game message"""
         self.game_messages.append(message)
+        self.state_version += 1
         # Keep only last 20 messages
         if len(self.game_messages) > 20:
             self.game_messages.pop(0)
@@ -393,5 +432,90 @@ class GameEngine:
             'special_effect': self.special_effect_active,
             'messages': self.game_messages[-5:],  # Last 5 messages
             'winner': self.winner,
-            'my_turn': self.get_current_player().id == player_id
-        }
\ No newline at end of file
+            'my_turn': self.get_current_player().id == player_id,
+            'state_version': self.state_version,
+            'rule_state': self.rule_state()
+        }
+    
+    def get_public_view(self) -> dict:
+        """Get the public game state shared by all spectators (no hands)"""
+        top_card = None
+        if self.discard_pile:
+            top_card = self.discard_pile[-1].to_dict()
+        
+        current_player = self.get_current_player()
+        return {
+            'players': [{
+                'id': p.id,
+                'name': p.name,
+                'card_count': len(p.hand),
+                'has_called_tschau': p.has_called_tschau,
+                'has_called_sepp': p.has_called_sepp
+            } for p in self.players],
+            'current_player_id': current_player.id,
+            'current_player_name': current_player.name,
+            'discard_top': top_card,
+            'current_color': self.current_color,
+            'current_value': self.current_value,
+            'deck_count': len(self.deck),
+            'waiting_for_color': self.waiting_for_color_selection,
+            'must_draw_cards': self.must_draw_cards,
+            'special_effect': self.special_effect_active,
+            'messages': self.game_messages[-5:],
+            'winner': self.winner,
+            'state_version': self.state_version
+        }
+    
+    def to_snapshot(self) -> dict:
+        """Plain data for a restart handoff, the hands are stored with the players"""
+        data = {field: getattr(self, field) for field in self.SNAPSHOT_FIELDS}
+        data['game_messages'] = self.game_messages[-5:]  # As many as the views show
+        data['state_version'] = self.state_version
+        data['deck'] = [card.to_index() for card in self.deck]
+        data['discard_pile'] = [card.to_index() for card in self.discard_pile]
+        return data
+    
+    @classmethod
+    def from_snapshot(cls, data: dict, players) -> 'GameEngine':
+        """Rebuild a game from to_snapshot() data around already restored players"""
+        game = cls(players)
+        for field in cls.SNAPSHOT_FIELDS:
+            setattr(game, field, data[field])
+        game.game_messages = list(game.game_messages)
+        game.state_version = data.get('state_version', 0)  # Missing in snapshots of older releases
+        game.deck = [Card.from_index(index) for index in data['deck']]
+        game.discard_pile = [Card.from_index(index) for index in data['discard_pile']]
+        return game
+
+# Unshuffled deck order used by Card.to_index / Card.from_index
+CARD_ORDER = [(suit, value) for suit in GameEngine.SUITS for value in GameEngine.VALUES]
+CARD_INDEX = {card: index for index, card in enumerate(CARD_ORDER)}
+
+# Situations that decide which cards are playable, see GameEngine.rule_state
+RULE_MODES = ('normal', 'ace', 'stack_7', 'stack_rose_ober', 'must_draw', 'not_started')
+
+def build_rule_table():
+    """
+    Playable cards for every rule state as a bitmask over CARD_ORDER,
+    evaluated with can_play_card itself so the client cannot drift from it
+    """
+    game = GameEngine([])
+    masks = []
+    for state in range(len(RULE_MODES) * 32):
+        mode = RULE_MODES[state // 32]
+        game.game_started = mode != 'not_started'
+        game.must_draw_cards = {'stack_7': 2, 'stack_rose_ober': 4, 'must_draw': 2}.get(mode, 0)
+        game.special_effect_active = {'stack_7': '7', 'stack_rose_ober': 'O'}.get(mode)
+        game.ace_played = mode == 'ace'
+        game.current_color = GameEngine.SUITS[state % 32 // 8]
+        game.current_value = GameEngine.VALUES[state % 8]
+        if game.rule_state() != state:
+            # Color or value does not matter in this mode, only its first entry is used
+            masks.append(0)
+            continue
+        masks.append(sum(1 << index for index, card in enumerate(CARD_ORDER)
+                         if game.can_play_card(Card(*card))))
+    return masks
+
+RULE_TABLE = build_rule_table()
+RULES_VERSION = hashlib.sha1(repr((CARD_ORDER, RULE_TABLE)).encode()).hexdigest()[:12]
\ No newline at end of file
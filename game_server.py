@@ -1,17 +1,41 @@
 import os
 import secrets
+import signal
 import string
 import time
-import html
-import re
 import random
+import logging
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, session
+from flask import Flask, render_template, request, session, jsonify, Response
 from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
 from flask_cors import CORS
 from rate_limiter import rate_limit
+from payloads import validated, sanitize_text, MAX_FRAME_BYTES
+from chat import moderate, new_history, CHAT_BATCH_WINDOW
+from coalescer import Coalescer
 from ai_player import AIPlayer
+from game_logic import GameEngine, Card, CARD_ORDER, RULE_TABLE, RULES_VERSION
+from card_tracker import attach_trackers
 from simple_ai_handler import trigger_ai_turn
+from spectators import (MAX_SPECTATORS, SPECTATOR_DELAY, spectator_room,
+                        send_to_spectators, broadcast_spectator_view)
+from matchmaking import MatchmakingQueue, MATCH_INTERVAL, BOT_FILL_AFTER, DIFFICULTIES
+import metrics
+from metrics import (instrument, observe_payload, VIEW_BUILD_SECONDS, CONNECTED_SIDS,
+                     ROOMS_COLLECTED_TOTAL, ROOM_RECLAIMED_BYTES_TOTAL, ADMISSION_REJECTED_TOTAL)
+from log_config import setup_logging, get_logger, shutdown_logging
+from static_assets import init_assets
+from reconnect_tokens import ReconnectTokens
+from snapshot import write_snapshot, read_snapshot, SNAPSHOT_PATH, SNAPSHOT_VERSION, DRAIN_FLUSH_SECONDS, SHUTDOWN_POLL_SECONDS
+from room_gc import RoomTTLIndex, room_horizon, deep_sizeof, process_rss_bytes, ROOM_GC_INTERVAL
+from results_store import results, game_result
+from room_mailbox import RoomMailbox
+from backpressure import backpressure
+from profiler import profiler, PROFILE, PROFILE_REPORT_POLL
+import scheduler
+
+setup_logging()
+logger = get_logger('server')
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'tschau-sepp-secret-key-2024')
@@ -24,13 +48,36 @@ else:
     cors_origins = "*"  # Allow all in development
 
 CORS(app, origins=cors_origins)
+init_assets(app)
 socketio = SocketIO(app, cors_allowed_origins=cors_origins, async_mode='eventlet', 
-                    ping_timeout=60, ping_interval=25)
+                    ping_timeout=60, ping_interval=25, max_http_buffer_size=MAX_FRAME_BYTES)
+scheduler.install(scheduler.ThreadScheduler(socketio))
+
+# Token for admin socket events, empty disables them
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+
+# Bot-vs-bot rooms kept running in the background, 0 disables them
+BOT_ROOMS = int(os.environ.get('BOT_ROOMS', 0))
+
+# Seconds emotes of a room are collected into one emotes_batch
+EMOTE_BATCH_WINDOW = float(os.environ.get('EMOTE_BATCH_WINDOW', 0.25))
+
+if PROFILE:
+    profiler.start()
 
 # In-memory storage for rooms and players
 game_rooms = {}
 player_sessions = {}
-disconnected_players = {}  # Store disconnected players for reconnection
+disconnected_players = ReconnectTokens()  # Reconnect token -> room and persistent player id
+spectator_sessions = {}  # Spectator sid -> room code
+matchmaking_queue = MatchmakingQueue()
+matcher_started = False
+room_ttl = RoomTTLIndex()  # Rooms by the time they may be collected
+room_gc_started = False
+backpressure_started = False
+bot_rooms_started = False
+draining = False  # Set on shutdown, no new rooms or games are accepted
+shutdown_signal = None  # Signal number once SIGTERM/SIGINT arrived
 
 class Player:
     def __init__(self, sid, name, player_id=None, is_ai=False, ai_difficulty='medium'):
@@ -45,6 +92,32 @@ class Player:
         self.turn_start_time = None
         self.is_ai = is_ai
         self.ai = AIPlayer(difficulty=ai_difficulty, name=name) if is_ai else None
+    
+    def to_snapshot(self):
+        return {
+            'id': self.id,
+            'player_id': self.player_id,
+            'name': self.name,
+            'hand': [card.to_index() for card in self.hand],
+            'connected': self.connected,
+            'has_called_tschau': self.has_called_tschau,
+            'has_called_sepp': self.has_called_sepp,
+            'disconnect_time': self.disconnect_time,
+            'is_ai': self.is_ai,
+            'ai_difficulty': self.ai.difficulty if self.ai else None
+        }
+    
+    @classmethod
+    def from_snapshot(cls, data, shift=0.0):
+        player = cls(data['id'], data['name'], player_id=data['player_id'], is_ai=data['is_ai'],
+                     ai_difficulty=data['ai_difficulty'] or 'medium')
+        player.hand = [Card.from_index(index) for index in data['hand']]
+        player.connected = data['connected']
+        player.has_called_tschau = data['has_called_tschau']
+        player.has_called_sepp = data['has_called_sepp']
+        if data['disconnect_time'] is not None:
+            player.disconnect_time = data['disconnect_time'] + shift
+        return player
 
 class GameRoom:
     def __init__(self, room_code, creator_sid):
@@ -58,6 +131,19 @@ class GameRoom:
         self.turn_duration = 60  # seconds per turn
         self.allow_reconnect = True
         self.reconnect_grace_period = 120  # seconds to reconnect
+        self.spectators = set()  # Spectator sids (read-only viewers)
+        self.last_spectator_view = None
+        self.chat = new_history()  # Recent chat messages, replayed on reconnect
+        self.turn_remaining = None  # Seconds left of the turn interrupted by a pause
+        self.game_started_at = None
+        self.mailbox = RoomMailbox()  # Serializes everything that changes the running game
+        self.turn_number = 0  # Bumped by every turn timer, stale timeouts and bot moves check it
+        self.touch()
+    
+    def touch(self):
+        """Record player activity, call after status changes too"""
+        self.last_activity = time.time()
+        room_ttl.schedule(self.code, self.last_activity + room_horizon(self.status))
         
     def add_player(self, player):
         if len(self.players) < 2:
@@ -68,6 +154,13 @@ class GameRoom:
     def remove_player(self, player_id):
         self.players = [p for p in self.players if p.id != player_id]
         
+    def has_audience(self):
+        """Whether a connected human player or a spectator sees the game"""
+        return bool(self.spectators) or any(p.connected and not p.is_ai for p in self.players)
+    
+    def is_bot_room(self):
+        return bool(self.players) and all(p.is_ai for p in self.players)
+    
     def is_ready_to_start(self):
         return len(self.players) == 2 and all(p.connected for p in self.players)
     
@@ -86,14 +179,56 @@ class GameRoom:
     def pause_game(self):
         if self.status == 'playing':
             self.status = 'paused'
+            # Keep the rest of the current turn for when the game resumes
+            if self.turn_timer:
+                self.turn_timer.cancel()
+            current_player = self.game_state.get_current_player() if self.game_state else None
+            if current_player and current_player.turn_start_time:
+                elapsed = time.time() - current_player.turn_start_time
+                self.turn_remaining = max(1.0, self.turn_duration - elapsed)
+            self.touch()
             return True
         return False
     
     def resume_game(self):
         if self.status == 'paused' and all(p.connected for p in self.players):
             self.status = 'playing'
+            self.touch()
             return True
         return False
+    
+    def to_snapshot(self):
+        """Plain data of a paused game for the restart handoff"""
+        return {
+            'code': self.code,
+            'status': self.status,
+            'created_at': self.created_at.timestamp(),
+            'turn_duration': self.turn_duration,
+            'turn_remaining': self.turn_remaining,
+            'game_started_at': self.game_started_at,
+            'reconnect_grace_period': self.reconnect_grace_period,
+            'players': [player.to_snapshot() for player in self.players],
+            'game': self.game_state.to_snapshot() if self.game_state else None,
+            'chat': list(self.chat)
+        }
+    
+    @classmethod
+    def from_snapshot(cls, data, shift=0.0):
+        room = cls(data['code'], None)
+        room.created_at = datetime.fromtimestamp(data['created_at'])
+        room.turn_duration = data['turn_duration']
+        room.turn_remaining = data['turn_remaining']
+        if data.get('game_started_at'):
+            room.game_started_at = data['game_started_at'] + shift
+        room.reconnect_grace_period = data['reconnect_grace_period']
+        room.players = [Player.from_snapshot(p, shift) for p in data['players']]
+        if data['game']:
+            room.game = room.game_state = GameEngine.from_snapshot(data['game'], room.players)
+            attach_trackers(room.game)
+        room.chat.extend(data.get('chat', ()))  # Missing in snapshots of older releases
+        room.status = data['status']
+        room.touch()
+        return room
 
 def generate_room_code():
     """Generate a unique 6-character room code"""
@@ -102,40 +237,65 @@ def generate_room_code():
         if code not in game_rooms:
             return code
 
-def sanitize_input(text, max_length=200):
-    """Sanitize user input to prevent XSS and injection attacks"""
-    if not text:
-        return ""
-    
-    # Convert to string and limit length
-    text = str(text)[:max_length]
-    
-    # HTML escape special characters
-    text = html.escape(text)
-    
-    # Remove any potential script tags or javascript
-    text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.IGNORECASE | re.DOTALL)
-    text = re.sub(r'javascript:', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'on\w+\s*=', '', text, flags=re.IGNORECASE)
-    
-    # Remove excessive whitespace
-    text = ' '.join(text.split())
-    
-    return text.strip()
+def broadcast_game_state(room, room_code):
+    """Send every human player their own view and spectators the public view"""
+    for player in room.players:
+        if not (hasattr(player, 'is_ai') and player.is_ai):
+            started = time.perf_counter()
+            game_view = room.game_state.get_player_view(player.id)
+            VIEW_BUILD_SECONDS.observe(time.perf_counter() - started)
+            game_view['turn_time_limit'] = room.turn_duration
+            observe_payload('game_update', game_view)
+            backpressure.send_state(socketio, 'game_update', game_view, player.id)
+
+    broadcast_spectator_view(room, room_code, socketio)
+
+def remove_spectator(sid):
+    """Remove a spectator from the room they are watching"""
+    room_code = spectator_sessions.pop(sid, None)
+    if room_code is None:
+        return
+
+    leave_room(spectator_room(room_code), sid=sid)
+    room = game_rooms.get(room_code)
+    if room:
+        room.spectators.discard(sid)
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_template('index.html', rules_version=RULES_VERSION)
+
+@app.route('/api/rules')
+def rule_table():
+    """Playable-card masks for client-side pre-validation, immutable per RULES_VERSION"""
+    etag = f'"{RULES_VERSION}"'
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=304, headers={'ETag': etag})
+    response = jsonify({
+        'version': RULES_VERSION,
+        'cards': [f'{suit}-{value}' for suit, value in CARD_ORDER],
+        'masks': RULE_TABLE
+    })
+    response.headers['ETag'] = etag
+    if request.args.get('v') == RULES_VERSION:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @socketio.on('connect')
-def handle_connect():
-    print(f'Client connected: {request.sid}')
+@instrument('connect')
+def handle_connect(auth=None):
+    logger.info('Client connected: %s', request.sid)
+    CONNECTED_SIDS.inc()
+    ensure_backpressure_running()
+    ensure_bot_rooms_running()
     
     # Check for reconnection token in session
     reconnect_token = request.args.get('reconnect_token')
-    if reconnect_token and reconnect_token in disconnected_players:
+    reconnect_data = disconnected_players.get(reconnect_token) if reconnect_token else None
+    if reconnect_data:
         # Handle reconnection
-        reconnect_data = disconnected_players[reconnect_token]
         room_code = reconnect_data['room_code']
         player_id = reconnect_data['player_id']
         
@@ -151,14 +311,14 @@ def handle_connect():
                     player.id = request.sid
                     player.connected = True
                     player.disconnect_time = None
+                    room.touch()
                     
                     # Rejoin socket room
                     join_room(room_code)
                     player_sessions[request.sid] = {'room_code': room_code, 'player': player}
                     
                     # Resume game if it was paused
-                    if room.resume_game():
-                        emit('game_resumed', room=room_code)
+                    room.mailbox.submit(apply_resume, room, room_code)
                     
                     # Send current game state
                     if room.game_state:
@@ -166,13 +326,15 @@ def handle_connect():
                         emit('reconnected', {
                             'success': True,
                             'game_state': game_view,
-                            'room_code': room_code
+                            'room_code': room_code,
+                            'chat': list(room.chat)
                         })
                     else:
                         emit('reconnected', {
                             'success': True,
                             'room_code': room_code,
-                            'players': [{'id': p.id, 'name': p.name} for p in room.players]
+                            'players': [{'id': p.id, 'name': p.name} for p in room.players],
+                            'chat': list(room.chat)
                         })
                     
                     # Notify other players
@@ -182,9 +344,9 @@ def handle_connect():
                     }, room=room_code, skip_sid=request.sid)
                     
                     # Clean up disconnected player entry
-                    del disconnected_players[reconnect_token]
+                    disconnected_players.pop(reconnect_token)
                     
-                    print(f'Player {player.name} reconnected to room {room_code}')
+                    logger.info('Player %s reconnected to room %s', player.name, room_code)
                     return
     
     emit('connected', {
@@ -193,8 +355,18 @@ def handle_connect():
     })
 
 @socketio.on('disconnect')
+@instrument('disconnect')
 def handle_disconnect():
-    print(f'Client disconnected: {request.sid}')
+    logger.info('Client disconnected: %s', request.sid)
+    CONNECTED_SIDS.dec()
+    
+    # Drop from the quick-match queue
+    matchmaking_queue.cancel(request.sid)
+    
+    # Spectators hold no game state, just drop them
+    if request.sid in spectator_sessions:
+        remove_spectator(request.sid)
+        return
     
     # Find and handle player disconnection from any room
     for room_code, room in list(game_rooms.items()):
@@ -203,21 +375,9 @@ def handle_disconnect():
             player.connected = False
             player.disconnect_time = time.time()
             
-            # Generate reconnection token
-            reconnect_token = secrets.token_hex(16)
-            disconnected_players[reconnect_token] = {
-                'room_code': room_code,
-                'player_id': player.player_id,
-                'disconnect_time': player.disconnect_time
-            }
-            
             # If game is in progress, pause it
             if room.status == 'playing':
-                room.pause_game()
-                emit('game_paused', {
-                    'player_name': player.name,
-                    'grace_period': room.reconnect_grace_period
-                }, room=room_code)
+                room.mailbox.submit(apply_pause, room, room_code, player)
             
             # Notify other players in the room
             emit('player_disconnected', {
@@ -232,21 +392,50 @@ def handle_disconnect():
                 room.remove_player(request.sid)
                 if len(room.players) == 0:
                     del game_rooms[room_code]
+                    room_ttl.discard(room_code)
                 else:
                     emit('player_left', {
                         'players': [{'id': p.id, 'name': p.name} for p in room.players]
                     }, room=room_code)
             else:
-                # Store the reconnect token for the player
+                # Store the reconnect token for the player (replaces an older one)
+                reconnect_token = disconnected_players.issue(room_code, player.player_id,
+                                                             room.reconnect_grace_period,
+                                                             now=player.disconnect_time)
                 emit('store_reconnect_token', {
                     'token': reconnect_token,
                     'expires_in': room.reconnect_grace_period
                 }, room=request.sid)
 
+def apply_pause(room, room_code, player):
+    if room.pause_game():
+        socketio.emit('game_paused', {
+            'player_name': player.name,
+            'grace_period': room.reconnect_grace_period
+        }, room=room_code)
+
+def apply_resume(room, room_code):
+    if room.resume_game():
+        socketio.emit('game_resumed', room=room_code)
+        resume_turn(room, room_code)
+
 @socketio.on('create_room')
+@instrument('create_room')
 @rate_limit('create_room')
+@validated('create_room')
 def handle_create_room(data):
-    player_name = sanitize_input(data.get('player_name', 'Spieler 1'), 30)
+    # Creating or joining a room ends a quick-match search, or it could seat them twice
+    if matchmaking_queue.cancel(request.sid):
+        emit('match_cancelled', {})
+    
+    if draining:
+        emit('error', {'message': 'Server wird neu gestartet, bitte gleich nochmals versuchen'})
+        return
+    
+    if not admit_new_room():
+        return
+    
+    player_name = data['player_name']
     room_code = generate_room_code()
     
     # Create new room and player
@@ -258,6 +447,7 @@ def handle_create_room(data):
     game_rooms[room_code] = room
     player_sessions[request.sid] = {'room_code': room_code, 'player': player}
     join_room(room_code)
+    ensure_room_gc_running()
     
     emit('room_created', {
         'room_code': room_code,
@@ -265,13 +455,19 @@ def handle_create_room(data):
         'players': [{'id': p.id, 'name': p.name} for p in room.players]
     })
     
-    print(f'Room {room_code} created by {player_name}')
+    logger.info('Room %s created by %s', room_code, player_name)
 
 @socketio.on('join_room')
+@instrument('join_room')
 @rate_limit('join_room')
+@validated('join_room')
 def handle_join_room(data):
-    room_code = sanitize_input(data.get('room_code', '').upper(), 6)
-    player_name = sanitize_input(data.get('player_name', 'Spieler 2'), 30)
+    # Creating or joining a room ends a quick-match search, or it could seat them twice
+    if matchmaking_queue.cancel(request.sid):
+        emit('match_cancelled', {})
+    
+    room_code = data['room_code']
+    player_name = data['player_name']
     
     # Check if room exists
     if room_code not in game_rooms:
@@ -295,6 +491,7 @@ def handle_join_room(data):
     if room.add_player(player):
         player_sessions[request.sid] = {'room_code': room_code, 'player': player}
         join_room(room_code)
+        room.touch()
         
         # Notify all players in room
         emit('player_joined', {
@@ -310,10 +507,12 @@ def handle_join_room(data):
             'ready_to_start': room.is_ready_to_start()
         })
         
-        print(f'{player_name} joined room {room_code}')
+        logger.info('%s joined room %s', player_name, room_code)
 
 @socketio.on('add_bot')
+@instrument('add_bot')
 @rate_limit('add_bot')
+@validated('add_bot')
 def handle_add_bot(data):
     """Add an AI bot to the room"""
     if request.sid not in player_sessions:
@@ -338,30 +537,405 @@ def handle_add_bot(data):
         return
     
     # Create AI bot
-    bot_difficulty = data.get('difficulty', 'medium')
-    bot_names = ['Bot-Max', 'Bot-Anna', 'Bot-Tom', 'Bot-Lisa', 'Bot-Felix', 'Bot-Emma']
-    bot_name = random.choice(bot_names)
-    bot_id = f"bot_{room_code}_{secrets.token_hex(4)}"
-    
-    bot = Player(bot_id, bot_name, is_ai=True, ai_difficulty=bot_difficulty)
+    bot = create_bot(room_code, data['difficulty'])
+    bot_name = bot.name
     
     if room.add_player(bot):
+        room.touch()
+        
         # Notify all players in room
         emit('player_joined', {
             'players': [{'id': p.id, 'name': p.name, 'is_ai': p.is_ai} for p in room.players],
             'ready_to_start': room.is_ready_to_start()
         }, room=room_code)
         
-        print(f'Bot {bot_name} added to room {room_code}')
+        logger.info('Bot %s added to room %s', bot_name, room_code)
         
         # Auto-start if room is full
         if len(room.players) == 2:
             emit('bot_ready', {'message': f'{bot_name} ist bereit!'}, room=room_code)
 
+def create_bot(room_code, difficulty):
+    """Create an AI bot player for a room"""
+    bot_names = ['Bot-Max', 'Bot-Anna', 'Bot-Tom', 'Bot-Lisa', 'Bot-Felix', 'Bot-Emma']
+    bot_name = random.choice(bot_names)
+    bot_id = f"bot_{room_code}_{secrets.token_hex(4)}"
+    
+    return Player(bot_id, bot_name, is_ai=True, ai_difficulty=difficulty)
+
 # REMOVED - Using simple_ai_handler.py instead
 # This function was broken and incomplete
 
+@socketio.on('find_match')
+@instrument('find_match')
+@rate_limit('find_match')
+@validated('find_match')
+def handle_find_match(data):
+    """Put the player into the quick-match queue"""
+    if draining:
+        emit('error', {'message': 'Server wird neu gestartet, bitte gleich nochmals versuchen'})
+        return
+    
+    if request.sid in player_sessions:
+        emit('error', {'message': 'Du bist bereits in einem Raum'})
+        return
+    
+    if not admit_new_room():
+        return
+    
+    matchmaking_queue.enqueue(request.sid, data['player_name'], data['skill'], data['difficulty'])
+    ensure_matcher_running()
+    
+    emit('match_searching', {
+        'waiting': len(matchmaking_queue),
+        'bot_fill_after': BOT_FILL_AFTER
+    })
+
+@socketio.on('cancel_match')
+@instrument('cancel_match')
+@validated('cancel_match')
+def handle_cancel_match(data):
+    if matchmaking_queue.cancel(request.sid):
+        emit('match_cancelled', {})
+
+def ensure_matcher_running():
+    """Start the matcher loop on first use"""
+    global matcher_started
+    if not matcher_started:
+        matcher_started = True
+        scheduler.every(MATCH_INTERVAL, run_matcher)
+
+def run_matcher():
+    """Pair queued players in batches and fill long waits with a bot"""
+    if draining:
+        return
+    try:
+        pairs, bot_fills = matchmaking_queue.match_batch()
+        for first, second in pairs:
+            create_match_room([first, second])
+        for entry in bot_fills:
+            create_match_room([entry], bot_difficulty=entry.difficulty)
+    except Exception as e:
+        logger.exception('Error in matcher loop: %s', e)
+
+def create_match_room(entries, bot_difficulty=None):
+    """Create a room for matched queue entries and start the game right away"""
+    room_code = generate_room_code()
+    room = GameRoom(room_code, entries[0].sid)
+    
+    for entry in entries:
+        player = Player(entry.sid, entry.name)
+        room.add_player(player)
+        player_sessions[entry.sid] = {'room_code': room_code, 'player': player}
+        socketio.server.enter_room(entry.sid, room_code, namespace='/')
+    
+    if bot_difficulty:
+        room.add_player(create_bot(room_code, bot_difficulty))
+    
+    game_rooms[room_code] = room
+    ensure_room_gc_running()
+    
+    players = [{'id': p.id, 'name': p.name, 'is_ai': p.is_ai} for p in room.players]
+    for entry in entries:
+        socketio.emit('match_found', {
+            'room_code': room_code,
+            'player_id': entry.sid,
+            'players': players
+        }, to=entry.sid)
+    
+    logger.info('Match room %s created for %s', room_code, [p.name for p in room.players])
+    start_room_game(room, room_code)
+
+def ensure_bot_rooms_running():
+    """Start the bot room filler on first use if BOT_ROOMS is set"""
+    global bot_rooms_started
+    if BOT_ROOMS > 0 and not bot_rooms_started:
+        bot_rooms_started = True
+        fill_bot_rooms()
+        scheduler.every(ROOM_GC_INTERVAL, fill_bot_rooms)
+
+def fill_bot_rooms():
+    """Start bot-vs-bot games until BOT_ROOMS of them are running"""
+    if draining:
+        return
+    try:
+        running = sum(1 for room in list(game_rooms.values())
+                      if room.status == 'playing' and room.is_bot_room())
+        for _ in range(BOT_ROOMS - running):
+            room_code = generate_room_code()
+            room = GameRoom(room_code, None)
+            for difficulty in random.sample(DIFFICULTIES, 2):
+                room.add_player(create_bot(room_code, difficulty))
+            game_rooms[room_code] = room
+            ensure_room_gc_running()
+            start_room_game(room, room_code)
+    except Exception as e:
+        logger.exception('Error starting bot rooms: %s', e)
+
+def admit_new_room():
+    """Refuse a new room while the server is overloaded, running games go first"""
+    reason = backpressure.admission()
+    if reason:
+        ADMISSION_REJECTED_TOTAL.inc(reason)
+        emit('error', {'message': 'Server ist ausgelastet, bitte gleich nochmals versuchen'})
+        return False
+    return True
+
+def ensure_backpressure_running():
+    """Start the send queue check on the first connection"""
+    global backpressure_started
+    if not backpressure_started:
+        backpressure_started = True
+        scheduler.every(backpressure.interval, check_backpressure)
+
+def check_backpressure():
+    backpressure.check(socketio)
+    profiler.record_lag(backpressure.loop_lag)
+
+def ensure_room_gc_running():
+    """Start the room collector on first use"""
+    global room_gc_started
+    if not room_gc_started:
+        room_gc_started = True
+        scheduler.every(ROOM_GC_INTERVAL, run_room_gc)
+
+def run_room_gc():
+    """Close rooms past their idle, finished or paused horizon"""
+    try:
+        disconnected_players.expire()
+        sweep_rooms()
+    except Exception as e:
+        logger.exception('Error in room collector: %s', e)
+
+def sweep_rooms(now=None):
+    """Close all rooms that are due, returns (rooms closed, bytes reclaimed)"""
+    now = now or time.time()
+    closed = 0
+    reclaimed = 0
+    
+    for room_code in room_ttl.pop_due(now):
+        room = game_rooms.get(room_code)
+        if room is None:
+            continue
+        
+        # Activity since scheduling moved the deadline, check again later
+        deadline = room.last_activity + room_horizon(room.status)
+        if deadline > now:
+            room_ttl.schedule(room_code, deadline)
+            continue
+        
+        reason = room.status if room.status in ('finished', 'paused') else 'idle'
+        freed = close_room(room_code, reason)
+        closed += 1
+        reclaimed += freed
+        ROOMS_COLLECTED_TOTAL.inc(reason)
+        ROOM_RECLAIMED_BYTES_TOTAL.inc(amount=freed)
+        logger.info('Closed %s room %s after %.0fs without activity (age %s, ~%d KB)',
+                    reason, room_code, now - room.last_activity,
+                    str(datetime.now() - room.created_at).split('.')[0], freed // 1024)
+    
+    if closed:
+        rss = process_rss_bytes()
+        logger.info('Room collector closed %d rooms, ~%d KB reclaimed, %d rooms left, RSS %s',
+                    closed, reclaimed // 1024, len(game_rooms),
+                    f'{rss / 1048576:.1f} MB' if rss else 'n/a')
+    return closed, reclaimed
+
+def close_room(room_code, reason):
+    """
+    Remove a room with its timer, sessions and reconnect tokens.
+    Returns an estimate of the memory it held in bytes.
+    """
+    room = game_rooms.pop(room_code, None)
+    room_ttl.discard(room_code)
+    if room is None:
+        return 0
+    
+    if room.turn_timer:
+        room.turn_timer.cancel()
+    freed = deep_sizeof(room)
+    
+    closed = {
+        'room_code': room_code,
+        'reason': reason,
+        'message': 'Raum wurde wegen Inaktivität geschlossen'
+    }
+    socketio.emit('room_closed', closed, room=room_code)
+    socketio.emit('room_closed', closed, room=spectator_room(room_code))
+    socketio.close_room(room_code)
+    socketio.close_room(spectator_room(room_code))
+    
+    for player in room.players:
+        session = player_sessions.get(player.id)
+        if session and session['room_code'] == room_code:
+            del player_sessions[player.id]
+    for sid in room.spectators:
+        spectator_sessions.pop(sid, None)
+    disconnected_players.discard_room(room_code)
+    
+    return freed
+
+def drain_and_snapshot(path=SNAPSHOT_PATH):
+    """
+    Stop accepting new rooms, pause all running games, hand every connected
+    player a reconnect token and write the games to the snapshot file.
+    Returns the number of rooms written.
+    """
+    global draining
+    draining = True
+    started = time.perf_counter()
+    now = time.time()
+    
+    rooms = []
+    for room_code, room in list(game_rooms.items()):
+        if room.status not in ('playing', 'paused') or not room.game_state:
+            continue
+        if room.is_bot_room():
+            # The next process starts its own
+            continue
+        room.pause_game()
+        
+        for player in room.players:
+            if player.is_ai or not player.connected:
+                continue
+            player.connected = False
+            player.disconnect_time = now
+            token = disconnected_players.issue(room_code, player.player_id,
+                                               room.reconnect_grace_period, now=now)
+            socketio.emit('server_restarting', {
+                'token': token,
+                'expires_in': room.reconnect_grace_period,
+                'message': 'Server wird neu gestartet, das Spiel geht gleich weiter'
+            }, to=player.id)
+        rooms.append(room.to_snapshot())
+    
+    size = write_snapshot({
+        'version': SNAPSHOT_VERSION,
+        'saved_at': now,
+        'rooms': rooms,
+        'tokens': disconnected_players.to_snapshot()
+    }, path)
+    logger.info('Snapshot of %d rooms written to %s (%d KB in %.0f ms)',
+                len(rooms), path, size // 1024, (time.perf_counter() - started) * 1000)
+    return len(rooms)
+
+def check_shutdown():
+    # The signal handler cannot wake an event loop that is blocked in
+    # poll(), so a periodic check picks the request up instead
+    if shutdown_signal is None or draining:
+        return
+    logger.info('Received %s, draining', signal.Signals(shutdown_signal).name)
+    try:
+        drain_and_snapshot()
+    except Exception as e:
+        logger.exception('Error while draining: %s', e)
+    # Give the restart notices time to reach the clients
+    scheduler.call_later(DRAIN_FLUSH_SECONDS, exit_after_drain)
+
+def exit_after_drain():
+    results.close()
+    shutdown_logging()
+    os._exit(0)
+
+def handle_shutdown_signal(signum, frame):
+    global shutdown_signal
+    if shutdown_signal is None:
+        shutdown_signal = signum
+
+def restore_snapshot(path=SNAPSHOT_PATH):
+    """Load the games a previous process handed over, returns the number of rooms"""
+    data = read_snapshot(path)
+    if not data:
+        return 0
+    
+    # The downtime does not count against the reconnect grace period
+    shift = time.time() - data['saved_at']
+    for room_data in data['rooms']:
+        if room_data['code'] in game_rooms:
+            continue
+        game_rooms[room_data['code']] = GameRoom.from_snapshot(room_data, shift)
+    disconnected_players.restore(data['tokens'], shift)
+    
+    if game_rooms:
+        ensure_room_gc_running()
+    logger.info('Restored %d rooms and %d reconnect tokens from %s (%.0fs downtime)',
+                len(data['rooms']), len(data['tokens']), path, shift)
+    return len(data['rooms'])
+
+def install_restart_handoff():
+    """Restore a snapshot from the previous process and drain on SIGTERM/SIGINT"""
+    restore_snapshot()
+    signal.signal(signal.SIGTERM, handle_shutdown_signal)
+    signal.signal(signal.SIGINT, handle_shutdown_signal)
+    scheduler.every(SHUTDOWN_POLL_SECONDS, check_shutdown)
+
+@app.route('/api/matchmaking')
+def matchmaking_stats():
+    return jsonify(matchmaking_queue.get_stats())
+
+@app.route('/api/bot-rooms')
+def bot_rooms():
+    """Bot-vs-bot games that can be watched with spectate_room"""
+    return jsonify({'rooms': [{'room_code': room_code,
+                               'status': room.status,
+                               'players': [{'name': p.name, 'difficulty': p.ai.difficulty} for p in room.players],
+                               'spectators': len(room.spectators)}
+                              for room_code, room in list(game_rooms.items()) if room.is_bot_room()]})
+
+@app.route('/api/leaderboard')
+def leaderboard():
+    sort = request.args.get('sort', 'wins')
+    if sort not in ('wins', 'win_rate'):
+        sort = 'wins'
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    include_bots = request.args.get('bots', 'false').lower() == 'true'
+    return jsonify({'sort': sort, 'players': results.leaderboard(sort, limit, include_bots)})
+
+@app.route('/api/players/<name>')
+def player_stats(name):
+    stats = results.player_stats(sanitize_text(name, 30))
+    if stats is None:
+        return jsonify({'error': 'Spieler nicht gefunden'}), 404
+    return jsonify(stats)
+
+def rooms_by_status():
+    counts = {}
+    for room in list(game_rooms.values()):
+        counts[(room.status,)] = counts.get((room.status,), 0) + 1
+    return counts
+
+def active_turn_timers():
+    return {(): sum(1 for room in list(game_rooms.values())
+                    if room.turn_timer and room.turn_timer.is_alive())}
+
+metrics.Gauge('tschau_rooms', 'Game rooms by status', ['status'], callback=rooms_by_status)
+metrics.Gauge('tschau_turn_timers', 'Pending turn timers (timer queue depth)', callback=active_turn_timers)
+metrics.Gauge('tschau_process_rss_bytes', 'Resident set size of the server process',
+              callback=lambda: {(): process_rss_bytes() or 0})
+metrics.Gauge('tschau_reconnect_tokens', 'Outstanding reconnect tokens',
+              callback=lambda: {(): len(disconnected_players)})
+metrics.Gauge('tschau_results_queue', 'Finished games waiting for the results writer',
+              callback=lambda: {(): results.pending.qsize()})
+metrics.Gauge('tschau_room_ttl_index', 'Rooms scheduled in the idle collector',
+              callback=lambda: {(): len(room_ttl)})
+metrics.Gauge('tschau_spectators', 'Connected spectators',
+              callback=lambda: {(): len(spectator_sessions)})
+metrics.Gauge('tschau_event_loop_lag_seconds', 'Event loop lag measured by the last backlog check',
+              callback=lambda: {(): backpressure.loop_lag})
+metrics.Gauge('tschau_outbound_held_updates', 'State updates held back for slow clients',
+              callback=lambda: {(): len(backpressure.pending)})
+metrics.Gauge('tschau_matchmaking_waiting', 'Players waiting in the quick-match queue',
+              callback=lambda: {(): len(matchmaking_queue)})
+metrics.Gauge('tschau_matchmaking_wait_p95_seconds', 'p95 quick-match wait of recent matches',
+              callback=lambda: {(): matchmaking_queue.get_stats()['wait_p95']})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @socketio.on('leave_room')
+@instrument('leave_room')
+@validated('leave_room')
 def handle_leave_room(data):
     if request.sid not in player_sessions:
         return
@@ -382,11 +956,79 @@ def handle_leave_room(data):
         # Delete room if empty
         if len(room.players) == 0:
             del game_rooms[room_code]
+            room_ttl.discard(room_code)
     
     del player_sessions[request.sid]
 
+@socketio.on('spectate_room')
+@instrument('spectate_room')
+@rate_limit('spectate_room')
+@validated('spectate_room')
+def handle_spectate_room(data):
+    """Join a room read-only as a spectator"""
+    room_code = data['room_code']
+    
+    if request.sid in player_sessions:
+        emit('error', {'message': 'Du spielst bereits in einem Raum'})
+        return
+    
+    if room_code not in game_rooms:
+        emit('error', {'message': 'Raum nicht gefunden'})
+        return
+    
+    room = game_rooms[room_code]
+    
+    if len(room.spectators) >= MAX_SPECTATORS:
+        emit('error', {'message': 'Maximale Anzahl Zuschauer erreicht'})
+        return
+    
+    # Leave any room we were watching before
+    remove_spectator(request.sid)
+    
+    room.spectators.add(request.sid)
+    spectator_sessions[request.sid] = room_code
+    join_room(spectator_room(room_code))
+    
+    # Through the mailbox, bots of an unwatched room may be moving on a worker thread
+    room.mailbox.submit(send_spectating, room, room_code, request.sid)
+    
+    logger.info('Spectator %s watching room %s (%d spectators)', request.sid, room_code, len(room.spectators))
+
+def send_spectating(room, room_code, sid):
+    """The game as a new spectator first sees it"""
+    # With a delay buffer only show what the other spectators already see.
+    # Rooms without humans have nobody to ghost for and may have run on
+    # unwatched, they get the current state
+    if SPECTATOR_DELAY > 0 and not room.is_bot_room():
+        game_view = room.last_spectator_view
+    elif room.game_state:
+        game_view = room.game_state.get_public_view()
+        game_view['turn_time_limit'] = room.turn_duration
+    else:
+        game_view = None
+    
+    socketio.emit('spectating', {
+        'room_code': room_code,
+        'status': room.status,
+        'players': [{'id': p.id, 'name': p.name} for p in room.players],
+        'game_state': game_view,
+        'delay': SPECTATOR_DELAY
+    }, to=sid)
+
+@socketio.on('stop_spectating')
+@instrument('stop_spectating')
+@validated('stop_spectating')
+def handle_stop_spectating(data):
+    remove_spectator(request.sid)
+
 @socketio.on('start_game')
+@instrument('start_game')
+@validated('start_game')
 def handle_start_game(data):
+    if draining:
+        emit('error', {'message': 'Server wird neu gestartet, bitte gleich nochmals versuchen'})
+        return
+    
     if request.sid not in player_sessions:
         emit('error', {'message': 'Nicht in einem Raum'})
         return
@@ -408,12 +1050,21 @@ def handle_start_game(data):
         emit('error', {'message': 'Spiel läuft bereits'})
         return
     
+    room.mailbox.submit(start_room_game, room, room_code)
+
+def start_room_game(room, room_code):
+    """Deal a new game in a full room and notify all players"""
+    if room.status != 'waiting':
+        return
+    
     # Initialize game state
-    from game_logic import GameEngine
     room.game = GameEngine(room.players)
     room.game.start_game()
+    attach_trackers(room.game)
     room.status = 'playing'
     room.game_state = room.game  # Keep both for compatibility
+    room.game_started_at = time.time()
+    room.touch()
     
     # Start turn timer for first player
     start_turn_timer(room_code)
@@ -423,21 +1074,17 @@ def handle_start_game(data):
         if not (hasattr(player, 'is_ai') and player.is_ai):
             game_view = room.game_state.get_player_view(player.id)
             game_view['turn_time_limit'] = room.turn_duration
-            emit('game_started', game_view, room=player.id)
+            socketio.emit('game_started', game_view, to=player.id)
     
-    print(f'Game started in room {room_code}')
+    broadcast_spectator_view(room, room_code, socketio)
+    
+    logger.info('Game started in room %s', room_code)
     
     # Check if first player is AI
-    current_player = room.game.get_current_player()
-    if current_player:
-        for p in room.players:
-            if p.id == current_player.id and hasattr(p, 'is_ai') and p.is_ai:
-                print(f"First player is AI: {p.name}")
-                trigger_ai_turn(room, room_code, socketio)
-                break
-
-def start_turn_timer(room_code):
-    """Start a timer for the current player's turn"""
+    continue_with_bot(room, room_code)
+
+def start_turn_timer(room_code, duration=None):
+    """Start a timer for the current player's turn (duration: rest of a resumed turn)"""
     if room_code not in game_rooms:
         return
     
@@ -445,214 +1092,232 @@ def start_turn_timer(room_code):
     if room.status != 'playing':
         return
     
+    duration = duration or room.turn_duration
     current_player = room.game_state.get_current_player()
-    current_player.turn_start_time = time.time()
+    current_player.turn_start_time = time.time() - (room.turn_duration - duration)
     
     # Cancel existing timer if any
     if room.turn_timer:
         room.turn_timer.cancel()
     
-    # Set new timer
-    from threading import Timer
-    
-    def handle_turn_timeout():
-        if room_code in game_rooms and room.status == 'playing':
-            # Force draw a card for the timed out player
-            result = room.game_state.draw_card(current_player.id)
-            
-            # Notify all players
-            emit('turn_timeout', {
-                'player_name': current_player.name,
-                'action': 'draw_card'
-            }, room=room_code)
-            
-            # Send updated game state
-            for player in room.players:
-                game_view = room.game_state.get_player_view(player.id)
-                game_view['turn_time_limit'] = room.turn_duration
-                emit('game_update', game_view, room=player.id)
-            
-            # Start timer for next player
-            start_turn_timer(room_code)
-    
-    room.turn_timer = Timer(room.turn_duration, handle_turn_timeout)
-    room.turn_timer.start()
+    # A timeout that was already queued when the turn ended finds a newer
+    # turn number and is dropped, so it cannot draw a second time
+    room.turn_number += 1
+    room.turn_timer = scheduler.call_later(duration, room.mailbox.submit, apply_turn_timeout,
+                                           room, room_code, current_player, room.turn_number)
     
     # Notify all players about turn start
-    emit('turn_started', {
+    socketio.emit('turn_started', {
         'player_name': current_player.name,
-        'time_limit': room.turn_duration
+        'time_limit': duration
     }, room=room_code)
 
+def apply_turn_timeout(room, room_code, player, turn_number):
+    if room_code not in game_rooms or room.status != 'playing' or room.turn_number != turn_number:
+        return
+    
+    # Force draw a card for the timed out player
+    room.game_state.draw_card(player.id)
+    
+    # Notify all players
+    socketio.emit('turn_timeout', {
+        'player_name': player.name,
+        'action': 'draw_card'
+    }, room=room_code)
+    
+    # Send updated game state
+    broadcast_game_state(room, room_code)
+    
+    # Start timer for next player
+    start_turn_timer(room_code)
+    continue_with_bot(room, room_code)
+
+def continue_with_bot(room, room_code, delay=1.5):
+    """Let the bot move if the turn passed to it"""
+    current_player = room.game_state.get_current_player()
+    if current_player and getattr(current_player, 'is_ai', False):
+        logger.debug('Triggering AI turn for %s in room %s', current_player.name, room_code)
+        trigger_ai_turn(room, room_code, socketio, bot_moved, delay)
+
+def bot_moved(room, room_code):
+    """After a bot move: fresh time for the next player, a short pause before another bot"""
+    start_turn_timer(room_code)
+    continue_with_bot(room, room_code, delay=2.0)
+
+def resume_turn(room, room_code):
+    """Continue the turn a pause interrupted: the rest of its time, or the bot's move"""
+    start_turn_timer(room_code, room.turn_remaining)
+    room.turn_remaining = None
+    continue_with_bot(room, room_code)
+
+def player_room(sid):
+    """(session, room) of a player in a running game, (None, None) otherwise"""
+    session = player_sessions.get(sid)
+    if not session:
+        return None, None
+    room = game_rooms.get(session['room_code'])
+    if not room or room.status != 'playing':
+        return session, None
+    return session, room
+
 @socketio.on('play_card')
+@instrument('play_card')
 @rate_limit('play_card')
+@validated('play_card')
 def handle_play_card(data):
-    if request.sid not in player_sessions:
-        print(f"[DEBUG] play_card: No session for {request.sid}")
+    session, room = player_room(request.sid)
+    if not room:
+        logger.debug('play_card: %s is not in a running game', request.sid)
         return
     
-    session = player_sessions[request.sid]
-    room_code = session['room_code']
-    room = game_rooms.get(room_code)
-    
-    if not room or room.status != 'playing':
-        print(f"[DEBUG] play_card: Room not found or not playing")
+    room.touch()
+    room.mailbox.submit(apply_play_card, room, room.code, session['player'], data['card'])
+
+def apply_play_card(room, room_code, player, card):
+    if room.status != 'playing':
         return
     
-    card = data.get('card')
-    print(f"[DEBUG] Player {request.sid} plays card: {card}")
-    result = room.game_state.play_card(request.sid, card)
-    print(f"[DEBUG] Play result: {result}")
+    result = room.game_state.play_card(player.id, card)
+    logger.debug('play_card room=%s sid=%s card=%s result=%s', room_code, player.id, card, result)
     
     if result['success']:
         # Restart turn timer for next player
         start_turn_timer(room_code)
         
         # Broadcast updated game state to all players
-        for player in room.players:
-            game_view = room.game_state.get_player_view(player.id)
-            game_view['turn_time_limit'] = room.turn_duration
-            emit('game_update', game_view, room=player.id)
+        broadcast_game_state(room, room_code)
         
         # Check for winner
         if result.get('winner'):
             room.status = 'finished'
+            room.touch()
             if room.turn_timer:
                 room.turn_timer.cancel()
-            emit('game_won', {'winner': result['winner']}, room=room_code)
+            game_won = {
+                'winner': result['winner'],
+                'player_name': player.name,
+                'room_code': room_code
+            }
+            socketio.emit('game_won', game_won, room=room_code)
+            send_to_spectators(room, room_code, socketio, 'game_won', game_won)
+            results.record(game_result(room, room_code, result['winner']))
         else:
-            # Check if next player is AI
-            print(f"[DEBUG] Checking if next player is AI...")
-            current_player = room.game_state.get_current_player()
-            print(f"[DEBUG] Current player after move: {current_player.name if current_player else 'None'} (ID: {current_player.id if current_player else 'None'})")
-            
-            if current_player:
-                print(f"[DEBUG] Room has {len(room.players)} players:")
-                for p in room.players:
-                    print(f"[DEBUG]   - {p.name} (ID: {p.id}, is_ai: {getattr(p, 'is_ai', False)})")
-                    
-                for p in room.players:
-                    if p.id == current_player.id:
-                        print(f"[DEBUG] Found matching player: {p.name}")
-                        if hasattr(p, 'is_ai') and p.is_ai:
-                            print(f"[DEBUG] *** TRIGGERING AI TURN for {p.name} ***")
-                            trigger_ai_turn(room, room_code, socketio)
-                            break
-                        else:
-                            print(f"[DEBUG] Player {p.name} is NOT AI")
-                            break
-                else:
-                    print(f"[DEBUG] WARNING: No matching player found for ID {current_player.id}")
+            continue_with_bot(room, room_code)
     else:
-        emit('move_rejected', {'reason': result.get('reason')})
+        socketio.emit('move_rejected', {'reason': result.get('reason')}, to=player.id)
 
 @socketio.on('draw_card')
+@instrument('draw_card')
+@validated('draw_card')
 def handle_draw_card(data):
-    if request.sid not in player_sessions:
+    session, room = player_room(request.sid)
+    if not room:
         return
     
-    session = player_sessions[request.sid]
-    room_code = session['room_code']
-    room = game_rooms.get(room_code)
-    
-    if not room or room.status != 'playing':
+    room.touch()
+    room.mailbox.submit(apply_draw_card, room, room.code, session['player'])
+
+def apply_draw_card(room, room_code, player):
+    if room.status != 'playing':
         return
     
-    result = room.game_state.draw_card(request.sid)
+    result = room.game_state.draw_card(player.id)
     
     if result['success']:
         # Restart turn timer for next player
         start_turn_timer(room_code)
         
         # Broadcast updated game state
-        for player in room.players:
-            if not (hasattr(player, 'is_ai') and player.is_ai):
-                game_view = room.game_state.get_player_view(player.id)
-                game_view['turn_time_limit'] = room.turn_duration
-                emit('game_update', game_view, room=player.id)
-        
-        # Check if next player is AI
-        current_player = room.game_state.get_current_player()
-        if current_player:
-            for p in room.players:
-                if p.id == current_player.id and hasattr(p, 'is_ai') and p.is_ai:
-                    print(f"Next player after draw is AI: {p.name}")
-                    trigger_ai_turn(room, room_code, socketio)
-                    break
+        broadcast_game_state(room, room_code)
+        continue_with_bot(room, room_code)
     else:
-        emit('move_rejected', {'reason': result.get('reason')})
+        socketio.emit('move_rejected', {'reason': result.get('reason')}, to=player.id)
 
 @socketio.on('select_color')
+@instrument('select_color')
+@validated('select_color')
 def handle_select_color(data):
-    if request.sid not in player_sessions:
+    session, room = player_room(request.sid)
+    if not room:
         return
     
-    session = player_sessions[request.sid]
-    room_code = session['room_code']
-    room = game_rooms.get(room_code)
-    
-    if not room or room.status != 'playing':
+    room.touch()
+    room.mailbox.submit(apply_select_color, room, room.code, session['player'], data['color'])
+
+def apply_select_color(room, room_code, player, color):
+    if room.status != 'playing':
         return
     
-    color = data.get('color')
-    result = room.game_state.select_color(request.sid, color)
+    result = room.game_state.select_color(player.id, color)
     
     if result['success']:
         # Broadcast updated game state
-        for player in room.players:
-            game_view = room.game_state.get_player_view(player.id)
-            emit('game_update', game_view, room=player.id)
+        broadcast_game_state(room, room_code)
 
 @socketio.on('call_tschau')
+@instrument('call_tschau')
+@validated('call_tschau')
 def handle_call_tschau(data):
-    if request.sid not in player_sessions:
+    session, room = player_room(request.sid)
+    if not room:
         return
     
-    session = player_sessions[request.sid]
-    room_code = session['room_code']
-    room = game_rooms.get(room_code)
-    
-    if not room or room.status != 'playing':
+    room.touch()
+    room.mailbox.submit(apply_call_tschau, room, room.code, session['player'])
+
+def apply_call_tschau(room, room_code, player):
+    if room.status != 'playing':
         return
     
-    result = room.game_state.call_tschau(request.sid)
+    result = room.game_state.call_tschau(player.id)
     
-    emit('tschau_called', {
-        'player_id': request.sid,
+    socketio.emit('tschau_called', {
+        'player_id': player.id,
         'success': result['success'],
         'message': result.get('message')
     }, room=room_code)
+    broadcast_spectator_view(room, room_code, socketio)
 
 @socketio.on('call_sepp')
+@instrument('call_sepp')
+@validated('call_sepp')
 def handle_call_sepp(data):
-    if request.sid not in player_sessions:
+    session, room = player_room(request.sid)
+    if not room:
         return
     
-    session = player_sessions[request.sid]
-    room_code = session['room_code']
-    room = game_rooms.get(room_code)
-    
-    if not room or room.status != 'playing':
+    room.touch()
+    room.mailbox.submit(apply_call_sepp, room, room.code, session['player'])
+
+def apply_call_sepp(room, room_code, player):
+    if room.status != 'playing':
         return
     
-    result = room.game_state.call_sepp(request.sid)
+    result = room.game_state.call_sepp(player.id)
     
     if result['success']:
         room.status = 'finished'
+        room.touch()
         if room.turn_timer:
             room.turn_timer.cancel()
-        emit('game_won', {
-            'winner': request.sid,
-            'player_name': session['player'].name,
+        game_won = {
+            'winner': player.id,
+            'player_name': player.name,
             'room_code': room_code
-        }, room=room_code)
+        }
+        socketio.emit('game_won', game_won, room=room_code)
+        broadcast_spectator_view(room, room_code, socketio)
+        send_to_spectators(room, room_code, socketio, 'game_won', game_won)
+        results.record(game_result(room, room_code, player.id))
     else:
-        emit('sepp_failed', {
-            'player_id': request.sid,
+        socketio.emit('sepp_failed', {
+            'player_id': player.id,
             'message': result.get('message')
         }, room=room_code)
 
 @socketio.on('request_rematch')
+@instrument('request_rematch')
+@validated('request_rematch')
 def handle_request_rematch(data):
     if request.sid not in player_sessions:
         return
@@ -665,6 +1330,8 @@ def handle_request_rematch(data):
         emit('error', {'message': 'Rematch nicht möglich'})
         return
     
+    room.touch()
+    
     # Track rematch requests
     if not hasattr(room, 'rematch_requests'):
         room.rematch_requests = set()
@@ -684,6 +1351,7 @@ def handle_request_rematch(data):
         room.status = 'waiting'
         room.game_state = None
         room.rematch_requests = set()
+        room.touch()
         
         # Reset player states
         for player in room.players:
@@ -697,10 +1365,41 @@ def handle_request_rematch(data):
             'players': [{'id': p.id, 'name': p.name} for p in room.players]
         }, room=room_code)
         
-        print(f'Rematch accepted in room {room_code}')
+        logger.info('Rematch accepted in room %s', room_code)
+
+def human_sids(room):
+    return [p.id for p in room.players if not p.is_ai]
+
+@socketio.on('admin_profile')
+@instrument('admin_profile')
+@validated('admin_profile')
+def handle_admin_profile(data):
+    """Start or stop the stack sampler: {'token', 'action': 'start'|'stop'|'status', 'seconds'}"""
+    if not ADMIN_TOKEN or not secrets.compare_digest(data['token'].encode(), ADMIN_TOKEN.encode()):
+        emit('error', {'message': 'Nicht berechtigt'})
+        return
+    
+    action = data['action']
+    logger.info('admin_profile %s from %s', action, request.sid)
+    if action == 'start':
+        profiler.start(data['seconds'])
+    elif action == 'stop':
+        profiler.stop()
+        report_profile(request.sid)
+        return
+    emit('profile_status', profiler.status())
+
+def report_profile(sid):
+    """Send the profile status once the stopped sampler has written its files"""
+    if profiler.active:
+        scheduler.call_later(PROFILE_REPORT_POLL, report_profile, sid)
+        return
+    socketio.emit('profile_status', profiler.status(), to=sid)
 
 @socketio.on('send_chat')
+@instrument('send_chat')
 @rate_limit('send_chat')
+@validated('send_chat')
 def handle_send_chat(data):
     if request.sid not in player_sessions:
         return
@@ -712,18 +1411,36 @@ def handle_send_chat(data):
     if not room:
         return
     
-    # Sanitize message to prevent XSS
-    message = sanitize_input(data.get('message', ''), 200)
+    # Sanitized against XSS by the payload schema, masked by the word filter
+    message = moderate(data['message'])
     
     if message:
-        emit('chat_message', {
+        room.touch()
+        chat_message = {
             'player_name': session['player'].name,
             'message': message,
             'timestamp': time.time()
-        }, room=room_code)
+        }
+        room.chat.append(chat_message)
+        chat_coalescer.add(room_code, chat_message)
+
+def send_chat_batch(room_code, messages):
+    """Coalescer flush: one message as chat_message, a burst as one chat_batch"""
+    room = game_rooms.get(room_code)
+    if not room:
+        return
+    skip = backpressure.drop_for_lagging(socketio, 'chat_message', human_sids(room))
+    if len(messages) == 1:
+        socketio.emit('chat_message', messages[0], room=room_code, skip_sid=skip)
+    else:
+        socketio.emit('chat_batch', {'messages': messages}, room=room_code, skip_sid=skip)
+
+chat_coalescer = Coalescer(CHAT_BATCH_WINDOW, send_chat_batch)
 
 @socketio.on('send_emote')
+@instrument('send_emote')
 @rate_limit('send_emote')
+@validated('send_emote')
 def handle_send_emote(data):
     if request.sid not in player_sessions:
         return
@@ -735,20 +1452,30 @@ def handle_send_emote(data):
     if not room:
         return
     
-    emote = data.get('emote', '')
-    
-    # Predefined emotes for security
-    allowed_emotes = ['👍', '👎', '😄', '😢', '😮', '🎉', '💭', '🔥', '❤️', '😤']
-    
-    if emote in allowed_emotes:
-        emit('emote_received', {
-            'player_name': session['player'].name,
-            'emote': emote,
-            'timestamp': time.time()
-        }, room=room_code)
+    # Only predefined emotes pass the payload schema
+    room.touch()
+    emote_coalescer.add(room_code, (session['player'].name, data['emote']))
+
+def send_emote_batch(room_code, emotes):
+    """Coalescer flush: the emotes of one window, counted per sender and emote"""
+    room = game_rooms.get(room_code)
+    if not room:
+        return
+    counts = {}
+    for sent in emotes:
+        counts[sent] = counts.get(sent, 0) + 1
+    socketio.emit('emotes_batch', {
+        'emotes': [{'player_name': name, 'emote': emote, 'count': count}
+                   for (name, emote), count in counts.items()],
+        'timestamp': time.time()
+    }, room=room_code, skip_sid=backpressure.drop_for_lagging(socketio, 'emotes_batch', human_sids(room)))
+
+# Trailing edge only, a celebration is one frame per window however many emotes it has
+emote_coalescer = Coalescer(EMOTE_BATCH_WINDOW, send_emote_batch, leading=False)
 
 if __name__ == '__main__':
     import os
+    install_restart_handoff()
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
     socketio.run(app, host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
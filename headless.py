@@ -0,0 +1,106 @@
+"""
+Headless game runner for Tschau-Sepp
+Plays complete bot games directly on GameEngine, without a server
+"""
+
+import random
+from game_logic import GameEngine
+from ai_player import AIPlayer
+from card_tracker import attach_trackers
+
+# Safety net against endless games (both bots keep drawing)
+MAX_TURNS = 1000
+
+class HeadlessPlayer:
+    """Minimal player object for GameEngine, always controlled by an AIPlayer"""
+
+    def __init__(self, player_id, difficulty='medium', name=None):
+        self.id = player_id
+        self.name = name or player_id
+        self.hand = []
+        self.has_called_tschau = False
+        self.has_called_sepp = False
+        self.is_ai = True
+        self.ai = AIPlayer(difficulty=difficulty, name=self.name)
+
+def closest_opponent(game, player):
+    """Cards of the opponent with the smallest hand, None without opponents"""
+    return min((len(p.hand) for p in game.players if p is not player), default=None)
+
+def play_ai_turn(game, player):
+    """
+    Let an AI player take one full turn: announce Tschau/Sepp, then play a
+    card (choosing a color after an Under) or draw.
+    Returns the engine result with 'action', 'card' and 'color' added.
+    """
+    return apply_move(game, player, choose_move(game, player))
+
+def choose_move(game, player):
+    """The card the AI player wants to play, None to draw. Only reads the game"""
+    return player.ai.choose_card(
+        [card.to_dict() for card in player.hand],
+        game.current_color,
+        game.current_value,
+        game.must_draw_cards,
+        game.special_effect_active,
+        opponent_cards=closest_opponent(game, player),
+        deck_size=len(game.deck)
+    )
+
+def apply_move(game, player, chosen_card):
+    """Carry out a move choose_move picked, the second half of play_ai_turn"""
+    ai = player.ai
+
+    if chosen_card:
+        # Announce before playing the penultimate / last card
+        if ai.should_call_tschau(len(player.hand)):
+            game.call_tschau(player.id)
+        elif ai.should_call_sepp(len(player.hand)):
+            game.call_sepp(player.id)
+
+        result = game.play_card(player.id, chosen_card)
+        if result.get('success'):
+            result['action'] = 'play'
+            result['card'] = chosen_card
+
+            if game.waiting_for_color_selection:
+                color = ai.choose_color([card.to_dict() for card in player.hand])
+                game.select_color(player.id, color)
+                result['color'] = color
+            return result
+
+    # No playable card (or the engine rejected the choice): draw
+    result = game.draw_card(player.id)
+    result['action'] = 'draw'
+    return result
+
+def play_game(difficulties, seed=None, max_turns=MAX_TURNS):
+    """
+    Play one complete bot game.
+    difficulties lists the AIPlayer difficulty per seat, seat 0 starts.
+    Returns the winning seat (None if max_turns was reached), the number
+    of turns and the cards left per seat.
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    players = [HeadlessPlayer(f'seat{i}', difficulty) for i, difficulty in enumerate(difficulties)]
+    game = GameEngine(players)
+    game.start_game()
+    attach_trackers(game)
+
+    turns = 0
+    while game.winner is None and turns < max_turns:
+        play_ai_turn(game, game.get_current_player())
+        turns += 1
+
+    winner = None
+    for seat, player in enumerate(players):
+        if player.id == game.winner:
+            winner = seat
+
+    return {
+        'winner': winner,
+        'turns': turns,
+        'cards_left': [len(p.hand) for p in players]
+    }
\ No newline at end of file
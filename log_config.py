@@ -0,0 +1,97 @@
+"""
+Logging setup for Tschau-Sepp
+Records go through a QueueHandler and are formatted and written by a
+QueueListener thread, so event handlers never block on a slow stdout.
+Levels are set per subsystem from the environment:
+    LOG_LEVEL=INFO            default for all subsystems
+    LOG_LEVEL_AI=DEBUG        override for one subsystem (tschau.ai)
+    LOG_FORMAT=json           one JSON object per line instead of text
+Use %-style arguments (logger.debug('card %s', card)) so disabled levels
+cost nothing, and guard loops with logger.isEnabledFor(logging.DEBUG).
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+ROOT_LOGGER = 'tschau'
+
+# Attributes every LogRecord has, everything else was passed via extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including fields passed via extra="""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+    Only the traceback is rendered eagerly, the frames would be gone later.
+    """
+
+    def prepare(self, record):
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def _level_for(subsystem):
+    default = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    return os.environ.get(f'LOG_LEVEL_{subsystem.upper()}', default).upper()
+
+def get_logger(subsystem):
+    """Logger for a subsystem (server, ai, ...) with its level from the environment"""
+    logger = logging.getLogger(f'{ROOT_LOGGER}.{subsystem}')
+    logger.setLevel(_level_for(subsystem))
+    return logger
+
+def setup_logging():
+    """Attach the queue handler and start the background writer (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    if os.environ.get('LOG_FORMAT', 'text').lower() == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s %(levelname)-5s [%(name)s] %(message)s')
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger(ROOT_LOGGER)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush queued records and stop the writer, for exits that skip atexit"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""
+Quick-match lobby for Tschau-Sepp
+Players looking for an opponent wait in buckets keyed by skill bracket and
+bot difficulty preference. Every bucket is a heap ordered by enqueue time,
+so pairing the longest waiting players and finding bot-fill candidates is
+O(log n) per player.
+"""
+
+import heapq
+import itertools
+import os
+import time
+from collections import deque
+
+# Width of a skill bracket, players only get matched within their bracket
+SKILL_BRACKET = int(os.environ.get('MATCH_SKILL_BRACKET', 200))
+
+# Seconds between two matcher passes
+MATCH_INTERVAL = float(os.environ.get('MATCH_INTERVAL', 1.0))
+
+# Seconds a player waits before the game is filled with a bot
+BOT_FILL_AFTER = float(os.environ.get('MATCH_BOT_FILL_AFTER', 20))
+
+DIFFICULTIES = ('easy', 'medium', 'hard', 'expert', 'learned')
+
+class QueueEntry:
+    __slots__ = ('sid', 'name', 'skill', 'difficulty', 'enqueued_at', 'active')
+
+    def __init__(self, sid, name, skill, difficulty, enqueued_at):
+        self.sid = sid
+        self.name = name
+        self.skill = skill
+        self.difficulty = difficulty
+        self.enqueued_at = enqueued_at
+        self.active = True
+
+class MatchmakingQueue:
+    """Bucketed waiting queue with lazy removal of cancelled entries"""
+
+    def __init__(self):
+        self.buckets = {}  # (bracket, difficulty) -> heap of (enqueued_at, seq, entry)
+        self.entries = {}  # sid -> active entry
+        self._seq = itertools.count()
+
+        # Metrics
+        self.matched_total = 0
+        self.bot_fills_total = 0
+        self.cancelled_total = 0
+        self.recent_waits = deque(maxlen=1000)
+
+    @staticmethod
+    def bucket_key(skill, difficulty):
+        return (skill // SKILL_BRACKET, difficulty)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, sid):
+        return sid in self.entries
+
+    def enqueue(self, sid, name, skill, difficulty, now=None):
+        """Add a player to the queue, replacing an older entry of the same sid"""
+        self.cancel(sid, count=False)
+
+        entry = QueueEntry(sid, name, skill, difficulty, now or time.time())
+        self.entries[sid] = entry
+        heap = self.buckets.setdefault(self.bucket_key(skill, difficulty), [])
+        heapq.heappush(heap, (entry.enqueued_at, next(self._seq), entry))
+        return entry
+
+    def cancel(self, sid, count=True):
+        """Remove a player from the queue (lazily, the heap slot is skipped later)"""
+        entry = self.entries.pop(sid, None)
+        if entry is None:
+            return False
+
+        entry.active = False
+        if count:
+            self.cancelled_total += 1
+        return True
+
+    def _peek(self, heap):
+        while heap and not heap[0][2].active:
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+    def _take(self, entry, now):
+        entry.active = False
+        del self.entries[entry.sid]
+        self.recent_waits.append(now - entry.enqueued_at)
+
+    def match_batch(self, now=None):
+        """
+        Run one matcher pass.
+        Returns (pairs, bot_fills): pairs of entries to seat together and
+        single entries that waited too long and get a bot opponent.
+        """
+        now = now or time.time()
+        pairs = []
+        bot_fills = []
+
+        for key, heap in list(self.buckets.items()):
+            # Pair the longest waiting players first
+            while True:
+                first = self._peek(heap)
+                if first is None:
+                    break
+                heapq.heappop(heap)
+
+                second = self._peek(heap)
+                if second is None:
+                    # No partner left, fill with a bot or keep waiting
+                    if now - first.enqueued_at >= BOT_FILL_AFTER:
+                        self._take(first, now)
+                        bot_fills.append(first)
+                    else:
+                        heapq.heappush(heap, (first.enqueued_at, next(self._seq), first))
+                    break
+
+                heapq.heappop(heap)
+                self._take(first, now)
+                self._take(second, now)
+                pairs.append((first, second))
+
+            if not heap:
+                del self.buckets[key]
+
+        self.matched_total += len(pairs)
+        self.bot_fills_total += len(bot_fills)
+        return pairs, bot_fills
+
+    def get_stats(self, now=None):
+        """Queue size and wait-time metrics"""
+        now = now or time.time()
+        waits = sorted(self.recent_waits)
+        current = [now - e.enqueued_at for e in self.entries.values()]
+
+        def percentile(values, p):
+            if not values:
+                return 0.0
+            return round(values[min(len(values) - 1, int(len(values) * p))], 3)
+
+        return {
+            'waiting': len(self.entries),
+            'buckets': len(self.buckets),
+            'matched_total': self.matched_total,
+            'bot_fills_total': self.bot_fills_total,
+            'cancelled_total': self.cancelled_total,
+            'longest_current_wait': round(max(current), 3) if current else 0.0,
+            'wait_p50': percentile(waits, 0.5),
+            'wait_p95': percentile(waits, 0.95),
+            'wait_max': round(waits[-1], 3) if waits else 0.0
+        }
\ No newline at end of file
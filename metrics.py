@@ -0,0 +1,184 @@
+"""
+Prometheus-style metrics for Tschau-Sepp
+Counters and histograms are plain dict/list updates without locks, cheap
+enough to stay enabled in production. Under real thread contention an
+increment can get lost, which is fine for capacity planning.
+Gauges that describe server state are computed at scrape time.
+"""
+
+import bisect
+import json
+import os
+import time
+from functools import wraps
+from log_config import get_logger
+
+logger = get_logger('metrics')
+
+# Measure the size of every Nth emitted payload (serializing is not free)
+PAYLOAD_SAMPLE_RATE = max(1, int(os.environ.get('METRICS_PAYLOAD_SAMPLE', 10)))
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (256, 512, 1024, 2048, 4096, 8192, 16384, 65536)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024)
+
+_registry = []
+
+def _format_labels(labelnames, labels):
+    if not labelnames:
+        return ''
+    pairs = ','.join(f'{name}="{value}"' for name, value in zip(labelnames, labels))
+    return '{' + pairs + '}'
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        _registry.append(self)
+
+    def inc(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def collect(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        for labels, value in self.values.items():
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {value}'
+
+class Gauge:
+    """Gauge whose values come from a callback returning {labels: value}"""
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.values = {}
+        _registry.append(self)
+
+    def set(self, value, *labels):
+        self.values[labels] = value
+
+    def inc(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def collect(self):
+        values = self.values
+        if self.callback:
+            try:
+                values = self.callback()
+            except Exception as e:
+                logger.warning('Error collecting metric %s: %s', self.name, e)
+                values = {}
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} gauge'
+        for labels, value in values.items():
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {value}'
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        _registry.append(self)
+
+    def observe(self, value, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        # Counts are stored per bucket and accumulated at scrape time
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames + ('le',), labels + (bound,))
+                yield f'{self.name}_bucket{bucket_labels} {cumulative}'
+            label_str = _format_labels(self.labelnames, labels)
+            yield f'{self.name}_sum{label_str} {series[-1]}'
+            yield f'{self.name}_count{label_str} {cumulative}'
+
+def render():
+    """Render all metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    return '\n'.join(lines) + '\n'
+
+# Hot-path metrics
+HANDLER_LATENCY = Histogram('tschau_handler_seconds', 'Socket.IO event handler latency', ['event'])
+VIEW_BUILD_SECONDS = Histogram('tschau_player_view_build_seconds', 'Time to build one get_player_view')
+EMIT_PAYLOAD_BYTES = Histogram('tschau_emit_payload_bytes', 'Sampled JSON size of emitted payloads',
+                               ['event'], buckets=SIZE_BUCKETS)
+BOT_DECISION_SECONDS = Histogram('tschau_bot_decision_seconds', 'Time for a bot to decide and apply its move',
+                                 ['difficulty'])
+RATE_LIMITED_TOTAL = Counter('tschau_rate_limited_total', 'Requests rejected by the rate limiter', ['event'])
+PAYLOADS_REJECTED_TOTAL = Counter('tschau_payloads_rejected_total', 'Malformed payloads rejected before the handler',
+                                  ['event', 'reason'])
+HANDLER_ERRORS_TOTAL = Counter('tschau_handler_errors_total', 'Exceptions raised by event handlers', ['event'])
+CONNECTED_SIDS = Gauge('tschau_connected_sids', 'Currently connected Socket.IO clients')
+ROOMS_COLLECTED_TOTAL = Counter('tschau_rooms_collected_total', 'Rooms closed by the idle collector', ['reason'])
+ROOM_RECLAIMED_BYTES_TOTAL = Counter('tschau_room_reclaimed_bytes_total',
+                                     'Estimated memory released by collected rooms')
+RECONNECT_TOKENS_DROPPED_TOTAL = Counter('tschau_reconnect_tokens_dropped_total',
+                                         'Reconnect tokens removed without a reconnect', ['reason'])
+RESULTS_WRITTEN_TOTAL = Counter('tschau_results_written_total', 'Finished games written to the results store')
+RESULTS_DROPPED_TOTAL = Counter('tschau_results_dropped_total', 'Finished games the results store could not write')
+RESULTS_FLUSH_SECONDS = Histogram('tschau_results_flush_seconds', 'Time for one batched results transaction')
+ROOM_COMMANDS_DEFERRED_TOTAL = Counter('tschau_room_commands_deferred_total',
+                                        'Room commands queued behind a command of the same room')
+OUTBOUND_COALESCED_TOTAL = Counter('tschau_outbound_coalesced_total',
+                                   'State updates superseded before a slow client could take them', ['event'])
+OUTBOUND_DROPPED_TOTAL = Counter('tschau_outbound_dropped_total', 'Messages not sent to slow clients', ['event'])
+SLOW_CLIENTS_DISCONNECTED_TOTAL = Counter('tschau_slow_clients_disconnected_total',
+                                          'Connections aborted because their send queue was full')
+ADMISSION_REJECTED_TOTAL = Counter('tschau_admission_rejected_total', 'New rooms refused under load', ['reason'])
+EVENT_LOOP_LAG_SECONDS = Histogram('tschau_event_loop_lag_seconds', 'Delay of the periodic backlog check')
+MODEL_BATCH_SIZE = Histogram('tschau_model_batch_size', 'Learned bot decisions scored in one matrix product',
+                             buckets=BATCH_BUCKETS)
+UNWATCHED_MOVES_TOTAL = Counter('tschau_unwatched_moves_total',
+                                'Bot moves played without think-delay or views in rooms nobody watches')
+
+_payload_counter = 0
+
+def observe_payload(event, data):
+    """Record the serialized size of every PAYLOAD_SAMPLE_RATE-th payload"""
+    global _payload_counter
+    _payload_counter += 1
+    if _payload_counter % PAYLOAD_SAMPLE_RATE:
+        return
+    try:
+        EMIT_PAYLOAD_BYTES.observe(len(json.dumps(data, separators=(',', ':'))), event)
+    except (TypeError, ValueError):
+        pass
+
+def instrument(event_name=None):
+    """Decorator recording latency and errors of Socket.IO event handlers"""
+    def decorator(f):
+        event = event_name or f.__name__.replace('handle_', '')
+
+        @wraps(f)
+        def wrapped(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            except Exception:
+                HANDLER_ERRORS_TOTAL.inc(event)
+                raise
+            finally:
+                HANDLER_LATENCY.observe(time.perf_counter() - started, event)
+
+        return wrapped
+    return decorator
\ No newline at end of file
@@ -0,0 +1,228 @@
+"""
+Inbound payload validation for Tschau-Sepp
+Every Socket.IO event a client may send has a schema (SCHEMAS), a dict of
+field name -> field type. The schemas are compiled once at import into
+one validator per event, so a handler decorated with @validated gets a
+plain dict holding exactly its fields, already parsed, capped and
+sanitized, or is never called:
+    - frames above MAX_FRAME_BYTES are refused by Engine.IO before parsing
+    - payloads that are no object, carry more than MAX_PAYLOAD_KEYS keys,
+      miss a required field or hold an invalid one are rejected
+    - cards are interned to the 32 canonical card dicts of CARD_ORDER, the
+      engine never sees a client-made dict
+    - free text goes through sanitize_text
+"""
+
+import html
+import os
+import re
+from functools import wraps
+from game_logic import GameEngine, CARD_ORDER, CARD_INDEX
+from matchmaking import DIFFICULTIES
+from profiler import PROFILE_SECONDS
+from metrics import PAYLOADS_REJECTED_TOTAL
+
+# Largest Engine.IO frame accepted from a client, in bytes
+MAX_FRAME_BYTES = int(os.environ.get('MAX_FRAME_BYTES', 16384))
+
+# Top-level keys a payload may carry, known or not
+MAX_PAYLOAD_KEYS = 8
+
+EMOTES = ('👍', '👎', '😄', '😢', '😮', '🎉', '💭', '🔥', '❤️', '😤')
+
+# The one dict per card handed to the engine, by index and by (suit, value)
+CARD_TOKENS = tuple({'suit': suit, 'value': value} for suit, value in CARD_ORDER)
+
+# Script blocks, script URLs and inline event handlers. Removing one can
+# join the text around it into a new one ("oNjavascript:on =" leaves
+# "oNon ="), so they are removed until none is left
+_UNSAFE = re.compile(r'<script[^>]*>.*?</script>|javascript:|on\w+\s*=', re.IGNORECASE | re.DOTALL)
+
+def sanitize_text(text, max_length=200):
+    """User text cut to max_length, safe to put into HTML, single spaces"""
+    if not text:
+        return ''
+    text = str(text)[:max_length]
+    while True:
+        cleaned = _UNSAFE.sub('', text)
+        if cleaned == text:
+            break
+        text = cleaned
+    return html.escape(' '.join(text.split()))
+
+class PayloadError(Exception):
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+_MISSING = object()
+
+class Field:
+    """A payload field, default=_MISSING makes it required"""
+
+    def __init__(self, default=_MISSING):
+        self.default = default
+
+    def parse(self, value):
+        raise NotImplementedError
+
+class Text(Field):
+    """Display text, sanitized"""
+
+    def __init__(self, max_length, default=''):
+        super().__init__(default)
+        self.max_length = max_length
+
+    def parse(self, value):
+        if not isinstance(value, (str, int, float)):
+            raise PayloadError('type')
+        return sanitize_text(value, self.max_length)
+
+class Secret(Field):
+    """A string compared as is (tokens), only capped"""
+
+    def __init__(self, max_length, default=''):
+        super().__init__(default)
+        self.max_length = max_length
+
+    def parse(self, value):
+        if not isinstance(value, str) or len(value) > self.max_length:
+            raise PayloadError('type')
+        return value
+
+class RoomCode(Field):
+    _pattern = re.compile(r'[A-Z0-9]{6}')
+
+    def __init__(self):
+        super().__init__('')
+
+    def parse(self, value):
+        if not isinstance(value, str):
+            raise PayloadError('type')
+        code = value.strip().upper()
+        # An unknown code, the handler answers 'Raum nicht gefunden'
+        return code if self._pattern.fullmatch(code) else ''
+
+class Choice(Field):
+    """One of a fixed set, an unknown value falls back to the default if there is one"""
+
+    def __init__(self, choices, default=_MISSING):
+        super().__init__(default)
+        self.choices = frozenset(choices)
+
+    def parse(self, value):
+        if isinstance(value, str) and value in self.choices:
+            return value
+        if self.default is _MISSING:
+            raise PayloadError('choice')
+        return self.default
+
+class Number(Field):
+    """Clamped to [low, high], unparsable values fall back to the default"""
+
+    def __init__(self, kind, low, high, default):
+        super().__init__(default)
+        self.kind = kind
+        self.low = low
+        self.high = high
+
+    def parse(self, value):
+        if isinstance(value, bool):
+            return self.default
+        try:
+            number = self.kind(value)
+        except (TypeError, ValueError, OverflowError):
+            return self.default
+        if number != number:  # NaN
+            return self.default
+        return max(self.low, min(number, self.high))
+
+class CardToken(Field):
+    """A card as {'suit', 'value'} or its index, interned to CARD_TOKENS"""
+
+    def parse(self, value):
+        if isinstance(value, dict):
+            suit, rank = value.get('suit'), value.get('value')
+            # Only strings are looked up, a list or dict would not hash
+            index = CARD_INDEX.get((suit, rank)) if isinstance(suit, str) and isinstance(rank, str) else None
+        elif isinstance(value, int) and not isinstance(value, bool) and 0 <= value < len(CARD_TOKENS):
+            index = value
+        else:
+            index = None
+        if index is None:
+            raise PayloadError('card')
+        return CARD_TOKENS[index]
+
+NAME = 30
+
+SCHEMAS = {
+    'create_room': {'player_name': Text(NAME, 'Spieler 1')},
+    'join_room': {'room_code': RoomCode(), 'player_name': Text(NAME, 'Spieler 2')},
+    'leave_room': {},
+    'add_bot': {'difficulty': Choice(DIFFICULTIES, 'medium')},
+    'find_match': {'player_name': Text(NAME, 'Spieler'), 'difficulty': Choice(DIFFICULTIES, 'medium'),
+                   'skill': Number(int, 0, 3000, 1000)},
+    'cancel_match': {},
+    'spectate_room': {'room_code': RoomCode()},
+    'stop_spectating': {},
+    'start_game': {},
+    'play_card': {'card': CardToken()},
+    'draw_card': {},
+    'select_color': {'color': Choice(GameEngine.SUITS)},
+    'call_tschau': {},
+    'call_sepp': {},
+    'request_rematch': {},
+    'admin_profile': {'token': Secret(256), 'action': Choice(('start', 'stop', 'status'), 'status'),
+                      'seconds': Number(float, 0.0, 3600.0, PROFILE_SECONDS)},
+    'send_chat': {'message': Text(200)},
+    'send_emote': {'emote': Choice(EMOTES)},
+}
+
+def compile_schema(fields):
+    """Validator for one schema: payload -> dict of parsed fields, raises PayloadError"""
+    steps = tuple((name, field.parse, field.default) for name, field in fields.items())
+
+    def validate(data):
+        if data is None:
+            data = {}
+        elif not isinstance(data, dict):
+            raise PayloadError('malformed')
+        elif len(data) > MAX_PAYLOAD_KEYS:
+            raise PayloadError('oversized')
+        payload = {}
+        for name, parse, default in steps:
+            value = data.get(name, _MISSING)
+            if value is _MISSING or value is None:
+                if default is _MISSING:
+                    raise PayloadError('missing')
+                payload[name] = default
+            else:
+                payload[name] = parse(value)
+        return payload
+    return validate
+
+VALIDATORS = {event: compile_schema(fields) for event, fields in SCHEMAS.items()}
+
+def validated(event_name=None):
+    """
+    Decorator for Socket.IO handlers taking one payload argument: the
+    handler is called with the validated payload, a rejected payload gets
+    an 'error' event back instead
+    """
+    def decorator(f):
+        event = event_name or f.__name__.replace('handle_', '')
+        validate = VALIDATORS[event]
+
+        @wraps(f)
+        def wrapped(data=None):
+            try:
+                payload = validate(data)
+            except PayloadError as e:
+                from flask_socketio import emit
+                PAYLOADS_REJECTED_TOTAL.inc(event, e.reason)
+                emit('error', {'message': 'Ungültige Anfrage'})
+                return
+            return f(payload)
+
+        return wrapped
+    return decorator
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+Learned bot policy for Tschau-Sepp
+The 'learned' bot scores each of its options (every playable card, and
+drawing) with a linear model over hand and game features (FEATURES) and
+takes the best one. train_model.py fits the weights offline with
+REINFORCE on self-play games against the hard bot; they ship as
+policy_model.npy. Scoring is one matrix product, so the server stacks
+the options of all learned bots due within a tick into one matrix
+(simple_ai_handler.ModelBatcher) instead of one call per room.
+Needs NumPy (in requirements.txt). Without it, or without the weights,
+learned bots play like hard bots.
+"""
+
+import os
+from typing import Dict, List, Optional
+from policy_table import card_kind, ACTIONS
+from log_config import get_logger
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = get_logger('ai')
+
+POLICY_MODEL_PATH = os.environ.get('POLICY_MODEL_PATH',
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), 'policy_model.npy'))
+
+# One column per feature of an option, the weights are a vector of this length
+FEATURES = tuple(f'kind_{action}' for action in ACTIONS) + (
+    'hand_size',           # cards left after the option, /10
+    'suit_share',          # share of the hand in the played card's suit
+    'keeps_color',         # the card has the current color
+    'follow_chance',       # chance the next player holds the card's suit
+    'draw_when_close',     # drawing while the closest opponent has 2 cards or fewer
+    'attack_when_close',   # a 7, 8 or rose Ober while the opponent is close
+    'ace_on_ace',          # answering an ace with another ace
+    'draw_under_attack',   # drawing while a 7 or rose Ober is pending
+    'draw_deck_size',      # drawing, cards in the deck /32
+    'specials_left',       # special cards kept after the option, /4
+    'special_early',       # playing a special card with more than 5 cards
+    'special_vs_opponent', # playing a special card, the fewer opponent cards the higher
+)
+
+# Column of each feature, so reordering FEATURES cannot shift a feature into another's weight
+KIND = {action: FEATURES.index(f'kind_{action}') for action in ACTIONS}
+HAND_SIZE = FEATURES.index('hand_size')
+SUIT_SHARE = FEATURES.index('suit_share')
+KEEPS_COLOR = FEATURES.index('keeps_color')
+FOLLOW_CHANCE = FEATURES.index('follow_chance')
+DRAW_WHEN_CLOSE = FEATURES.index('draw_when_close')
+ATTACK_WHEN_CLOSE = FEATURES.index('attack_when_close')
+ACE_ON_ACE = FEATURES.index('ace_on_ace')
+DRAW_UNDER_ATTACK = FEATURES.index('draw_under_attack')
+DRAW_DECK_SIZE = FEATURES.index('draw_deck_size')
+SPECIALS_LEFT = FEATURES.index('specials_left')
+SPECIAL_EARLY = FEATURES.index('special_early')
+SPECIAL_VS_OPPONENT = FEATURES.index('special_vs_opponent')
+
+def option_features(hand: List[Dict], playable: List[Dict], current_color: str, must_draw_cards: int,
+                    special_effect: Optional[str], opponent_cards: Optional[int], deck_size: Optional[int],
+                    follow: Dict[str, float]):
+    """
+    Feature rows for every option, the playable cards and drawing (None).
+    follow maps suits to the chance the next player holds them
+    """
+    hand_size = len(hand)
+    counts = dict.fromkeys(follow, 0)
+    specials = 0
+    for card in hand:
+        counts[card['suit']] += 1
+        specials += card_kind(card) != 'normal'
+    opponents = 8 if opponent_cards is None else min(opponent_cards, 8)
+    close = 1.0 if opponents <= 2 else 0.0
+    ace_mode = special_effect == 'A' and not must_draw_cards
+
+    rows = []
+    options = []
+    for card in playable:
+        kind = card_kind(card)
+        special = kind != 'normal'
+        row = [0.0] * len(FEATURES)
+        row[KIND[kind]] = 1.0
+        row[HAND_SIZE] = (hand_size - 1) / 10
+        row[SUIT_SHARE] = (counts[card['suit']] - 1) / max(hand_size - 1, 1)
+        row[KEEPS_COLOR] = 1.0 if card['suit'] == current_color else 0.0
+        row[FOLLOW_CHANCE] = follow[card['suit']]
+        row[ATTACK_WHEN_CLOSE] = close if kind in ('7', '8', 'rose_ober') else 0.0
+        row[ACE_ON_ACE] = 1.0 if ace_mode and kind == 'A' else 0.0
+        row[SPECIALS_LEFT] = (specials - special) / 4
+        row[SPECIAL_EARLY] = 1.0 if special and hand_size > 5 else 0.0
+        row[SPECIAL_VS_OPPONENT] = (1 - opponents / 8) if special else 0.0
+        rows.append(row)
+        options.append(card)
+
+    row = [0.0] * len(FEATURES)
+    row[KIND['draw']] = 1.0
+    row[HAND_SIZE] = (hand_size + max(1, must_draw_cards)) / 10
+    row[DRAW_WHEN_CLOSE] = close
+    row[DRAW_UNDER_ATTACK] = 1.0 if must_draw_cards else 0.0
+    row[DRAW_DECK_SIZE] = (32 if deck_size is None else min(deck_size, 32)) / 32
+    row[SPECIALS_LEFT] = specials / 4
+    rows.append(row)
+    options.append(None)
+    return rows, options
+
+class PolicyModel:
+    def __init__(self, weights):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        if self.weights.shape != (len(FEATURES),):
+            raise ValueError(f'expected {len(FEATURES)} weights, got shape {self.weights.shape}')
+
+    def choose(self, rows, options):
+        """The best option of one decision"""
+        scores = np.asarray(rows, dtype=np.float32) @ self.weights
+        return options[int(np.argmax(scores))]
+
+    def choose_batch(self, decisions):
+        """Best option per (rows, options) decision, all scored in one matrix product"""
+        if len(decisions) < 2:
+            return [self.choose(rows, options) for rows, options in decisions]
+        lengths = np.fromiter((len(rows) for rows, _ in decisions), dtype=np.intp, count=len(decisions))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        matrix = np.asarray([row for rows, _ in decisions for row in rows], dtype=np.float32)
+        scores = matrix @ self.weights
+        # First option with the highest score within each decision's rows
+        best = np.maximum.reduceat(scores, starts)
+        owner = np.repeat(np.arange(len(decisions)), lengths)
+        top = np.flatnonzero(scores == best[owner])
+        _, first = np.unique(owner[top], return_index=True)
+        picks = top[first] - starts
+        return [options[pick] for (_, options), pick in zip(decisions, picks.tolist())]
+
+_model = None
+_loaded = False
+
+def policy_model() -> Optional[PolicyModel]:
+    """The weights at POLICY_MODEL_PATH, loaded on first use, None if NumPy or the file is missing"""
+    global _model, _loaded
+    if not _loaded:
+        _loaded = True
+        if np is None:
+            logger.warning('NumPy is not installed, learned bots play like hard bots')
+            return None
+        try:
+            _model = PolicyModel(np.load(POLICY_MODEL_PATH))
+            logger.info('Policy model loaded from %s', POLICY_MODEL_PATH)
+        except (OSError, ValueError) as e:
+            logger.warning('No policy model, learned bots play like hard bots: %s', e)
+    return _model
\ No newline at end of file
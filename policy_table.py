@@ -0,0 +1,182 @@
+"""
+Precomputed bot policy for Tschau-Sepp
+The 'expert' bot does not think, it looks its move up. A move situation is
+reduced to a small set of features (effect to answer, hand size, cards per
+color, number of special cards held, which kinds of cards are playable,
+the opponents' smallest hand and the deck size), packed into one integer
+(state_key). train_policy.py plays self-play games offline and stores
+the kind of card that won most often per state (ACTIONS) in a binary
+hash table, which the server memory-maps, so all worker processes share
+one copy in the page cache and a move costs one hashed lookup.
+
+File layout (little-endian):
+    header  magic b'TSPT', format version, FEATURE_VERSION, slot count, entries
+    keys    slot count x uint32, state_key + 1 (0 marks an empty slot)
+    actions slot count x uint8, index into ACTIONS
+Slots are probed linearly from hash_slot(key).
+"""
+
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional
+from log_config import get_logger
+
+logger = get_logger('ai')
+
+POLICY_TABLE_PATH = os.environ.get('POLICY_TABLE_PATH',
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), 'policy_table.bin'))
+
+HEADER = struct.Struct('<4sBBHII')
+MAGIC = b'TSPT'
+FORMAT_VERSION = 1
+
+# Bump when state_key changes, tables built for other features are ignored
+FEATURE_VERSION = 1
+
+# What the bot can do: draw, or play a card of one kind
+ACTIONS = ('draw', 'normal', '7', '8', 'U', 'A', 'rose_ober')
+
+SUITS = ('rosen', 'schellen', 'schilten', 'eichel')
+
+def card_kind(card: Dict) -> str:
+    if card['value'] == 'O' and card['suit'] == 'rosen':
+        return 'rose_ober'
+    if card['value'] in ('7', '8', 'U', 'A'):
+        return card['value']
+    return 'normal'
+
+# Bit of the card's kind in ACTIONS order, per (suit, value)
+_KIND_BITS = {(suit, value): 1 << ACTIONS.index(card_kind({'suit': suit, 'value': value}))
+              for suit in SUITS for value in ('6', '7', '8', '9', 'U', 'O', 'K', 'A')}
+
+def state_key(hand: List[Dict], playable: List[Dict], current_color: str, must_draw_cards: int,
+              special_effect: Optional[str], opponent_cards: Optional[int] = None,
+              deck_size: Optional[int] = None) -> int:
+    """
+    Pack a move situation into 25 bits. Counts are capped where more makes
+    little difference, the other colors are ordered by count so a table
+    entry covers all four colors
+    """
+    if must_draw_cards > 0:
+        mode = 2 if special_effect == '7' else 3
+    else:
+        mode = 1 if special_effect == 'A' else 0
+
+    own_color = 0
+    counts = {}
+    specials = 0
+    for card in hand:
+        suit = card['suit']
+        if suit == current_color:
+            own_color += 1
+        else:
+            counts[suit] = counts.get(suit, 0) + 1
+        if _KIND_BITS[suit, card['value']] != 2:
+            specials += 1
+    others = sorted((min(n, 2) for n in counts.values()), reverse=True)
+    others += [0] * (3 - len(others))
+
+    kinds = 0
+    for card in playable:
+        kinds |= _KIND_BITS[card['suit'], card['value']]
+
+    opponents = 3 if opponent_cards is None else min(max(opponent_cards, 1), 4) - 1
+    if deck_size is None or deck_size > 12:
+        deck = 2
+    else:
+        deck = 0 if deck_size <= 4 else 1
+
+    return (mode << 23 | min(len(hand), 7) << 20 | min(own_color, 3) << 18
+            | others[0] << 16 | others[1] << 14 | others[2] << 12 | min(specials, 3) << 10
+            | kinds >> 1 << 4  # normal and the special kinds
+            | opponents << 2 | deck)
+
+def hash_slot(key: int, mask: int) -> int:
+    h = key * 2654435761 & 0xffffffff
+    return (h ^ h >> 16) & mask
+
+def pick_card(action: str, playable: List[Dict], hand: List[Dict]) -> Optional[Dict]:
+    """A playable card of the chosen kind from the color with the fewest cards, None to draw"""
+    if action == 'draw':
+        return None
+    bit = 1 << ACTIONS.index(action)
+    candidates = [card for card in playable if _KIND_BITS[card['suit'], card['value']] == bit]
+    if len(candidates) < 2:
+        return candidates[0] if candidates else None
+    counts = {}
+    for card in hand:
+        counts[card['suit']] = counts.get(card['suit'], 0) + 1
+    return min(candidates, key=lambda card: counts[card['suit']])
+
+class PolicyTable:
+    """Read-only view of a table file, the file stays mapped for the process lifetime"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, features, _, slots, self.entries = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'{path} is not a policy table')
+        if features != FEATURE_VERSION:
+            raise ValueError(f'{path} was built for feature version {features}, not {FEATURE_VERSION}')
+        if slots & (slots - 1) or len(self.map) != HEADER.size + slots * 5:
+            raise ValueError(f'{path} is truncated or damaged')
+        self.mask = slots - 1
+        self.keys = memoryview(self.map)[HEADER.size:HEADER.size + slots * 4].cast('I')
+        self.actions = memoryview(self.map)[HEADER.size + slots * 4:]
+        if struct.pack('=I', 1) != struct.pack('<I', 1):
+            # Big-endian host, the cast view would read the keys byte-swapped
+            self.keys = struct.unpack(f'<{slots}I', self.keys.tobytes())
+
+    def __len__(self):
+        return self.entries
+
+    def lookup(self, key: int) -> Optional[str]:
+        """Stored action for a state_key, None if the state was not seen in training"""
+        stored = key + 1
+        slot = hash_slot(key, self.mask)
+        while True:
+            found = self.keys[slot]
+            if found == stored:
+                return ACTIONS[self.actions[slot]]
+            if found == 0:
+                return None
+            slot = (slot + 1) & self.mask
+
+def write_table(path, policy: Dict[int, str]):
+    """Write {state_key: action} as a table file, replacing path atomically"""
+    slots = 1
+    while slots < len(policy) * 2:
+        slots <<= 1
+    mask = slots - 1
+    keys = [0] * slots
+    actions = bytearray(slots)
+    for key, action in sorted(policy.items()):
+        slot = hash_slot(key, mask)
+        while keys[slot]:
+            slot = (slot + 1) & mask
+        keys[slot] = key + 1
+        actions[slot] = ACTIONS.index(action)
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, FEATURE_VERSION, 0, slots, len(policy)))
+        f.write(struct.pack(f'<{slots}I', *keys))
+        f.write(actions)
+    os.replace(tmp_path, path)
+
+_table = None
+_loaded = False
+
+def policy_table() -> Optional[PolicyTable]:
+    """The table at POLICY_TABLE_PATH, mapped on first use, None if it is missing or unusable"""
+    global _table, _loaded
+    if not _loaded:
+        _loaded = True
+        try:
+            _table = PolicyTable(POLICY_TABLE_PATH)
+            logger.info('Policy table loaded from %s (%d states)', POLICY_TABLE_PATH, len(_table))
+        except (OSError, ValueError) as e:
+            logger.warning('No policy table, expert bots play like hard bots: %s', e)
+    return _table
\ No newline at end of file
@@ -0,0 +1,181 @@
+"""
+Statistical profiler for Tschau-Sepp
+A sampler thread records the Python stacks of all other threads every
+PROFILE_INTERVAL seconds (the event loop with whatever handler, timer or
+bot move it is running, and the timer threads of the eventlet server).
+When the profile stops it is written to PROFILE_DIR as collapsed stacks,
+one line "frame;frame;frame count" per stack, which flamegraph.pl,
+speedscope or inferno open directly:
+    <stamp>-all.folded            every sample
+    <stamp>-<function>.folded     samples inside one of PROFILE_FUNCTIONS,
+                                  cut at that function
+    <stamp>-summary.json          sample counts and event loop lag
+Start it with PROFILE=1 or the admin_profile socket event.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from log_config import get_logger
+
+logger = get_logger('server')
+
+PROFILE = os.environ.get('PROFILE', '').lower() in ('1', 'true', 'yes')
+
+# Where the collapsed stack files are written
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+
+# Seconds between two samples
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.01))
+
+# A profile stops by itself after this many seconds, 0 runs until stopped
+PROFILE_SECONDS = float(os.environ.get('PROFILE_SECONDS', 60))
+
+# Seconds between two checks whether a stopped profile has been written
+PROFILE_REPORT_POLL = 0.1
+
+# Functions that get a flame graph of their own
+PROFILE_FUNCTIONS = [name.strip() for name in os.environ.get(
+    'PROFILE_FUNCTIONS', 'handle_play_card,handle_disconnect,start_turn_timer,process_ai_turn').split(',')
+    if name.strip()]
+
+def _frame_name(code):
+    return f'{os.path.basename(code.co_filename)}:{code.co_name}'
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class StackSampler:
+    def __init__(self, interval=PROFILE_INTERVAL, functions=PROFILE_FUNCTIONS, directory=PROFILE_DIR):
+        self.interval = interval
+        self.functions = functions
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopping = threading.Event()
+        self.stacks = {}  # (thread name, code objects from the root) -> samples
+        self.lags = []  # Event loop lag measured while profiling
+        self.started_at = None
+        self.files = []  # Written by the last profile
+
+    @property
+    def active(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, seconds=PROFILE_SECONDS):
+        """Start a profile, False if one is already running"""
+        with self.lock:
+            if self.active:
+                return False
+            self.stacks = {}
+            self.lags = []
+            self.files = []
+            self.started_at = time.time()
+            self.stopping.clear()
+            # A real thread: it has to run while the event loop is busy
+            self.thread = threading.Thread(target=self._run, args=(seconds,), name='profiler', daemon=True)
+            self.thread.start()
+        logger.info('Profiler started (%.0f ms interval, %s)', self.interval * 1000,
+                    f'{seconds:.0f}s' if seconds else 'until stopped')
+        return True
+
+    def stop(self):
+        """
+        Ask the running profile to stop, the sampler thread writes it and
+        ends. Does not wait for it: joining a real thread from the event
+        loop would hold up every room until the files are written
+        """
+        if self.thread is not None:
+            self.stopping.set()
+
+    def record_lag(self, lag):
+        if self.active:
+            self.lags.append(lag)
+
+    def status(self):
+        return {
+            'active': self.active,
+            'started_at': self.started_at,
+            'samples': sum(list(self.stacks.values())),
+            'files': self.files
+        }
+
+    def _run(self, seconds):
+        own = threading.get_ident()
+        deadline = time.monotonic() + seconds if seconds else None
+        try:
+            while not self.stopping.wait(self.interval):
+                if deadline and time.monotonic() >= deadline:
+                    break
+                self._sample(own)
+        finally:
+            try:
+                self.files = self._write()
+            except OSError as e:
+                logger.error('Could not write profile to %s: %s', self.directory, e)
+
+    def _sample(self, own):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            key = (names.get(ident, 'thread'), tuple(codes))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def _write(self):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+        base = os.path.join(self.directory, stamp)
+
+        folded = {'all': {}}
+        folded.update((name, {}) for name in self.functions)
+        for (thread_name, codes), count in self.stacks.items():
+            names = [_frame_name(code) for code in codes]
+            line = ';'.join([thread_name] + names)
+            folded['all'][line] = folded['all'].get(line, 0) + count
+            for function in self.functions:
+                for depth, code in enumerate(codes):
+                    if code.co_name == function:
+                        line = ';'.join(names[depth:])
+                        folded[function][line] = folded[function].get(line, 0) + count
+                        break
+
+        files = []
+        for name, lines in folded.items():
+            path = f'{base}-{name}.folded'
+            with open(path, 'w') as f:
+                for line, count in sorted(lines.items()):
+                    f.write(f'{line} {count}\n')
+            files.append(path)
+
+        summary = {
+            'started_at': self.started_at,
+            'duration': round(time.time() - self.started_at, 3),
+            'interval': self.interval,
+            'samples': {name: sum(lines.values()) for name, lines in folded.items()},
+            'loop_lag': {
+                'checks': len(self.lags),
+                'p50': round(_percentile(self.lags, 0.5), 4),
+                'p99': round(_percentile(self.lags, 0.99), 4),
+                'max': round(max(self.lags, default=0.0), 4)
+            }
+        }
+        path = f'{base}-summary.json'
+        with open(path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        files.append(path)
+        logger.info('Profile written to %s-*.folded (%d samples, loop lag p99 %.0f ms)',
+                    base, summary['samples']['all'], summary['loop_lag']['p99'] * 1000)
+        return files
+
+profiler = StackSampler()
\ No newline at end of file
@@ -4,6 +4,7 @@ Rate limiting middleware for Socket.IO events
 import time
 from collections import defaultdict
 from functools import wraps
+from metrics import RATE_LIMITED_TOTAL
 
 class RateLimiter:
     def __init__(self):
@@ -18,6 +19,8 @@ class RateLimiter:
             'send_emote': 20,     # 20 emotes per minute
             'create_room': 5,     # 5 room creations per minute
             'join_room': 10,      # 10 join attempts per minute
+            'spectate_room': 10,  # 10 spectate attempts per minute
+            'find_match': 10,     # 10 queue joins per minute
             'default': 60         # 60 requests per minute for other events
         }
         
@@ -107,6 +110,7 @@ def rate_limit(event_name=None):
             
             # Check rate limit
             if not rate_limiter.is_allowed(client_id, event):
+                RATE_LIMITED_TOTAL.inc(event)
                 remaining = rate_limiter.get_remaining_requests(client_id, event)
                 emit('rate_limited', {
                     'event': event,
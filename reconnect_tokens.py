@@ -0,0 +1,130 @@
+"""
+Reconnect tokens for Tschau-Sepp
+Tokens handed out on disconnect live in a TTL map: an expiry heap drops
+them as soon as the grace period is over, every player holds at most one
+token and the total number of tokens is capped, so clients that never
+come back cannot grow the map.
+"""
+
+import heapq
+import os
+import secrets
+import time
+from metrics import RECONNECT_TOKENS_DROPPED_TOTAL
+
+# Upper bound of outstanding tokens, the ones closest to expiry go first
+RECONNECT_TOKEN_CAPACITY = int(os.environ.get('RECONNECT_TOKEN_CAPACITY', 10000))
+
+class ReconnectTokens:
+    """Token -> {'room_code', 'player_id', 'disconnect_time', 'expires_at'}"""
+
+    def __init__(self, capacity=RECONNECT_TOKEN_CAPACITY):
+        self.capacity = capacity
+        self.tokens = {}
+        self.by_player = {}  # player_id -> token
+        self.by_room = {}  # room_code -> set of tokens
+        self.heap = []  # (expires_at, token), stale entries are skipped
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __contains__(self, token):
+        return self.get(token) is not None
+
+    def issue(self, room_code, player_id, ttl, now=None):
+        """Create a token for a disconnected player, replacing their previous one"""
+        now = now or time.time()
+        self.expire(now)
+
+        previous = self.by_player.get(player_id)
+        if previous is not None:
+            self._remove(previous, 'replaced')
+
+        while len(self.tokens) >= self.capacity and self.heap:
+            expires_at, token = heapq.heappop(self.heap)
+            entry = self.tokens.get(token)
+            if entry is not None and entry['expires_at'] == expires_at:
+                self._remove(token, 'capacity')
+
+        token = secrets.token_hex(16)
+        entry = {
+            'room_code': room_code,
+            'player_id': player_id,
+            'disconnect_time': now,
+            'expires_at': now + ttl
+        }
+        self.tokens[token] = entry
+        self.by_player[player_id] = token
+        self.by_room.setdefault(room_code, set()).add(token)
+        heapq.heappush(self.heap, (entry['expires_at'], token))
+
+        if len(self.heap) > 2 * len(self.tokens) + 64:
+            self.heap = [(e['expires_at'], t) for t, e in self.tokens.items()]
+            heapq.heapify(self.heap)
+        return token
+
+    def get(self, token, now=None):
+        """Entry of a valid token, None if unknown or expired"""
+        entry = self.tokens.get(token)
+        if entry is None:
+            return None
+        if entry['expires_at'] <= (now or time.time()):
+            self._remove(token, 'expired')
+            return None
+        return entry
+
+    def pop(self, token):
+        """Consume a token after a successful reconnect"""
+        entry = self.tokens.get(token)
+        if entry is not None:
+            self._remove(token, None)
+        return entry
+
+    def discard_room(self, room_code):
+        """Drop all tokens of a room that no longer exists"""
+        for token in list(self.by_room.get(room_code, ())):
+            self._remove(token, 'room_closed')
+
+    def expire(self, now=None):
+        """Drop all expired tokens, returns how many"""
+        now = now or time.time()
+        expired = 0
+        while self.heap and self.heap[0][0] <= now:
+            expires_at, token = heapq.heappop(self.heap)
+            entry = self.tokens.get(token)
+            if entry is not None and entry['expires_at'] == expires_at:
+                self._remove(token, 'expired')
+                expired += 1
+        return expired
+
+    def to_snapshot(self):
+        """Outstanding tokens as plain lists for the restart snapshot"""
+        return [[token, e['room_code'], e['player_id'], e['disconnect_time'], e['expires_at']]
+                for token, e in self.tokens.items()]
+
+    def restore(self, entries, shift=0.0):
+        """Load to_snapshot() data, shift moves the times past the downtime"""
+        for token, room_code, player_id, disconnect_time, expires_at in entries:
+            entry = {
+                'room_code': room_code,
+                'player_id': player_id,
+                'disconnect_time': disconnect_time + shift,
+                'expires_at': expires_at + shift
+            }
+            self.tokens[token] = entry
+            self.by_player[player_id] = token
+            self.by_room.setdefault(room_code, set()).add(token)
+            self.heap.append((entry['expires_at'], token))
+        heapq.heapify(self.heap)
+
+    def _remove(self, token, reason):
+        entry = self.tokens.pop(token)
+        if self.by_player.get(entry['player_id']) == token:
+            del self.by_player[entry['player_id']]
+        room_tokens = self.by_room.get(entry['room_code'])
+        if room_tokens is not None:
+            room_tokens.discard(token)
+            if not room_tokens:
+                del self.by_room[entry['room_code']]
+        if reason:
+            RECONNECT_TOKENS_DROPPED_TOTAL.inc(reason)
\ No newline at end of file
@@ -0,0 +1,285 @@
+"""
+Game results store for Tschau-Sepp
+Finished games are recorded into SQLite (WAL mode). Event handlers only
+append to an in-memory queue, a writer thread flushes it in batched
+transactions and keeps the per-player aggregate table up to date in the
+same transaction. Leaderboard and player queries read only the aggregate
+table and are cached in an LRU that is invalidated by every flush.
+Set RESULTS_DB_PATH to an empty string to disable the store.
+"""
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from metrics import RESULTS_WRITTEN_TOTAL, RESULTS_DROPPED_TOTAL, RESULTS_FLUSH_SECONDS
+from log_config import get_logger
+
+logger = get_logger('results')
+
+RESULTS_DB_PATH = os.environ.get('RESULTS_DB_PATH', 'results.db')
+
+# Seconds between two flushes of the write queue
+RESULTS_FLUSH_INTERVAL = float(os.environ.get('RESULTS_FLUSH_INTERVAL', 1.0))
+
+# Games buffered at most, more are dropped instead of blocking a handler
+RESULTS_QUEUE_SIZE = int(os.environ.get('RESULTS_QUEUE_SIZE', 10000))
+
+# Cached leaderboard and player queries
+RESULTS_CACHE_SIZE = int(os.environ.get('RESULTS_CACHE_SIZE', 256))
+
+# Games a player needs before showing up in the win rate leaderboard
+LEADERBOARD_MIN_GAMES = int(os.environ.get('LEADERBOARD_MIN_GAMES', 5))
+
+# Games written per transaction
+BATCH_SIZE = 500
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    room_code TEXT NOT NULL,
+    started_at REAL,
+    finished_at REAL NOT NULL,
+    winner TEXT,
+    vs_bot INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS game_players (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    player_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    is_ai INTEGER NOT NULL,
+    won INTEGER NOT NULL,
+    cards_left INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS game_players_by_player ON game_players (player_key, game_id);
+CREATE TABLE IF NOT EXISTS player_stats (
+    player_key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    is_ai INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    cards_left_total INTEGER NOT NULL,
+    last_played REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS player_stats_by_wins ON player_stats (is_ai, wins DESC, games);
+'''
+
+UPSERT_STATS = '''
+INSERT INTO player_stats (player_key, name, is_ai, games, wins, cards_left_total, last_played)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (player_key) DO UPDATE SET
+    name = excluded.name,
+    games = games + excluded.games,
+    wins = wins + excluded.wins,
+    cards_left_total = cards_left_total + excluded.cards_left_total,
+    last_played = max(last_played, excluded.last_played)
+'''
+
+STATS_COLUMNS = 'name, is_ai, games, wins, cards_left_total, last_played'
+
+def player_key(name):
+    """Stats are kept per name, without accounts this is the best identity we have"""
+    return ' '.join(name.split()).casefold()
+
+def game_result(room, room_code, winner_id):
+    """Plain data of a finished game, cheap enough to build in a handler"""
+    players = room.game_state.players if room.game_state else room.players
+    return {
+        'room_code': room_code,
+        'started_at': room.game_started_at,
+        'finished_at': time.time(),
+        'players': [(p.name, bool(p.is_ai), p.id == winner_id, len(p.hand)) for p in players]
+    }
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=5.0)
+    conn.execute('PRAGMA journal_mode=WAL')
+    # With WAL a commit survives a process crash, only power loss can drop the last ones
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+class ResultsStore:
+    def __init__(self, path=RESULTS_DB_PATH, flush_interval=RESULTS_FLUSH_INTERVAL,
+                 queue_size=RESULTS_QUEUE_SIZE, cache_size=RESULTS_CACHE_SIZE):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue(maxsize=queue_size)
+        self.cache = LRUCache(cache_size)
+        self.generation = 0  # Bumped by every flush, part of the cache key
+        self.local = threading.local()
+        self.writer = None
+        self.stopping = threading.Event()
+        self.dropped = 0  # Games dropped on a full queue since the last flush
+        self.start_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def record(self, result):
+        """Queue a game_result() for writing, never blocks. Games without a human are not kept"""
+        if not self.enabled:
+            return
+        if all(is_ai for _, is_ai, _, _ in result['players']):
+            # Bot rooms and bot-only games, their random bot names would only fill the leaderboard
+            return
+        self.ensure_writer_running()
+        try:
+            self.pending.put_nowait(result)
+        except queue.Full:
+            RESULTS_DROPPED_TOTAL.inc()
+            self.dropped += 1
+
+    def ensure_writer_running(self):
+        if self.writer is not None:
+            return
+        with self.start_lock:
+            if self.writer is None and not self.stopping.is_set():
+                # A real thread: sqlite blocks in C and would stall a green thread's hub
+                self.writer = threading.Thread(target=self._run_writer, name='results-writer', daemon=True)
+                self.writer.start()
+
+    def _run_writer(self):
+        conn = _connect(self.path)
+        conn.executescript(SCHEMA)
+        while True:
+            stopping = self.stopping.wait(self.flush_interval)
+            while self._flush(conn):
+                pass
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                logger.warning('Results queue full, dropped %d games', dropped)
+            if stopping:
+                break
+        conn.close()
+
+    def _flush(self, conn):
+        """Write up to BATCH_SIZE queued games in one transaction, returns True if more are waiting"""
+        batch = []
+        while len(batch) < BATCH_SIZE:
+            try:
+                batch.append(self.pending.get_nowait())
+            except queue.Empty:
+                break
+        if not batch:
+            return False
+
+        started = time.perf_counter()
+        stats = {}
+        try:
+            with conn:
+                for result in batch:
+                    players = result['players']
+                    winner = next((name for name, _, won, _ in players if won), None)
+                    vs_bot = any(is_ai for _, is_ai, _, _ in players)
+                    game_id = conn.execute(
+                        'INSERT INTO games (room_code, started_at, finished_at, winner, vs_bot) VALUES (?, ?, ?, ?, ?)',
+                        (result['room_code'], result['started_at'], result['finished_at'], winner, vs_bot)
+                    ).lastrowid
+                    rows = []
+                    for name, is_ai, won, cards_left in players:
+                        key = player_key(name)
+                        rows.append((game_id, key, name, is_ai, won, cards_left))
+                        # Aggregate the batch first, one upsert per player
+                        entry = stats.get(key)
+                        if entry is None:
+                            entry = stats[key] = [key, name, is_ai, 0, 0, 0, 0.0]
+                        entry[1] = name
+                        entry[3] += 1
+                        entry[4] += won
+                        entry[5] += cards_left
+                        entry[6] = max(entry[6], result['finished_at'])
+                    conn.executemany('INSERT INTO game_players VALUES (?, ?, ?, ?, ?, ?)', rows)
+                conn.executemany(UPSERT_STATS, stats.values())
+        except sqlite3.Error as e:
+            RESULTS_DROPPED_TOTAL.inc(amount=len(batch))
+            logger.error('Could not write %d game results: %s', len(batch), e)
+            return False
+
+        self.generation += 1
+        RESULTS_WRITTEN_TOTAL.inc(amount=len(batch))
+        RESULTS_FLUSH_SECONDS.observe(time.perf_counter() - started)
+        return len(batch) == BATCH_SIZE
+
+    def close(self):
+        """Flush everything still queued and stop the writer"""
+        self.stopping.set()
+        if self.writer is not None:
+            self.writer.join(timeout=10)
+
+    def _reader(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = _connect(self.path)
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    def _cached(self, key, query, params):
+        key = (self.generation,) + key
+        rows = self.cache.get(key)
+        if rows is None:
+            try:
+                rows = [dict(row) for row in self._reader().execute(query, params)]
+            except sqlite3.OperationalError:
+                # Nothing written yet, the writer creates the tables
+                rows = []
+            self.cache.put(key, rows)
+        return rows
+
+    def leaderboard(self, sort='wins', limit=10, include_bots=False):
+        """Top players by wins or by win rate (with LEADERBOARD_MIN_GAMES games)"""
+        if not self.enabled:
+            return []
+        bots = '' if include_bots else 'WHERE is_ai = 0'
+        if sort == 'win_rate':
+            query = (f'SELECT {STATS_COLUMNS} FROM player_stats '
+                     f'{bots + " AND" if bots else "WHERE"} games >= ? '
+                     'ORDER BY CAST(wins AS REAL) / games DESC, games DESC LIMIT ?')
+            params = (LEADERBOARD_MIN_GAMES, limit)
+        else:
+            query = f'SELECT {STATS_COLUMNS} FROM player_stats {bots} ORDER BY wins DESC, games LIMIT ?'
+            params = (limit,)
+        return [_with_rates(row) for row in
+                self._cached(('leaderboard', sort, limit, include_bots), query, params)]
+
+    def player_stats(self, name):
+        """Aggregated stats of one player, None if they never finished a game"""
+        if not self.enabled:
+            return None
+        rows = self._cached(('player', player_key(name)),
+                            f'SELECT {STATS_COLUMNS} FROM player_stats WHERE player_key = ?',
+                            (player_key(name),))
+        return _with_rates(rows[0]) if rows else None
+
+def _with_rates(row):
+    games = row['games']
+    return dict(row,
+                is_ai=bool(row['is_ai']),
+                win_rate=round(row['wins'] / games, 3) if games else 0.0,
+                avg_cards_left=round(row['cards_left_total'] / games, 2) if games else 0.0)
+
+results = ResultsStore()
+atexit.register(results.close)
\ No newline at end of file
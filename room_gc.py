@@ -0,0 +1,100 @@
+"""
+Idle room collection for Tschau-Sepp
+Rooms are indexed in a min-heap by the time they may expire. Activity only
+moves a room's last_activity forward, the heap entry is re-validated when
+it comes due, so touching a room is O(1) and a sweep only looks at rooms
+that actually reached their deadline.
+"""
+
+import gc
+import heapq
+import os
+import sys
+
+# Seconds without player activity before a waiting or playing room is closed
+ROOM_IDLE_TTL = float(os.environ.get('ROOM_IDLE_TTL', 1800))
+
+# Seconds a finished room is kept for a rematch
+ROOM_FINISHED_TTL = float(os.environ.get('ROOM_FINISHED_TTL', 300))
+
+# Seconds a paused room (player disconnected) waits for the reconnect
+ROOM_PAUSED_TTL = float(os.environ.get('ROOM_PAUSED_TTL', 600))
+
+# Seconds between two sweeps
+ROOM_GC_INTERVAL = float(os.environ.get('ROOM_GC_INTERVAL', 30))
+
+def room_horizon(status):
+    """Idle time after which a room in the given status is collected"""
+    if status == 'finished':
+        return ROOM_FINISHED_TTL
+    if status == 'paused':
+        return ROOM_PAUSED_TTL
+    return ROOM_IDLE_TTL
+
+class RoomTTLIndex:
+    """Min-heap of (deadline, room_code) with lazy removal of stale entries"""
+
+    def __init__(self):
+        self.heap = []
+        self.deadlines = {}  # room_code -> deadline of its live heap entry
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def schedule(self, room_code, deadline):
+        """Make sure the room is checked no later than deadline"""
+        current = self.deadlines.get(room_code)
+        if current is not None and current <= deadline:
+            # Checked earlier anyway, the check re-schedules from last_activity
+            return
+        self.deadlines[room_code] = deadline
+        heapq.heappush(self.heap, (deadline, room_code))
+
+        # Superseded entries pile up when deadlines keep moving forward
+        if len(self.heap) > 2 * len(self.deadlines) + 64:
+            self.heap = [(d, code) for code, d in self.deadlines.items()]
+            heapq.heapify(self.heap)
+
+    def discard(self, room_code):
+        self.deadlines.pop(room_code, None)
+
+    def pop_due(self, now):
+        """Remove and return the codes of all rooms whose deadline has passed"""
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            deadline, room_code = heapq.heappop(self.heap)
+            if self.deadlines.get(room_code) == deadline:
+                del self.deadlines[room_code]
+                due.append(room_code)
+        return due
+
+def deep_sizeof(root, limit=100000):
+    """
+    Approximate memory held by an object graph (bytes), following
+    references via the garbage collector. Modules, classes and functions
+    are shared and not counted.
+    """
+    seen = set()
+    stack = [root]
+    total = 0
+    skip = (type, type(sys), type(deep_sizeof))
+    while stack and len(seen) < limit:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, skip):
+            continue
+        seen.add(id(obj))
+        try:
+            total += sys.getsizeof(obj)
+        except TypeError:
+            continue
+        stack.extend(gc.get_referents(obj))
+    return total
+
+def process_rss_bytes():
+    """Current resident set size, None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
\ No newline at end of file
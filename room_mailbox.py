@@ -0,0 +1,91 @@
+"""
+Per-room command serialization for Tschau-Sepp
+Everything that changes a running game (player actions, turn timeouts,
+bot moves, pausing and resuming) is submitted to the room's mailbox and
+applied one command at a time, in submission order, by the room's
+executor: the first submit to an idle mailbox spawns a drain on the hub
+(or loop) that runs the commands until the mailbox is empty, later
+submits only queue. Submitters never run commands on their own stack.
+Rooms stay independent of each other and no global lock is taken.
+A command submitted with submit_offloaded() computes on a worker thread
+first (bot moves): the room's executor waits for the result without
+blocking the hub or loop, and no other command of the room runs in
+between, so the computation sees the game as the command will find it.
+Commands must not rely on the Flask request context, they run in the
+executor's context.
+"""
+
+import threading
+from collections import deque
+import scheduler
+from metrics import HANDLER_ERRORS_TOTAL, ROOM_COMMANDS_DEFERRED_TOTAL
+from log_config import get_logger
+
+logger = get_logger('server')
+
+_FAILED = object()
+
+class RoomMailbox:
+    def __init__(self):
+        self.commands = deque()
+        self.lock = threading.Lock()  # Guards the queue only, never held while a command runs
+        self.running = False
+
+    def __len__(self):
+        return len(self.commands)
+
+    def submit(self, command, *args):
+        """Apply command(*args) after all earlier commands of the room, returns False if queued"""
+        return self._enqueue(command, args, None)
+
+    def submit_offloaded(self, work, command, *args):
+        """
+        Like submit, but work(*args) runs on a worker thread first and the
+        command is called as command(*args, result). work must not emit or
+        schedule anything, the command does that on the hub or loop
+        """
+        return self._enqueue(command, args, work)
+
+    def _enqueue(self, command, args, work):
+        with self.lock:
+            self.commands.append((command, args, work))
+            if self.running:
+                ROOM_COMMANDS_DEFERRED_TOTAL.inc()
+                return False
+            self.running = True
+        scheduler.spawn(self._drain)
+        return True
+
+    def _drain(self):
+        while True:
+            with self.lock:
+                if not self.commands:
+                    self.running = False
+                    return
+                command, args, work = self.commands.popleft()
+            if work is not None:
+                # The executor continues in _resume once the result is back
+                scheduler.offload(lambda: self._compute(command, work, args),
+                                  lambda result: self._resume(command, args, result))
+                return
+            self._apply(command, args)
+
+    def _compute(self, command, work, args):
+        try:
+            return work(*args)
+        except Exception as e:
+            HANDLER_ERRORS_TOTAL.inc(command.__name__.replace('apply_', ''))
+            logger.exception('Error computing room command %s: %s', command.__name__, e)
+            return _FAILED
+
+    def _resume(self, command, args, result):
+        if result is not _FAILED:
+            self._apply(command, args + (result,))
+        self._drain()
+
+    def _apply(self, command, args):
+        try:
+            command(*args)
+        except Exception as e:
+            HANDLER_ERRORS_TOTAL.inc(command.__name__.replace('apply_', ''))
+            logger.exception('Error in room command %s: %s', command.__name__, e)
\ No newline at end of file
@@ -6,7 +6,7 @@ Run this script to start the game server with WebSocket support
 
 import os
 import sys
-from game_server import app, socketio
+from game_server import app, socketio, install_restart_handoff
 
 if __name__ == '__main__':
     # Set environment variables if not set
@@ -20,6 +20,9 @@ if __name__ == '__main__':
     print("Drücke Ctrl+C zum Beenden")
     print("=" * 50)
     
+    # Resume games handed over by the previous process, drain on SIGTERM
+    install_restart_handoff()
+    
     try:
         # Run with eventlet for WebSocket support
         socketio.run(app, 
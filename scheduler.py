@@ -0,0 +1,152 @@
+"""
+Background work for Tschau-Sepp
+Turn timers, periodic jobs and bot think-delays are scheduled through the
+installed scheduler instead of threading.Timer, Thread or sleep loops, so
+the same game code runs on both servers: game_server.py under eventlet
+(green threads on the hub) and asgi_server.py under asyncio (loop
+callbacks and tasks). Work that would hold up every room, like bot
+compute, is handed to a worker thread with offload() and its result
+comes back on the hub or loop.
+"""
+
+import asyncio
+import threading
+from log_config import get_logger
+
+logger = get_logger('server')
+
+_scheduler = None
+
+class ThreadScheduler:
+    """Scheduler of the eventlet server"""
+
+    def __init__(self, socketio):
+        self.socketio = socketio
+
+    def call_later(self, delay, callback, *args):
+        return GreenTimer(self.socketio, delay, callback, args)
+
+    def every(self, interval, callback):
+        def loop():
+            while True:
+                self.socketio.sleep(interval)
+                _run_job(callback)
+        self.socketio.start_background_task(loop)
+
+    def spawn(self, callback, *args):
+        self.socketio.start_background_task(callback, *args)
+
+    def offload(self, work, done):
+        # tpool only parks the calling green thread, the hub keeps running
+        from eventlet import tpool
+
+        def run():
+            done(tpool.execute(work))
+        self.socketio.start_background_task(run)
+
+class GreenTimer:
+    """
+    threading.Timer look-alike running on the hub: without monkey patching
+    a real thread cannot wake the green threads waiting for its emits.
+    The delay is a hub timer, cancel() takes it off the hub, and only the
+    callback gets a green thread of its own
+    """
+
+    def __init__(self, socketio, delay, callback, args):
+        from eventlet import hubs
+
+        self.finished = False
+        self.socketio = socketio
+        self.timer = hubs.get_hub().schedule_call_global(delay, self._fire, callback, args)
+
+    def _fire(self, callback, args):
+        # On the hub's own greenlet, which must not block or switch
+        if not self.finished:
+            self.finished = True
+            self.socketio.start_background_task(callback, *args)
+
+    def cancel(self):
+        self.finished = True
+        self.timer.cancel()
+
+    def is_alive(self):
+        return not self.finished
+
+class LoopTimer:
+    """threading.Timer look-alike on top of loop.call_later"""
+
+    def __init__(self, loop, delay, callback, args):
+        self.finished = False
+        self.handle = loop.call_later(delay, self._run, callback, args)
+
+    def _run(self, callback, args):
+        self.finished = True
+        callback(*args)
+
+    def cancel(self):
+        self.handle.cancel()
+        self.finished = True
+
+    def is_alive(self):
+        return not self.finished
+
+class AsyncioScheduler:
+    """Scheduler of the ASGI server, everything runs on the event loop"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.tasks = set()  # Strong references, the loop only keeps weak ones
+
+    def call_later(self, delay, callback, *args):
+        return LoopTimer(self.loop, delay, callback, args)
+
+    def every(self, interval, callback):
+        self._spawn(self._every(interval, callback))
+
+    def spawn(self, callback, *args):
+        # Also called from the WSGI adapter's worker threads
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def offload(self, work, done):
+        future = self.loop.run_in_executor(None, work)
+        future.add_done_callback(lambda finished: done(finished.result()))
+
+    def _spawn(self, coro):
+        task = self.loop.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _every(self, interval, callback):
+        while True:
+            await asyncio.sleep(interval)
+            _run_job(callback)
+
+def _run_job(callback):
+    try:
+        callback()
+    except Exception as e:
+        logger.exception('Error in periodic job %s: %s', callback.__name__, e)
+
+def install(scheduler):
+    """Make scheduler the one used by call_later and every"""
+    global _scheduler
+    _scheduler = scheduler
+
+def call_later(delay, callback, *args):
+    """Run callback after delay seconds, the handle has cancel() and is_alive()"""
+    return _scheduler.call_later(delay, callback, *args)
+
+def every(interval, callback):
+    """Call callback every interval seconds until the process exits"""
+    _scheduler.every(interval, callback)
+
+def spawn(callback, *args):
+    """Run callback(*args) soon on the hub or loop, not on the caller's stack"""
+    _scheduler.spawn(callback, *args)
+
+def offload(work, done):
+    """
+    Run work() on a worker thread and done(result) back on the hub or loop.
+    work must not raise and must not emit or schedule, only compute
+    """
+    _scheduler.offload(work, done)
\ No newline at end of file
@@ -2,151 +2,267 @@
 Simplified AI handler that works directly with game_server
 """
 
+import copy
+import os
 import time
-from threading import Thread
+import scheduler
+from spectators import send_to_spectators, broadcast_spectator_view
+from headless import choose_move, apply_move, closest_opponent
+from policy_model import policy_model, option_features
+from metrics import (BOT_DECISION_SECONDS, VIEW_BUILD_SECONDS, MODEL_BATCH_SIZE, UNWATCHED_MOVES_TOTAL,
+                     observe_payload)
+from results_store import results, game_result
+from backpressure import backpressure
+from log_config import get_logger
 
-def process_ai_turn(room, room_code, socketio):
+logger = get_logger('ai')
+
+# Seconds learned bots wait for other rooms' bots to be scored together
+MODEL_BATCH_INTERVAL = float(os.environ.get('MODEL_BATCH_INTERVAL', 0.05))
+
+# Bot moves per mailbox command in a room nobody watches, other rooms run in between
+UNWATCHED_BATCH = int(os.environ.get('UNWATCHED_BATCH', 64))
+
+# The bot's card is not chosen yet (learned bots, planned by the model batcher)
+UNDECIDED = object()
+
+def choose_bot_move(room, room_code, socketio, turn_number, on_moved):
+    """The worker thread half of a bot move: the card the bot picks, None to draw"""
+    bot = current_bot(room, turn_number)
+    if bot is None:
+        # process_ai_turn finds the turn over and does nothing
+        return UNDECIDED
+    return timed_choice(room.game_state, bot)
+
+def timed_choice(game, bot):
+    started = time.perf_counter()
+    chosen_card = choose_move(game, bot)
+    BOT_DECISION_SECONDS.observe(time.perf_counter() - started, bot.ai.difficulty)
+    return chosen_card
+
+def process_ai_turn(room, room_code, socketio, turn_number, on_moved, chosen_card=UNDECIDED):
     """
-    Simple AI turn processor
+    One bot move, a room mailbox command applying chosen_card (or drawing
+    for None). on_moved(room, room_code) is called after a move that did
+    not end the game
     """
-    print(f"[AI] process_ai_turn called for room {room_code}")
-    try:
-        # Small delay to make it feel natural
-        time.sleep(1.5)
-        print(f"[AI] After delay, checking game state...")
-        
-        if not room:
-            print(f"[AI] No room found!")
-            return
-        if not room.game_state:
-            print(f"[AI] No game_state in room!")
-            return
-        if room.status != 'playing':
-            print(f"[AI] Room status is {room.status}, not playing!")
-            return
-        
-        print(f"[AI] Getting current player...")
-        current_player = room.game_state.get_current_player()
-        if not current_player:
-            print(f"[AI] No current player found!")
-            return
-        
-        print(f"[AI] Current player is: {current_player.name} (ID: {current_player.id})")
-            
-        # Check if current player is AI
-        is_ai = False
-        ai_player = None
-        
-        print(f"[AI] Checking if {current_player.name} is AI...")
-        print(f"[AI] Room has {len(room.players)} players")
+    logger.debug('process_ai_turn called for room %s', room_code)
+    if not room or not room.game_state:
+        logger.debug('Room %s has no game state', room_code)
+        return
+    if room.status != 'playing':
+        logger.debug('Room %s status is %s, not playing', room_code, room.status)
+        return
+    if room.turn_number != turn_number:
+        # The turn this move was scheduled for is over (timeout, pause)
+        logger.debug('Stale AI turn in room %s', room_code)
+        return
+    
+    current_player = room.game_state.get_current_player()
+    if not current_player:
+        logger.debug('Room %s has no current player', room_code)
+        return
         
-        for p in room.players:
-            print(f"[AI] Checking player: {p.name} (ID: {p.id}), is_ai={getattr(p, 'is_ai', False)}")
-            if p.id == current_player.id:
-                print(f"[AI] IDs match! {p.id} == {current_player.id}")
-                if hasattr(p, 'is_ai') and p.is_ai:
-                    is_ai = True
-                    ai_player = p
-                    print(f"[AI] Found AI player: {p.name}")
-                    break
-                else:
-                    print(f"[AI] Player {p.name} is not AI")
-        
-        if not is_ai or not ai_player:
-            print(f"[AI] Current player is not AI, returning")
-            return
-        
-        print(f"AI {ai_player.name} is thinking...")
-        
-        # Get game state
-        game_state = room.game_state.get_game_state()
-        
-        # Convert hand for AI
-        hand_dicts = [{'suit': card.suit, 'value': card.value} for card in current_player.hand]
-        
-        # Let AI choose
-        chosen_card = ai_player.ai.choose_card(
-            hand_dicts,
-            game_state['current_color'],
-            game_state['current_value'],
-            game_state.get('must_draw_cards', 0),
-            game_state.get('special_effect')
-        )
-        
-        if chosen_card:
-            print(f"AI plays: {chosen_card['value']} of {chosen_card['suit']}")
-            # Play the card
-            result = room.game_state.play_card(current_player.id, chosen_card)
-            
-            if result.get('success'):
-                # Handle color selection for Jack
-                if chosen_card['value'] == 'U' and room.game_state.waiting_for_color_selection:
-                    color = ai_player.ai.choose_color(hand_dicts)
-                    room.game_state.select_color(current_player.id, color)
-                    print(f"AI chooses color: {color}")
-                
-                # Broadcast update to ALL players in the room
-                print(f"[AI] Broadcasting game update to room {room_code}")
-                for player in room.players:
-                    if not (hasattr(player, 'is_ai') and player.is_ai):
-                        try:
-                            game_view = room.game_state.get_player_view(player.id)
-                            game_view['turn_time_limit'] = 60  # Add turn time
-                            
-                            # Emit to the specific socket ID
-                            socketio.emit('game_update', game_view, to=player.id)
-                            print(f"[AI] Emitted update to {player.name} (socket: {player.id})")
-                        except Exception as e:
-                            print(f"Error sending update to {player.name}: {e}")
-                
-                # Check for winner
-                if room.game_state.winner:
-                    winner_name = current_player.name
-                    socketio.emit('game_won', {
-                        'winner': room.game_state.winner,
-                        'player_name': winner_name
-                    }, room=room_code)
-                    room.status = 'finished'
-                else:
-                    # Check if next player is also AI
-                    time.sleep(0.5)
-                    process_ai_turn(room, room_code, socketio)
-        else:
-            print(f"AI draws a card")
-            # Draw card
-            result = room.game_state.draw_card(current_player.id)
-            
-            if result.get('success'):
-                # Broadcast update
-                for player in room.players:
-                    if not (hasattr(player, 'is_ai') and player.is_ai):
-                        try:
-                            game_view = room.game_state.get_player_view(player.id)
-                            game_view['turn_time_limit'] = 60
-                            socketio.emit('game_update', game_view, to=player.id)
-                            print(f"Sent game update to {player.name} (socket: {player.id}) after AI draw")
-                        except Exception as e:
-                            print(f"Error sending update to {player.name}: {e}")
-                
-                # Check next player
-                time.sleep(0.5)
-                process_ai_turn(room, room_code, socketio)
+    # Check if current player is AI
+    ai_player = None
+    for p in room.players:
+        if p.id == current_player.id:
+            if hasattr(p, 'is_ai') and p.is_ai:
+                ai_player = p
+            break
+    
+    if not ai_player:
+        logger.debug('Current player %s in room %s is not AI', current_player.name, room_code)
+        return
+    
+    logger.debug('AI %s is thinking...', ai_player.name)
+    
+    # Let the AI take its turn (Tschau/Sepp, card or draw, color choice)
+    if chosen_card is UNDECIDED:
+        chosen_card = timed_choice(room.game_state, ai_player)
+    result = apply_move(room.game_state, ai_player, chosen_card)
+    
+    if result.get('action') == 'play':
+        chosen_card = result['card']
+        logger.debug('AI %s plays %s %s', ai_player.name, chosen_card['value'], chosen_card['suit'])
+        if result.get('color'):
+            logger.debug('AI %s chooses color %s', ai_player.name, result['color'])
+    else:
+        logger.debug('AI %s draws a card', ai_player.name)
+    
+    if not result.get('success'):
+        return
+    room.touch()
+    
+    # Broadcast update to ALL players in the room
+    for player in room.players:
+        if not (hasattr(player, 'is_ai') and player.is_ai) and player.connected:
+            try:
+                started = time.perf_counter()
+                game_view = room.game_state.get_player_view(player.id)
+                VIEW_BUILD_SECONDS.observe(time.perf_counter() - started)
+                game_view['turn_time_limit'] = room.turn_duration
+                observe_payload('game_update', game_view)
                 
-    except Exception as e:
-        print(f"Error in AI turn: {e}")
-        import traceback
-        traceback.print_exc()
-
-class DummyLock:
-    def __enter__(self):
-        pass
-    def __exit__(self, *args):
-        pass
-
-def trigger_ai_turn(room, room_code, socketio):
+                # Emit to the specific socket ID, held back while the client is behind
+                backpressure.send_state(socketio, 'game_update', game_view, player.id)
+            except Exception as e:
+                logger.warning('Error sending update to %s: %s', player.name, e)
+    broadcast_spectator_view(room, room_code, socketio)
+    
+    # Check for winner
+    if room.game_state.winner:
+        finish_game(room, room_code, socketio, current_player)
+    else:
+        on_moved(room, room_code)
+
+def finish_game(room, room_code, socketio, winner):
+    """Announce and record the game a bot move has won"""
+    game_won = {
+        'winner': room.game_state.winner,
+        'player_name': winner.name
+    }
+    socketio.emit('game_won', game_won, room=room_code)
+    send_to_spectators(room, room_code, socketio, 'game_won', game_won)
+    results.record(game_result(room, room_code, room.game_state.winner))
+    room.status = 'finished'
+    if room.turn_timer:
+        room.turn_timer.cancel()
+    room.touch()
+
+def play_unwatched(room, room_code, socketio, turn_number, on_moved):
+    """
+    Bot moves of a room without a connected human or spectator, the worker
+    thread half of a room mailbox command. Nobody sees the moves, so there
+    is no think-delay and no view is built or sent: up to UNWATCHED_BATCH
+    moves are played at compute speed. They are played on a copy of the
+    game, the room's game stays as it is for whoever reads it on the hub
+    or loop meanwhile (a reconnect, the restart snapshot) until
+    unwatched_played adopts the copy. Returns the moves played, the bot
+    that won if one did, whether to go on, the game copied and the copy
+    """
+    game = room.game_state
+    played = copy.deepcopy(game)
+    moves = 0
+    while moves < UNWATCHED_BATCH and not room.has_audience():
+        bot = current_bot(room, turn_number, played)
+        if bot is None:
+            break
+        result = apply_move(played, bot, timed_choice(played, bot))
+        if not result.get('success'):
+            return moves, None, False, game, played
+        moves += 1
+        if played.winner:
+            return moves, bot, False, game, played
+    return moves, None, True, game, played
+
+def unwatched_played(room, room_code, socketio, turn_number, on_moved, outcome):
+    """
+    Adopt and announce what play_unwatched did: the winner, or
+    on_moved(room, room_code) to schedule the next batch. Whoever
+    subscribes later gets the state as it is then
+    """
+    moves, winner, more, game, played = outcome
+    if room.game_state is not game:
+        # A new game started meanwhile, the copy belongs to the old one
+        return
+    UNWATCHED_MOVES_TOTAL.inc(amount=moves)
+    if moves:
+        adopt_game(room, played)
+        # Here rather than per move, the TTL index is not thread-safe
+        room.touch()
+    if winner is not None:
+        finish_game(room, room_code, socketio, winner)
+    elif more and (moves or current_bot(room, turn_number) is not None):
+        # The next batch, or back to the usual pace for an audience that just arrived
+        on_moved(room, room_code)
+
+def adopt_game(room, played):
+    """Make played, a copy of the room's game moved on by play_unwatched, the room's game"""
+    for player, copied in zip(room.players, played.players):
+        # The room's player objects stay, sessions and reconnects refer to them
+        player.hand = copied.hand
+        player.has_called_tschau = copied.has_called_tschau
+        player.has_called_sepp = copied.has_called_sepp
+        if player.is_ai:
+            # With its tracker, which observes the copy
+            player.ai = copied.ai
+    played.players = room.players
+    room.game = room.game_state = played
+
+def current_bot(room, turn_number, game=None):
+    """The bot whose turn it is in game (default the room's), None if the turn is over or belongs to a human"""
+    game = game or room.game_state
+    if not game or room.status != 'playing' or room.turn_number != turn_number:
+        return None
+    player = game.get_current_player()
+    if not getattr(player, 'is_ai', False):
+        return None
+    return player
+
+class ModelBatcher:
+    """
+    Learned bots whose think-delay is over wait here for the next tick.
+    Then the options of all of them, from every room, are scored in one
+    matrix product, and each move is applied through its room's mailbox
+    like any other bot move
+    """
+
+    def __init__(self, interval=MODEL_BATCH_INTERVAL):
+        self.interval = interval
+        self.waiting = []
+        self.scheduled = False
+
+    def request(self, room, room_code, socketio, turn_number, on_moved):
+        self.waiting.append((room, room_code, socketio, turn_number, on_moved))
+        if not self.scheduled:
+            self.scheduled = True
+            scheduler.call_later(self.interval, self.flush)
+
+    def flush(self):
+        self.scheduled = False
+        waiting, self.waiting = self.waiting, []
+        model = policy_model()
+        decisions = []
+        planners = []
+        for room, room_code, socketio, turn_number, on_moved in waiting:
+            bot = current_bot(room, turn_number)
+            if bot is None or model is None:
+                continue
+            game = room.game_state
+            bot.ai.planned = None
+            hand = [card.to_dict() for card in bot.hand]
+            playable = bot.ai._get_playable_cards(hand, game.current_color, game.current_value,
+                                                  game.must_draw_cards, game.special_effect_active)
+            if playable:
+                decisions.append(option_features(hand, playable, game.current_color, game.must_draw_cards,
+                                                 game.special_effect_active, closest_opponent(game, bot),
+                                                 len(game.deck), bot.ai._follow_chances()))
+                planners.append(bot.ai)
+        if decisions:
+            MODEL_BATCH_SIZE.observe(len(decisions))
+            for ai, option in zip(planners, model.choose_batch(decisions)):
+                ai.planned = (option,)
+
+        for room, room_code, socketio, turn_number, on_moved in waiting:
+            room.mailbox.submit(process_ai_turn, room, room_code, socketio, turn_number, on_moved)
+
+model_batcher = ModelBatcher()
+
+def trigger_ai_turn(room, room_code, socketio, on_moved, delay=1.5):
     """
-    Trigger AI turn in background thread
+    Let the bot move after a think-delay, through the room's mailbox so the
+    move cannot interleave with a player action or a turn timeout. Learned
+    bots go through the model batcher first. In a room nobody watches the
+    bots play on right away, without delay or batcher
     """
-    thread = Thread(target=process_ai_turn, args=(room, room_code, socketio))
-    thread.daemon = True
-    thread.start()
\ No newline at end of file
+    if not room.has_audience():
+        scheduler.call_later(0, room.mailbox.submit_offloaded, play_unwatched, unwatched_played,
+                             room, room_code, socketio, room.turn_number, on_moved)
+        return
+    bot = current_bot(room, room.turn_number)
+    if bot is not None and bot.ai.difficulty == 'learned':
+        scheduler.call_later(delay, model_batcher.request, room, room_code, socketio, room.turn_number, on_moved)
+        return
+    scheduler.call_later(delay, room.mailbox.submit_offloaded, choose_bot_move, process_ai_turn,
+                         room, room_code, socketio, room.turn_number, on_moved)
\ No newline at end of file
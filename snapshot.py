@@ -0,0 +1,68 @@
+"""
+Restart handoff for Tschau-Sepp
+On SIGTERM the server pauses all running games, hands every connected
+player a reconnect token and writes the rooms to a snapshot file. The
+next process loads it at startup and the clients continue through the
+normal reconnect_token flow. The file is written to a temp file and
+renamed, so a crash mid-write never leaves a truncated snapshot behind.
+"""
+
+import json
+import os
+import tempfile
+from log_config import get_logger
+
+logger = get_logger('snapshot')
+
+SNAPSHOT_PATH = os.environ.get('SNAPSHOT_PATH', 'rooms_snapshot.json')
+
+# Seconds the draining server waits for the restart notices to go out
+DRAIN_FLUSH_SECONDS = float(os.environ.get('DRAIN_FLUSH_SECONDS', 1.0))
+
+# How quickly a received SIGTERM is noticed
+SHUTDOWN_POLL_SECONDS = 0.25
+
+SNAPSHOT_VERSION = 1
+
+def write_snapshot(data, path=SNAPSHOT_PATH):
+    """Atomically replace the snapshot file, returns its size in bytes"""
+    path = os.path.abspath(path)
+    payload = json.dumps(data, separators=(',', ':'))
+    fd, tmp_path = tempfile.mkstemp(prefix='.snapshot-', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return len(payload)
+
+def read_snapshot(path=SNAPSHOT_PATH):
+    """
+    Load the snapshot and remove the file, so a crash loop never restores
+    the same games twice. Returns None if there is no usable snapshot.
+    """
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.error('Could not read snapshot %s: %s', path, e)
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    if data.get('version') != SNAPSHOT_VERSION:
+        logger.warning('Ignoring snapshot %s with version %s', path, data.get('version'))
+        return None
+    return data
\ No newline at end of file
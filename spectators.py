@@ -0,0 +1,50 @@
+"""
+Spectator support for Tschau-Sepp
+The public part of the game state is built once per move and sent with a
+single emit to a Socket.IO room shared by all spectators of a game, so the
+cost per move does not grow with the number of viewers.
+"""
+
+import os
+import scheduler
+from metrics import observe_payload
+
+# Maximum number of spectators per room
+MAX_SPECTATORS = int(os.environ.get('MAX_SPECTATORS', 200))
+
+# Optional delay (seconds) before spectators see a move, prevents ghosting
+SPECTATOR_DELAY = float(os.environ.get('SPECTATOR_DELAY', 0))
+
+def spectator_room(room_code):
+    """Name of the Socket.IO room that holds all spectators of a game"""
+    return f'{room_code}:spectators'
+
+def send_to_spectators(room, room_code, socketio, event, data):
+    """
+    Send an event to all spectators of a room with one room-wide emit.
+    Honors the spectator delay buffer if configured.
+    """
+    if not room.spectators:
+        return
+
+    if SPECTATOR_DELAY > 0:
+        # One timer per move, independent of the number of viewers
+        scheduler.call_later(SPECTATOR_DELAY, _send, room, room_code, socketio, event, data)
+    else:
+        _send(room, room_code, socketio, event, data)
+
+def broadcast_spectator_view(room, room_code, socketio):
+    """Build the public view once and broadcast it to all spectators"""
+    if not room.spectators or not room.game_state:
+        return
+
+    view = room.game_state.get_public_view()
+    view['turn_time_limit'] = room.turn_duration
+    observe_payload('spectator_update', view)
+    send_to_spectators(room, room_code, socketio, 'spectator_update', view)
+
+def _send(room, room_code, socketio, event, data):
+    if event == 'spectator_update':
+        # Remember what spectators have seen so late joiners get the same (delayed) view
+        room.last_spectator_view = data
+    socketio.emit(event, data, to=spectator_room(room_code))
\ No newline at end of file
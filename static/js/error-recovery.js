@@ -1,5 +1,11 @@
 /**
  * Error Recovery and State Management System
+ *
+ * State backups are written only when the server's state_version changed.
+ * They are kept in IndexedDB as a ring: a full snapshot followed by up to
+ * maxBackups diffs against the previous state, then the next snapshot
+ * replaces the ring. The writes run in idle callbacks, the main thread
+ * only keeps a reference to the state to save.
  */
 
 class ErrorRecovery {
@@ -8,11 +14,20 @@ class ErrorRecovery {
         this.retryDelay = 1000;
         this.connectionLost = false;
         this.lastKnownState = null;
-        this.stateBackups = [];
-        this.maxBackups = 5;
+        this.maxBackups = 20; // Diffs after a snapshot before the ring starts over
         this.autoSaveInterval = 10000; // 10 seconds
         this.errorLog = [];
         
+        // Backup ring in IndexedDB
+        this.dbName = 'tschau-sepp';
+        this.storeName = 'state_backups';
+        this.dbPromise = null;
+        this.savedState = null; // Last state written, the base of the next diff
+        this.savedVersion = null;
+        this.diffsSinceSnapshot = 0;
+        this.pendingState = null;
+        this.saveScheduled = false;
+        
         this.init();
     }
     
@@ -31,6 +46,14 @@ class ErrorRecovery {
         // Page visibility for auto-pause
         document.addEventListener('visibilitychange', this.handleVisibilityChange.bind(this));
         
+        // Backups used to live in localStorage
+        try {
+            localStorage.removeItem('game_state_backup');
+            localStorage.removeItem('game_state_history');
+        } catch (e) {
+            // Storage disabled
+        }
+        
         // Restore state if exists
         this.restoreState();
     }
@@ -44,49 +67,136 @@ class ErrorRecovery {
         }, this.autoSaveInterval);
     }
     
-    // Save current game state
+    // Save current game state, if the server changed it since the last backup
     saveState(state) {
-        try {
-            const backup = {
-                timestamp: Date.now(),
-                state: JSON.stringify(state),
-                roomCode: window.multiplayer?.roomCode,
-                playerId: window.multiplayer?.playerId
-            };
-            
-            // Add to backups array
-            this.stateBackups.push(backup);
-            
-            // Limit number of backups
-            if (this.stateBackups.length > this.maxBackups) {
-                this.stateBackups.shift();
-            }
-            
-            // Save to localStorage
-            localStorage.setItem('game_state_backup', JSON.stringify(backup));
-            localStorage.setItem('game_state_history', JSON.stringify(this.stateBackups));
-            
-            console.log('Game state saved');
-        } catch (error) {
-            console.error('Failed to save state:', error);
+        if (!state || state.state_version === undefined || state.state_version === this.savedVersion) {
+            return;
+        }
+        
+        // Only the newest state is written, the work happens when the browser is idle
+        this.pendingState = state;
+        if (!this.saveScheduled) {
+            this.saveScheduled = true;
+            this.whenIdle(() => {
+                this.saveScheduled = false;
+                const pending = this.pendingState;
+                this.pendingState = null;
+                this.writeBackup(pending).catch(error => {
+                    console.error('Failed to save state:', error);
+                });
+            });
         }
     }
     
-    // Restore game state from backup
-    restoreState() {
-        try {
-            const backup = localStorage.getItem('game_state_backup');
-            if (backup) {
-                const data = JSON.parse(backup);
-                
-                // Check if backup is recent (within 1 hour)
-                const age = Date.now() - data.timestamp;
-                if (age < 3600000) {
-                    this.lastKnownState = JSON.parse(data.state);
-                    console.log('Game state restored from backup');
-                    return this.lastKnownState;
+    whenIdle(callback) {
+        if (window.requestIdleCallback) {
+            window.requestIdleCallback(callback, { timeout: 2000 });
+        } else {
+            setTimeout(callback, 200);
+        }
+    }
+    
+    openDatabase() {
+        if (!this.dbPromise) {
+            this.dbPromise = new Promise((resolve, reject) => {
+                if (!window.indexedDB) {
+                    reject(new Error('IndexedDB not available'));
+                    return;
                 }
+                const request = indexedDB.open(this.dbName, 1);
+                request.onupgradeneeded = () => {
+                    request.result.createObjectStore(this.storeName, { keyPath: 'seq', autoIncrement: true });
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => reject(request.error);
+            });
+        }
+        return this.dbPromise;
+    }
+    
+    // Top-level fields that changed between two states
+    diffState(previous, state) {
+        const set = {};
+        const unset = [];
+        Object.keys(state).forEach(key => {
+            if (JSON.stringify(state[key]) !== JSON.stringify(previous[key])) {
+                set[key] = state[key];
             }
+        });
+        Object.keys(previous).forEach(key => {
+            if (!(key in state)) {
+                unset.push(key);
+            }
+        });
+        return { set, unset };
+    }
+    
+    applyDiff(state, diff) {
+        const next = Object.assign({}, state, diff.set);
+        diff.unset.forEach(key => delete next[key]);
+        return next;
+    }
+    
+    async writeBackup(state) {
+        if (!state || state.state_version === this.savedVersion) return;
+        
+        const db = await this.openDatabase();
+        const startRing = !this.savedState || this.diffsSinceSnapshot >= this.maxBackups;
+        const record = {
+            timestamp: Date.now(),
+            version: state.state_version,
+            roomCode: window.multiplayer?.roomCode,
+            playerId: window.multiplayer?.playerId
+        };
+        if (startRing) {
+            record.type = 'snapshot';
+            record.state = state;
+        } else {
+            record.type = 'diff';
+            record.diff = this.diffState(this.savedState, state);
+        }
+        
+        await new Promise((resolve, reject) => {
+            const tx = db.transaction(this.storeName, 'readwrite');
+            const store = tx.objectStore(this.storeName);
+            if (startRing) {
+                store.clear();
+            }
+            store.add(record);
+            tx.oncomplete = resolve;
+            tx.onerror = () => reject(tx.error);
+            tx.onabort = () => reject(tx.error);
+        });
+        
+        this.savedState = state;
+        this.savedVersion = state.state_version;
+        this.diffsSinceSnapshot = startRing ? 0 : this.diffsSinceSnapshot + 1;
+    }
+    
+    // Restore game state from backup: the snapshot plus all diffs after it
+    async restoreState() {
+        try {
+            const db = await this.openDatabase();
+            const records = await new Promise((resolve, reject) => {
+                const request = db.transaction(this.storeName).objectStore(this.storeName).getAll();
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => reject(request.error);
+            });
+            
+            const start = records.map(record => record.type).lastIndexOf('snapshot');
+            if (start === -1) return null;
+            
+            // Check if backup is recent (within 1 hour)
+            const last = records[records.length - 1];
+            if (Date.now() - last.timestamp >= 3600000) return null;
+            
+            let state = records[start].state;
+            records.slice(start + 1).forEach(record => {
+                state = this.applyDiff(state, record.diff);
+            });
+            this.lastKnownState = state;
+            console.log('Game state restored from backup');
+            return state;
         } catch (error) {
             console.error('Failed to restore state:', error);
         }
@@ -383,8 +493,8 @@ class ErrorRecovery {
     }
     
     // Recover from backup
-    recoverFromBackup() {
-        const state = this.restoreState();
+    async recoverFromBackup() {
+        const state = await this.restoreState();
         if (state && window.multiplayer) {
             // Attempt to rejoin with saved state
             console.log('Attempting recovery from backup');
@@ -422,7 +532,8 @@ class ErrorRecovery {
         return {
             errors: this.errorLog,
             lastState: this.lastKnownState,
-            backups: this.stateBackups.length,
+            backupVersion: this.savedVersion,
+            diffsSinceSnapshot: this.diffsSinceSnapshot,
             connectionStatus: !this.connectionLost
         };
     }
@@ -11,7 +11,9 @@ document.addEventListener('DOMContentLoaded', function() {
     const gameScreen = document.getElementById('game-screen');
     const playerNameInput = document.getElementById('player-name');
     const createRoomBtn = document.getElementById('create-room-btn');
+    const quickMatchBtn = document.getElementById('quick-match-btn');
     const joinRoomBtn = document.getElementById('join-room-btn');
+    const spectateRoomBtn = document.getElementById('spectate-room-btn');
     const roomCodeInput = document.getElementById('room-code-input');
     const displayRoomCode = document.getElementById('display-room-code');
     const waitingPlayerList = document.getElementById('waiting-player-list');
@@ -41,6 +43,13 @@ document.addEventListener('DOMContentLoaded', function() {
     const colorDisplay = document.getElementById('color-display');
     const gameTimer = document.getElementById('game-timer');
     
+    // UI Elements - Chat
+    const chatContainer = document.getElementById('chat-container');
+    const chatMessages = document.getElementById('chat-messages');
+    const chatInput = document.getElementById('chat-input');
+    const chatSendBtn = document.getElementById('chat-send');
+    const chatToggle = document.getElementById('chat-toggle');
+    
     // German suit names
     const suitNames = {
         'rosen': 'Rose',
@@ -49,12 +58,68 @@ document.addEventListener('DOMContentLoaded', function() {
         'eichel': 'Eichel'
     };
     
+    // Card sprite atlas built by build_assets.py, the individual JPEGs are
+    // used until (or if never) the coordinate map has been loaded. The map
+    // URL is content-hashed when the asset build ran.
+    const cardAtlasUrl = new URL(document.body.dataset.cardAtlas || '/static/images/atlas/cards.json',
+                                 window.location.href);
+    let cardAtlas = null;
+    
+    function loadCardAtlas() {
+        fetch(cardAtlasUrl)
+            .then(response => response.ok ? response.json() : null)
+            .then(atlas => {
+                if (!atlas || !atlas.images.jpg) return;
+                
+                // Image names are relative to the map. Browsers without
+                // image-set() type() support drop the second declaration
+                // and keep the JPEG.
+                const imageUrl = format => new URL(atlas.images[format], cardAtlasUrl).pathname;
+                const types = { avif: 'image/avif', webp: 'image/webp', jpg: 'image/jpeg' };
+                const sources = Object.keys(types)
+                    .filter(format => atlas.images[format])
+                    .map(format => `url('${imageUrl(format)}') type('${types[format]}')`);
+                const style = document.createElement('style');
+                style.textContent = `.card-atlas {
+                    background-image: url('${imageUrl('jpg')}');
+                    background-image: image-set(${sources.join(', ')});
+                }`;
+                document.head.appendChild(style);
+                cardAtlas = atlas;
+            })
+            .catch(() => {});
+    }
+    
+    // Rule table from the server: for every rule state (sent as
+    // rule_state with each update) a bitmask of the playable cards. It is
+    // generated from the server's own rules, so the client has no copy
+    // of them to keep in sync. Without it every move is offered and the
+    // server decides.
+    let ruleTable = null;
+    
+    function loadRuleTable() {
+        fetch(document.body.dataset.rules || '/api/rules')
+            .then(response => response.ok ? response.json() : null)
+            .then(table => {
+                if (!table) return;
+                const cardIndex = new Map(table.cards.map((key, index) => [key, index]));
+                ruleTable = { masks: table.masks, cardIndex };
+                if (currentGameState) updateGameUI(currentGameState);
+            })
+            .catch(() => {});
+    }
+    
     // Initialize connection
     async function init() {
         try {
-            await multiplayer.connect();
+            const connection = await multiplayer.connect();
             setupMultiplayerEventHandlers();
             setupLobbyEventHandlers();
+            
+            // Reconnected with a stored token (page reload, server restart)
+            if (connection.success && connection.room_code) {
+                resumeGame(connection);
+            }
         } catch (error) {
             console.error('Failed to connect to server:', error);
             showError('Verbindung zum Server fehlgeschlagen');
@@ -63,6 +128,15 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Setup lobby event handlers
     function setupLobbyEventHandlers() {
+        quickMatchBtn.addEventListener('click', () => {
+            if (quickMatchBtn.dataset.searching === 'true') {
+                multiplayer.cancelMatch();
+                return;
+            }
+            const playerName = playerNameInput.value.trim() || 'Spieler';
+            multiplayer.findMatch(playerName);
+        });
+        
         createRoomBtn.addEventListener('click', async () => {
             const playerName = playerNameInput.value.trim() || 'Spieler';
             try {
@@ -90,6 +164,22 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         });
         
+        spectateRoomBtn.addEventListener('click', async () => {
+            const roomCode = roomCodeInput.value.trim().toUpperCase();
+            
+            if (roomCode.length !== 6) {
+                showError('Bitte gib einen 6-stelligen Raum-Code ein');
+                return;
+            }
+            
+            try {
+                const result = await multiplayer.spectateRoom(roomCode);
+                showSpectator(result);
+            } catch (error) {
+                showError(error.message || 'Zuschauen nicht möglich');
+            }
+        });
+        
         leaveRoomBtn.addEventListener('click', () => {
             multiplayer.leaveRoom();
             showLobby();
@@ -116,10 +206,12 @@ document.addEventListener('DOMContentLoaded', function() {
     // Setup multiplayer event handlers
     function setupMultiplayerEventHandlers() {
         multiplayer.on('room_created', (data) => {
+            resetChat();
             showWaitingRoom(data);
         });
         
         multiplayer.on('room_joined', (data) => {
+            resetChat();
             showWaitingRoom(data);
         });
         
@@ -133,20 +225,58 @@ document.addEventListener('DOMContentLoaded', function() {
         
         multiplayer.on('game_started', (data) => {
             isMultiplayer = true;
-            currentGameState = data;
+            currentGameState = window.currentGameState = data;
+            resetMessages();
             showGame();
             updateGameUI(data);
         });
         
         multiplayer.on('game_update', (data) => {
-            currentGameState = data;
+            currentGameState = window.currentGameState = data;
             updateGameUI(data);
         });
         
+        multiplayer.on('match_searching', () => {
+            quickMatchBtn.dataset.searching = 'true';
+            quickMatchBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Suche Gegner... (abbrechen)';
+        });
+        
+        multiplayer.on('match_cancelled', () => {
+            resetQuickMatchButton();
+        });
+        
+        multiplayer.on('match_found', () => {
+            resetQuickMatchButton();
+        });
+        
+        multiplayer.on('spectator_update', (data) => {
+            currentGameState = data;
+            updateSpectatorUI(data);
+        });
+        
         multiplayer.on('game_won', (data) => {
             showWinner(data);
         });
         
+        multiplayer.on('server_restarting', (data) => {
+            showInfo(data.message);
+        });
+        
+        multiplayer.on('successful_reconnect', resumeGame);
+        
+        multiplayer.on('room_closed', (data) => {
+            isMultiplayer = false;
+            currentGameState = window.currentGameState = null;
+            showLobby();
+            showInfo(data.message);
+        });
+        
+        multiplayer.on('emotes_batch', showEmotes);
+        
+        multiplayer.on('chat_message', addChatMessage);
+        
+        multiplayer.on('chat_history', showChatHistory);
+        
         multiplayer.on('move_rejected', (data) => {
             showError(data.reason);
         });
@@ -164,11 +294,28 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    function resumeGame(data) {
+        if (data.game_state) {
+            isMultiplayer = true;
+            currentGameState = window.currentGameState = data.game_state;
+            resetMessages();
+            showGame();
+            updateGameUI(data.game_state);
+        }
+        showInfo('Verbindung wiederhergestellt');
+    }
+    
+    function resetQuickMatchButton() {
+        quickMatchBtn.dataset.searching = 'false';
+        quickMatchBtn.innerHTML = '<i class="fas fa-bolt me-2"></i>Schnelles Spiel';
+    }
+    
     // UI State Management
     function showLobby() {
         lobbyScreen.classList.remove('d-none');
         waitingRoom.classList.add('d-none');
         gameScreen.classList.add('d-none');
+        chatContainer.style.display = 'none';
         roomCodeInput.value = '';
     }
     
@@ -176,6 +323,7 @@ document.addEventListener('DOMContentLoaded', function() {
         lobbyScreen.classList.add('d-none');
         waitingRoom.classList.remove('d-none');
         gameScreen.classList.add('d-none');
+        chatContainer.style.display = 'flex';
         
         displayRoomCode.textContent = data.room_code;
         updateWaitingRoom(data);
@@ -230,6 +378,60 @@ document.addEventListener('DOMContentLoaded', function() {
         gameScreen.classList.remove('d-none');
     }
     
+    function showSpectator(data) {
+        showGame();
+        // Chat is for the players of the room
+        chatContainer.style.display = 'none';
+        gameStatus.textContent = 'Zuschauer';
+        gameStatus.className = 'badge bg-info';
+        drawCardBtn.disabled = true;
+        
+        if (data.game_state) {
+            currentGameState = data.game_state;
+            resetMessages();
+            updateSpectatorUI(data.game_state);
+        } else {
+            currentPlayer.textContent = data.status === 'waiting'
+                ? 'Warte auf Spielbeginn...'
+                : 'Spielstand wird verzögert übertragen...';
+        }
+    }
+    
+    // Update game UI from the public (spectator) view, no hands are visible
+    function updateSpectatorUI(state) {
+        if (!state) return;
+        
+        const [first, second] = state.players;
+        if (first) {
+            player1Name.textContent = first.name;
+            renderOpponentHand(first.card_count, player1Hand);
+            player1CardCount.textContent = first.card_count;
+            player1Area.classList.toggle('current-player', first.id === state.current_player_id);
+        }
+        if (second) {
+            player2Name.textContent = second.name;
+            renderOpponentHand(second.card_count, player2Hand);
+            player2CardCount.textContent = second.card_count;
+            player2Area.classList.toggle('current-player', second.id === state.current_player_id);
+        }
+        
+        if (state.discard_top) {
+            renderDiscardPile(state.discard_top);
+        }
+        
+        currentPlayer.textContent = state.current_player_name + ' ist an der Reihe';
+        if (state.current_color) {
+            colorDisplay.textContent = suitNames[state.current_color];
+        }
+        
+        colorSelection.classList.add('d-none');
+        tschauBtn.classList.add('d-none');
+        seppBtn.classList.add('d-none');
+        drawCardBtn.disabled = true;
+        
+        updateMessages(state.messages, state.state_version);
+    }
+    
     // Update game UI based on server state
     function updateGameUI(state) {
         if (!state) return;
@@ -313,36 +515,101 @@ document.addEventListener('DOMContentLoaded', function() {
         }
         
         // Update messages
-        if (state.messages && state.messages.length > 0) {
-            messageLog.innerHTML = '';
-            state.messages.forEach(msg => addMessage(msg));
+        updateMessages(state.messages, state.state_version);
+    }
+    
+    // Hands are reconciled by key (suit-value for cards): an update only
+    // adds, removes and moves the nodes that changed. All DOM writes of an
+    // update happen in the next animation frame, a newer update arriving
+    // before it replaces the pending render of the same container.
+    const pendingRenders = new Map();
+    let renderFrame = null;
+    
+    function scheduleRender(container, render) {
+        pendingRenders.set(container, render);
+        if (renderFrame === null) {
+            renderFrame = requestAnimationFrame(() => {
+                renderFrame = null;
+                const renders = Array.from(pendingRenders.values());
+                pendingRenders.clear();
+                renders.forEach(render => render());
+            });
+        }
+    }
+    
+    function cardKey(card) {
+        return `${card.suit}-${card.value}`;
+    }
+    
+    // Make the children of container the nodes for keys, in that order
+    function reconcileChildren(container, keys, createNode) {
+        const existing = new Map();
+        for (const node of Array.from(container.children)) {
+            if (node.dataset.key === undefined || existing.has(node.dataset.key)) {
+                node.remove();
+            } else {
+                existing.set(node.dataset.key, node);
+            }
+        }
+        
+        const nodes = keys.map(key => {
+            let node = existing.get(key);
+            if (node) {
+                existing.delete(key);
+            } else {
+                node = createNode(key);
+                node.dataset.key = key;
+            }
+            return node;
+        });
+        existing.forEach(node => node.remove());
+        
+        // Nodes already in place are not touched
+        nodes.forEach((node, index) => {
+            const current = container.children[index];
+            if (current !== node) {
+                container.insertBefore(node, current || null);
+            }
+        });
+        return nodes;
+    }
+    
+    function setCardAngle(node, angle) {
+        if (node.dataset.angle !== String(angle)) {
+            node.dataset.angle = angle;
+            node.style.setProperty('--card-angle', angle);
         }
     }
     
     // Render player's hand
     function renderPlayerHand(cards, container, isPlayable) {
-        container.innerHTML = '';
-        cards.forEach((card, index) => {
-            const cardElement = createCardElement(card, isPlayable && currentGameState.my_turn);
-            const fanning = (index - (cards.length - 1) / 2) * 5;
-            cardElement.style.setProperty('--card-angle', fanning);
-            container.appendChild(cardElement);
+        scheduleRender(container, () => {
+            const byKey = new Map(cards.map(card => [cardKey(card), card]));
+            const nodes = reconcileChildren(container, Array.from(byKey.keys()),
+                                            key => createCardElement(byKey.get(key), isPlayable));
+            nodes.forEach((node, index) => {
+                const playable = isPlayable && canPlayCard(cards[index]);
+                node.classList.toggle('disabled', !playable);
+                setCardAngle(node, (index - (cards.length - 1) / 2) * 5);
+            });
         });
     }
     
     // Render opponent's hand (card backs)
     function renderOpponentHand(cardCount, container) {
-        container.innerHTML = '';
-        for (let i = 0; i < cardCount; i++) {
-            const cardBack = document.createElement('div');
-            cardBack.className = 'card-item card-back-jass';
-            const fanning = (i - (cardCount - 1) / 2) * 5;
-            cardBack.style.setProperty('--card-angle', fanning);
-            container.appendChild(cardBack);
-        }
+        scheduleRender(container, () => {
+            const keys = Array.from({ length: cardCount }, (_, i) => `back-${i}`);
+            const nodes = reconcileChildren(container, keys, () => {
+                const cardBack = document.createElement('div');
+                cardBack.className = 'card-item card-back-jass';
+                return cardBack;
+            });
+            nodes.forEach((node, i) => setCardAngle(node, (i - (cardCount - 1) / 2) * 5));
+        });
     }
     
-    // Create card element
+    // Create card element, an interactive one checks at event time
+    // whether it is playable (the reconciler toggles .disabled)
     function createCardElement(card, isPlayable) {
         const suitOffset = {
             'eichel': 0,
@@ -359,19 +626,34 @@ document.addEventListener('DOMContentLoaded', function() {
         const imageIndex = suitOffset[card.suit] + valueOffset[card.value];
         
         const cardElement = document.createElement('div');
-        cardElement.className = 'card-item card-real-image';
+        const atlasPosition = cardAtlas && cardAtlas.cards[`${card.suit}-${card.value}`];
+        
+        if (atlasPosition) {
+            // Percentages keep the cell aligned at any rendered card size
+            const [cellWidth, cellHeight] = cardAtlas.cell;
+            const [x, y] = atlasPosition;
+            cardElement.className = 'card-item card-atlas';
+            cardElement.style.backgroundSize =
+                `${cardAtlas.width / cellWidth * 100}% ${cardAtlas.height / cellHeight * 100}%`;
+            cardElement.style.backgroundPosition =
+                `${x / (cardAtlas.width - cellWidth) * 100}% ${y / (cardAtlas.height - cellHeight) * 100}%`;
+        } else {
+            cardElement.className = 'card-item card-real-image';
+            const cardImagePath = `/static/images/karten/Jasskarten-Deutsch-images-${imageIndex}.jpg`;
+            cardElement.style.backgroundImage = `url('${cardImagePath}')`;
+            cardElement.style.backgroundSize = 'cover';
+            cardElement.style.backgroundPosition = 'center';
+        }
         
         if (!isPlayable || !canPlayCard(card)) {
             cardElement.classList.add('disabled');
         }
         
-        const cardImagePath = `/static/images/karten/Jasskarten-Deutsch-images-${imageIndex}.jpg`;
-        cardElement.style.backgroundImage = `url('${cardImagePath}')`;
-        cardElement.style.backgroundSize = 'cover';
-        cardElement.style.backgroundPosition = 'center';
-        
-        if (isPlayable && canPlayCard(card)) {
+        if (isPlayable) {
+            const playable = () => !cardElement.classList.contains('disabled');
+            
             cardElement.addEventListener('click', () => {
+                if (!playable()) return;
                 // Play sound effect
                 if (window.soundManager) {
                     window.soundManager.playCardSound(card);
@@ -380,6 +662,7 @@ document.addEventListener('DOMContentLoaded', function() {
             });
             
             cardElement.addEventListener('mouseover', (e) => {
+                if (!playable()) return;
                 const rect = cardElement.getBoundingClientRect();
                 const x = e.clientX - rect.left;
                 const y = e.clientY - rect.top;
@@ -400,32 +683,29 @@ document.addEventListener('DOMContentLoaded', function() {
     function canPlayCard(card) {
         if (!currentGameState || !currentGameState.my_turn) return false;
         
-        // Special handling for must draw cards
-        if (currentGameState.must_draw_cards > 0) {
-            if (currentGameState.special_effect === '7' && card.value === '7') return true;
-            if (currentGameState.special_effect === 'O' && card.value === 'O' && card.suit === 'rosen') return true;
-            return false;
-        }
-        
-        // Ace rule
-        if (currentGameState.special_effect === 'A') {
-            return card.suit === currentGameState.current_color || card.value === 'A';
-        }
-        
-        // Standard rules
-        return card.suit === currentGameState.current_color || card.value === currentGameState.current_value;
+        if (!ruleTable) return true;
+        const mask = ruleTable.masks[currentGameState.rule_state];
+        const index = ruleTable.cardIndex.get(cardKey(card));
+        if (mask == null || index == null) return true;
+        return ((mask >>> index) & 1) === 1;
     }
     
-    // Render discard pile
+    // Render discard pile, only when the top card changed (keeps its rotation)
     function renderDiscardPile(topCard) {
-        discardPile.innerHTML = '';
+        const key = topCard ? cardKey(topCard) : '';
+        if (discardPile.dataset.key === key) return;
+        discardPile.dataset.key = key;
         
-        if (topCard) {
-            const cardElement = createCardElement(topCard, false);
-            const rotation = Math.random() * 10 - 5;
-            cardElement.style.transform = `rotate(${rotation}deg)`;
-            discardPile.appendChild(cardElement);
-        }
+        scheduleRender(discardPile, () => {
+            discardPile.innerHTML = '';
+            
+            if (topCard) {
+                const cardElement = createCardElement(topCard, false);
+                const rotation = Math.random() * 10 - 5;
+                cardElement.style.transform = `rotate(${rotation}deg)`;
+                discardPile.appendChild(cardElement);
+            }
+        });
     }
     
     // Game action handlers
@@ -456,6 +736,19 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
     
+    chatSendBtn.addEventListener('click', sendChat);
+    
+    chatInput.addEventListener('keydown', (event) => {
+        if (event.key === 'Enter') {
+            sendChat();
+        }
+    });
+    
+    chatToggle.addEventListener('click', () => {
+        const collapsed = chatMessages.classList.toggle('d-none');
+        chatToggle.textContent = collapsed ? '▲' : '▼';
+    });
+    
     colorButtons.forEach(button => {
         button.addEventListener('click', () => {
             if (isMultiplayer) {
@@ -470,11 +763,50 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
-    // Utility functions
-    function addMessage(message) {
-        const messageElement = document.createElement('p');
-        messageElement.textContent = message;
-        messageLog.appendChild(messageElement);
+    // Message log: the server sends its last few messages with every
+    // update, along with state_version, the number of messages the game
+    // has written so far. The last message of the window is number
+    // state_version, so the new ones are those numbered above the last one
+    // shown; repeated texts are told apart. The log keeps MAX_LOG_MESSAGES
+    // entries.
+    const MAX_LOG_MESSAGES = 50;
+    let shownVersion = 0;
+    let pendingMessages = [];
+    
+    function resetMessages() {
+        shownVersion = 0;
+        pendingMessages = [];
+        messageLog.innerHTML = '';
+    }
+    
+    function updateMessages(messages, version) {
+        if (!messages || messages.length === 0 || version === undefined) return;
+        
+        if (version < shownVersion) {
+            // Numbering started over with a new game, its messages are all new
+            shownVersion = 0;
+        }
+        const fresh = Math.min(version - shownVersion, messages.length);
+        if (fresh <= 0) return;
+        shownVersion = version;
+        
+        pendingMessages.push(...messages.slice(messages.length - fresh));
+        scheduleRender(messageLog, appendMessages);
+    }
+    
+    function appendMessages() {
+        const fragment = document.createDocumentFragment();
+        pendingMessages.forEach(message => {
+            const messageElement = document.createElement('p');
+            messageElement.textContent = message;
+            fragment.appendChild(messageElement);
+        });
+        pendingMessages = [];
+        messageLog.appendChild(fragment);
+        
+        while (messageLog.childElementCount > MAX_LOG_MESSAGES) {
+            messageLog.firstElementChild.remove();
+        }
         messageLog.scrollTop = messageLog.scrollHeight;
     }
     
@@ -508,6 +840,88 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 3000);
     }
     
+    // Chat: messages arrive one by one (a burst is split up by the client)
+    // and, after a reconnect, as the room's recent history, which replaces
+    // what the panel shows. Names and text come HTML-escaped from the
+    // server and are decoded into text nodes. The panel keeps
+    // MAX_CHAT_MESSAGES entries, as many as the server's history.
+    const MAX_CHAT_MESSAGES = 50;
+    let pendingChat = [];
+    
+    function resetChat() {
+        pendingChat = [];
+        chatMessages.innerHTML = '';
+    }
+    
+    function showChatHistory(messages) {
+        resetChat();
+        chatContainer.style.display = 'flex';
+        messages.forEach(addChatMessage);
+    }
+    
+    function addChatMessage(message) {
+        pendingChat.push(message);
+        scheduleRender(chatMessages, appendChat);
+    }
+    
+    function appendChat() {
+        const fragment = document.createDocumentFragment();
+        pendingChat.forEach(message => {
+            const element = document.createElement('div');
+            element.className = 'chat-message';
+            const sender = document.createElement('div');
+            sender.className = 'sender';
+            sender.textContent = decodeHtml(message.player_name);
+            const text = document.createElement('div');
+            text.className = 'text';
+            text.textContent = decodeHtml(message.message);
+            element.append(sender, text);
+            fragment.appendChild(element);
+        });
+        pendingChat = [];
+        chatMessages.appendChild(fragment);
+        
+        while (chatMessages.childElementCount > MAX_CHAT_MESSAGES) {
+            chatMessages.firstElementChild.remove();
+        }
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+    }
+    
+    function decodeHtml(text) {
+        // Parsed documents run no scripts and load nothing
+        return new DOMParser().parseFromString(text || '', 'text/html').documentElement.textContent;
+    }
+    
+    function sendChat() {
+        const message = chatInput.value.trim();
+        if (!message) return;
+        multiplayer.sendChat(message);
+        chatInput.value = '';
+    }
+    
+    function showEmotes(data) {
+        // One floating emote per sender and emote, a few more for a burst
+        data.emotes.forEach((entry, i) => {
+            const copies = Math.min(entry.count, 5);
+            for (let n = 0; n < copies; n++) {
+                const element = document.createElement('div');
+                element.className = 'floating-emote';
+                element.textContent = entry.emote;
+                element.title = entry.player_name;
+                element.style.left = `${20 + ((i * 17 + n * 7) % 60)}%`;
+                element.style.bottom = '20%';
+                element.style.position = 'fixed';
+                element.style.animationDelay = `${n * 0.15}s`;
+                element.style.animationFillMode = 'both';
+                if (n === 0 && entry.count > 1) {
+                    element.dataset.count = `×${entry.count}`;
+                }
+                document.body.appendChild(element);
+                element.addEventListener('animationend', () => element.remove());
+            }
+        });
+    }
+    
     function showWinner(data) {
         const winnerName = data.player_name || 'Spieler';
         const isMe = data.winner === multiplayer.playerId;
@@ -535,5 +949,7 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Initialize the application
+    loadCardAtlas();
+    loadRuleTable();
     init();
 });
\ No newline at end of file
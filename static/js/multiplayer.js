@@ -12,6 +12,7 @@ class MultiplayerClient {
         this.reconnectToken = null;
         this.reconnectAttempts = 0;
         this.maxReconnectAttempts = 5;
+        this.isSpectator = false;
     }
     
     connect() {
@@ -53,8 +54,12 @@ class MultiplayerClient {
             this.socket.on('reconnected', (data) => {
                 this.isConnected = true;
                 this.reconnectAttempts = 0;
+                this.roomCode = data.room_code;
+                this.clearReconnectToken();
                 console.log('Reconnected successfully');
                 this.trigger('successful_reconnect', data);
+                // Recent messages of the room, including the ones we missed
+                this.trigger('chat_history', data.chat || []);
                 resolve(data);
             });
             
@@ -68,6 +73,21 @@ class MultiplayerClient {
         });
     }
     
+    storeReconnectToken(data) {
+        this.reconnectToken = data.token;
+        localStorage.setItem('reconnect_token', data.token);
+        localStorage.setItem('reconnect_token_expiry', Date.now() + (data.expires_in * 1000));
+        // Automatic reconnects reuse the connect options, send the new token
+        this.socket.io.opts.query = { reconnect_token: data.token };
+    }
+    
+    clearReconnectToken() {
+        this.reconnectToken = null;
+        localStorage.removeItem('reconnect_token');
+        localStorage.removeItem('reconnect_token_expiry');
+        this.socket.io.opts.query = {};
+    }
+    
     setupEventHandlers() {
         // Connection events
         this.socket.on('disconnect', () => {
@@ -83,11 +103,17 @@ class MultiplayerClient {
         
         // Store reconnect token when disconnected
         this.socket.on('store_reconnect_token', (data) => {
-            localStorage.setItem('reconnect_token', data.token);
-            localStorage.setItem('reconnect_token_expiry', Date.now() + (data.expires_in * 1000));
+            this.storeReconnectToken(data);
             console.log('Stored reconnect token');
         });
         
+        // The server hands over the game to its next process
+        this.socket.on('server_restarting', (data) => {
+            this.storeReconnectToken(data);
+            console.log('Server restarting, stored reconnect token');
+            this.trigger('server_restarting', data);
+        });
+        
         // Handle game pause/resume
         this.socket.on('game_paused', (data) => {
             console.log('Game paused:', data);
@@ -195,9 +221,53 @@ class MultiplayerClient {
             this.trigger('chat_message', data);
         });
         
-        this.socket.on('emote_received', (data) => {
-            console.log('Emote received:', data);
-            this.trigger('emote_received', data);
+        // A burst of chat messages coalesced into one frame
+        this.socket.on('chat_batch', (data) => {
+            data.messages.forEach((message) => this.trigger('chat_message', message));
+        });
+        
+        // Emotes of the last window, counted per sender and emote
+        this.socket.on('emotes_batch', (data) => {
+            console.log('Emotes received:', data);
+            this.trigger('emotes_batch', data);
+        });
+        
+        // Quick-match events
+        this.socket.on('match_searching', (data) => {
+            console.log('Searching match:', data);
+            this.trigger('match_searching', data);
+        });
+        
+        this.socket.on('match_found', (data) => {
+            this.roomCode = data.room_code;
+            this.playerId = data.player_id;
+            console.log('Match found:', data);
+            this.trigger('match_found', data);
+        });
+        
+        this.socket.on('match_cancelled', (data) => {
+            console.log('Match search cancelled');
+            this.trigger('match_cancelled', data);
+        });
+        
+        // Spectator events
+        this.socket.on('spectating', (data) => {
+            this.roomCode = data.room_code;
+            this.isSpectator = true;
+            console.log('Spectating room:', data);
+            this.trigger('spectating', data);
+        });
+        
+        this.socket.on('spectator_update', (data) => {
+            this.gameState = data;
+            this.trigger('spectator_update', data);
+        });
+        
+        this.socket.on('room_closed', (data) => {
+            console.log('Room closed:', data);
+            this.roomCode = null;
+            this.isSpectator = false;
+            this.trigger('room_closed', data);
         });
         
         // Error handling
@@ -263,6 +333,51 @@ class MultiplayerClient {
         this.roomCode = null;
     }
     
+    findMatch(playerName, difficulty = 'medium') {
+        this.playerName = playerName;
+        this.socket.emit('find_match', {
+            player_name: playerName,
+            difficulty: difficulty
+        });
+    }
+    
+    cancelMatch() {
+        this.socket.emit('cancel_match', {});
+    }
+    
+    spectateRoom(roomCode) {
+        return new Promise((resolve, reject) => {
+            this.socket.emit('spectate_room', { room_code: roomCode });
+            
+            const successHandler = (data) => {
+                this.socket.off('spectating', successHandler);
+                this.socket.off('error', errorHandler);
+                resolve(data);
+            };
+            
+            const errorHandler = (data) => {
+                this.socket.off('spectating', successHandler);
+                this.socket.off('error', errorHandler);
+                reject(new Error(data.message));
+            };
+            
+            this.socket.on('spectating', successHandler);
+            this.socket.on('error', errorHandler);
+            
+            setTimeout(() => {
+                this.socket.off('spectating', successHandler);
+                this.socket.off('error', errorHandler);
+                reject(new Error('Spectate timeout'));
+            }, 5000);
+        });
+    }
+    
+    stopSpectating() {
+        this.socket.emit('stop_spectating', {});
+        this.roomCode = null;
+        this.isSpectator = false;
+    }
+    
     // Game actions
     startGame() {
         this.socket.emit('start_game', {});
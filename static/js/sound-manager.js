@@ -325,7 +325,7 @@ class SoundManager {
                 this.play('chatMessage');
             });
             
-            window.multiplayer.on('emote_received', () => {
+            window.multiplayer.on('emotes_batch', () => {
                 this.play('emoteReceived');
             });
             
@@ -0,0 +1,120 @@
+"""
+Static asset pipeline for Tschau-Sepp
+build_assets.py copies static/ into static/dist under content-hashed names,
+with prebuilt .br/.gz variants next to the text files, and writes a
+manifest. With a manifest the templates link the hashed files, which are
+served from /assets/ with an immutable Cache-Control header and the best
+precompressed variant the client accepts, so repeat visits make no
+revalidation requests and nothing is compressed at request time.
+Without a manifest, or with DEBUG=True, the plain /static/ URLs are used.
+"""
+
+import json
+import mimetypes
+import os
+from flask import abort, request, send_from_directory, url_for
+from log_config import get_logger
+
+logger = get_logger('assets')
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+ASSET_URL_PREFIX = '/assets/'
+
+# Load order of the stylesheets and scripts in templates/index.html
+CSS_FILES = [
+    'css/style.css',
+    'css/modern-ui.css',
+    'css/label-styles.css',
+    'css/card-indicator.css',
+    'css/multiplayer-features.css',
+    'css/mobile-optimized.css'
+]
+JS_FILES = [
+    'js/multiplayer.js',
+    'js/touch-handler.js',
+    'js/error-recovery.js',
+    'js/sound-manager.js',
+    'js/game-multiplayer.js'
+]
+
+# Preferred encoding first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+mimetypes.add_type('image/avif', '.avif')
+mimetypes.add_type('image/webp', '.webp')
+
+_manifest = {'files': {}, 'bundles': {}, 'compressed': {}}
+_served = set()
+
+def load_manifest(path=MANIFEST_PATH):
+    """Load the build manifest, returns False if there is none"""
+    global _manifest, _served
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError) as e:
+        logger.warning('Could not read asset manifest %s: %s', path, e)
+        return False
+
+    _manifest = {
+        'files': manifest.get('files', {}),
+        'bundles': manifest.get('bundles', {}),
+        'compressed': manifest.get('compressed', {})
+    }
+    _served = set(_manifest['files'].values()) | set(_manifest['bundles'].values())
+    logger.info('Asset manifest loaded: %d files, bundles: %s',
+                len(_manifest['files']), ', '.join(_manifest['bundles']) or 'none')
+    return True
+
+def asset_url(path):
+    """URL of a static file, the hashed one if it was built"""
+    hashed = _manifest['files'].get(path)
+    if hashed:
+        return ASSET_URL_PREFIX + hashed
+    return url_for('static', filename=path)
+
+def asset_urls(kind):
+    """URLs to include for 'css' or 'js', a single bundle if one was built"""
+    bundle = _manifest['bundles'].get(kind)
+    if bundle:
+        return [ASSET_URL_PREFIX + bundle]
+    return [asset_url(path) for path in (CSS_FILES if kind == 'css' else JS_FILES)]
+
+def serve_asset(filename):
+    if filename not in _served:
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    available = _manifest['compressed'].get(filename, ())
+    accepted = request.accept_encodings
+
+    response = None
+    for encoding, suffix in ENCODINGS:
+        if encoding in available and accepted[encoding] > 0:
+            response = send_from_directory(DIST_DIR, filename + suffix, mimetype=mimetype,
+                                           max_age=IMMUTABLE_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+            break
+    if response is None:
+        response = send_from_directory(DIST_DIR, filename, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+
+    if available:
+        response.vary.add('Accept-Encoding')
+    # The name changes with the content, so the file can be cached forever
+    response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return response
+
+def init_assets(app):
+    """Register the template helpers and the /assets/ route"""
+    if os.environ.get('DEBUG', 'False').lower() != 'true':
+        load_manifest()
+
+    app.jinja_env.globals.update(asset_url=asset_url, asset_urls=asset_urls)
+    app.add_url_rule(ASSET_URL_PREFIX + '<path:filename>', 'assets', serve_asset)
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+admin_profile: a wrong token, ASCII or not, is answered with an error
+and never reaches the profiler
+"""
+
+import os
+import tempfile
+import warnings
+
+os.environ.setdefault('RESULTS_DB_PATH', os.path.join(tempfile.mkdtemp(), 'results.db'))
+warnings.filterwarnings('ignore', module='eventlet')
+
+import pytest
+import game_server as gs
+
+def received(client, event):
+    return [message['args'][0] for message in client.get_received() if message['name'] == event]
+
+@pytest.mark.parametrize('token', ['falsch', 'geheim-ä', '🔑' * 4, ''])
+def test_wrong_token_is_refused(monkeypatch, token):
+    monkeypatch.setattr(gs, 'ADMIN_TOKEN', 'geheim')
+    client = gs.socketio.test_client(gs.app)
+    client.emit('admin_profile', {'token': token, 'action': 'status'})
+    events = client.get_received()
+    assert [m['args'][0] for m in events if m['name'] == 'error'] == [{'message': 'Nicht berechtigt'}]
+    assert not [m for m in events if m['name'] == 'profile_status']
+    client.disconnect()
+
+def test_right_token_gets_status(monkeypatch):
+    monkeypatch.setattr(gs, 'ADMIN_TOKEN', 'geheim-ä')
+    client = gs.socketio.test_client(gs.app)
+    client.emit('admin_profile', {'token': 'geheim-ä', 'action': 'status'})
+    assert received(client, 'profile_status')
+    client.disconnect()
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Chat history: a player who reconnects gets the room's recent messages,
+also the ones sent while they were away, along with 'reconnected'. The
+history is part of the restart snapshot
+"""
+
+import json
+import os
+import tempfile
+import warnings
+
+os.environ.setdefault('RESULTS_DB_PATH', os.path.join(tempfile.mkdtemp(), 'results.db'))
+warnings.filterwarnings('ignore', module='eventlet')
+
+import game_server as gs
+from chat import CHAT_BATCH_WINDOW
+
+def received(client, event):
+    return [message['args'][0] for message in client.get_received() if message['name'] == event]
+
+def test_reconnect_replays_chat_history():
+    app, sio = gs.app, gs.socketio
+    a = sio.test_client(app)
+    b = sio.test_client(app)
+    a.emit('create_room', {'player_name': 'Anna'})
+    room_code = received(a, 'room_created')[0]['room_code']
+    b.emit('join_room', {'room_code': room_code, 'player_name': 'Tom'})
+    a.emit('start_game', {})
+    sio.sleep(0.01)
+    room = gs.game_rooms[room_code]
+    assert room.status == 'playing'
+
+    a.emit('send_chat', {'message': 'hallo'})
+    b.emit('send_chat', {'message': '<b>gg</b>'})
+    a.emit('send_chat', {'message': 'hallo'})
+    sio.sleep(CHAT_BATCH_WINDOW * 2)
+
+    tom = room.players[1]
+    b.disconnect()
+    sio.sleep(0.01)
+    a.emit('send_chat', {'message': 'bist du noch da?'})
+    token = gs.disconnected_players.by_player[tom.player_id]
+
+    c = sio.test_client(app, query_string=f'reconnect_token={token}')
+    reconnected = received(c, 'reconnected')
+    room.turn_timer.cancel()
+
+    assert reconnected and reconnected[0]['success']
+    assert [(m['player_name'], m['message']) for m in reconnected[0]['chat']] == [
+        ('Anna', 'hallo'),
+        ('Tom', '&lt;b&gt;gg&lt;/b&gt;'),
+        ('Anna', 'hallo'),
+        ('Anna', 'bist du noch da?'),
+    ]
+
+def test_chat_history_survives_the_restart_handoff():
+    room = gs.GameRoom('CHAT01', None)
+    room.add_player(gs.Player('sid-anna', 'Anna'))
+    for text in ('hallo', 'gg'):
+        room.chat.append({'player_name': 'Anna', 'message': text, 'timestamp': 1.0})
+
+    data = json.loads(json.dumps(room.to_snapshot()))
+    restored = gs.GameRoom.from_snapshot(data)
+    assert list(restored.chat) == list(room.chat)
+    assert restored.chat.maxlen == room.chat.maxlen
+
+    del data['chat']
+    assert list(gs.GameRoom.from_snapshot(data).chat) == []
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""
+Quick match: creating or joining a room ends the player's search, so the
+matcher cannot seat them in a second room
+"""
+
+import os
+import tempfile
+import warnings
+
+os.environ.setdefault('RESULTS_DB_PATH', os.path.join(tempfile.mkdtemp(), 'results.db'))
+warnings.filterwarnings('ignore', module='eventlet')
+
+import game_server as gs
+
+def names(client):
+    return [message['name'] for message in client.get_received()]
+
+def searching(client):
+    client.emit('find_match', {'player_name': 'Anna'})
+    sid = gs.socketio.server.manager.sid_from_eio_sid(client.eio_sid, '/')
+    assert sid in gs.matchmaking_queue
+    assert 'match_searching' in names(client)
+    return sid
+
+def test_create_room_cancels_the_search():
+    anna = gs.socketio.test_client(gs.app)
+    sid = searching(anna)
+    anna.emit('create_room', {'player_name': 'Anna'})
+    assert sid not in gs.matchmaking_queue
+    assert names(anna)[:2] == ['match_cancelled', 'room_created']
+    anna.emit('leave_room', {})
+    anna.disconnect()
+
+def test_join_room_cancels_the_search():
+    tom = gs.socketio.test_client(gs.app)
+    tom.emit('create_room', {'player_name': 'Tom'})
+    room_code = [m['args'][0] for m in tom.get_received() if m['name'] == 'room_created'][0]['room_code']
+
+    anna = gs.socketio.test_client(gs.app)
+    sid = searching(anna)
+    anna.emit('join_room', {'room_code': room_code, 'player_name': 'Anna'})
+    assert sid not in gs.matchmaking_queue
+    assert names(anna)[0] == 'match_cancelled'
+    for client in (anna, tom):
+        client.emit('leave_room', {})
+        client.disconnect()
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Payload validation: anything a client can send ends as a parsed payload
+or a PayloadError, never as another exception in the handler
+"""
+
+import pytest
+from payloads import VALIDATORS, PayloadError, CARD_TOKENS
+
+def test_card_dict_is_interned():
+    card = VALIDATORS['play_card']({'card': {'suit': CARD_TOKENS[3]['suit'], 'value': CARD_TOKENS[3]['value']}})['card']
+    assert card is CARD_TOKENS[3]
+
+def test_card_index_is_interned():
+    assert VALIDATORS['play_card']({'card': 5})['card'] is CARD_TOKENS[5]
+
+@pytest.mark.parametrize('card', [
+    {'suit': [], 'value': '6'},
+    {'suit': 'herz', 'value': {}},
+    {'suit': {'a': 1}, 'value': ['6']},
+    {'suit': 1, 'value': 6},
+    {},
+    32,
+    -1,
+    True,
+    'herz 6',
+])
+def test_unhashable_or_unknown_card_is_rejected(card):
+    with pytest.raises(PayloadError) as e:
+        VALIDATORS['play_card']({'card': card})
+    assert e.value.reason == 'card'
\ No newline at end of file
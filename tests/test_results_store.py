@@ -0,0 +1,21 @@
+"""
+Results store: games with a human are recorded, bot-only games are not
+"""
+
+import os
+import time
+from results_store import ResultsStore
+
+def result(room_code, *players):
+    return {'room_code': room_code, 'started_at': time.time() - 60, 'finished_at': time.time(),
+            'players': list(players)}
+
+def test_only_games_with_a_human_are_kept(tmp_path):
+    store = ResultsStore(path=os.path.join(tmp_path, 'results.db'), flush_interval=0.01)
+    store.record(result('BOTS01', ('Bot-Max', True, True, 0), ('Bot-Lisa', True, False, 3)))
+    store.record(result('GAME01', ('Anna', False, True, 0), ('Bot-Max', True, False, 2)))
+    store.close()
+
+    board = store.leaderboard(include_bots=True)
+    assert {(row['name'], row['games'], row['wins']) for row in board} == {('Anna', 1, 1), ('Bot-Max', 1, 0)}
+    assert store.player_stats('Bot-Lisa') is None
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+sanitize_text: script blocks, script URLs and inline handlers are gone,
+also where removing one joins its neighbours into another
+"""
+
+import html
+import random
+from payloads import sanitize_text, _UNSAFE
+
+def test_plain_text_is_kept():
+    assert sanitize_text('gg, gut gespielt') == 'gg, gut gespielt'
+
+def test_html_is_escaped():
+    assert sanitize_text('<b>Anna</b> & "Tom"') == '&lt;b&gt;Anna&lt;/b&gt; &amp; &quot;Tom&quot;'
+
+def test_whitespace_collapses():
+    assert sanitize_text('  hallo \n\t  du  ') == 'hallo du'
+
+def test_text_is_cut_to_max_length():
+    assert sanitize_text('a' * 50, max_length=30) == 'a' * 30
+
+def test_empty_text():
+    assert sanitize_text('') == ''
+    assert sanitize_text(None) == ''
+
+def test_handler_reformed_around_script_url():
+    assert sanitize_text('oN' + 'javascript:' + 'on =alert(1)') == 'alert(1)'
+
+def test_script_url_reformed_around_script_url():
+    assert sanitize_text('javajavascript:script:alert(1)') == 'alert(1)'
+
+def test_handler_reformed_around_handler():
+    assert sanitize_text('o' + 'onx=' + 'nclick=alert(1)') == 'alert(1)'
+
+def test_script_block_is_removed():
+    assert sanitize_text('hi <script>alert(1)</script> du') == 'hi du'
+
+def test_script_block_across_lines_and_case():
+    assert sanitize_text('hi <SCRIPT type="x">\nalert(1)\n</Script> du') == 'hi du'
+
+def test_script_block_reformed_around_script_block():
+    assert sanitize_text('<scr<script></script>ipt>alert(1)</script>') == ''
+
+def test_no_unsafe_pattern_survives():
+    fragments = ['on', 'oN', 'click', ' ', '=', 'java', 'script', ':', 'javascript:',
+                 '<script>', '</script>', '<scr', 'ipt>', 'x', '"', '<', '>']
+    rng = random.Random(7)
+    for _ in range(2000):
+        text = ''.join(rng.choice(fragments) for _ in range(rng.randint(1, 12)))
+        assert not _UNSAFE.search(html.unescape(sanitize_text(text))), text
\ No newline at end of file
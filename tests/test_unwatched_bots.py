@@ -0,0 +1,62 @@
+"""
+Unwatched bot rooms: a batch of bot moves runs on a copy of the game, the
+room's game only changes when the batch is adopted in the mailbox command
+"""
+
+import os
+import tempfile
+import warnings
+
+os.environ.setdefault('RESULTS_DB_PATH', os.path.join(tempfile.mkdtemp(), 'results.db'))
+warnings.filterwarnings('ignore', module='eventlet')
+
+import game_server as gs
+import simple_ai_handler
+from simple_ai_handler import play_unwatched, unwatched_played
+from card_tracker import attach_trackers
+from game_logic import GameEngine
+
+def bot_room(room_code):
+    room = gs.GameRoom(room_code, None)
+    room.add_player(gs.Player('bot-a', 'Max', is_ai=True, ai_difficulty='hard'))
+    room.add_player(gs.Player('bot-b', 'Lisa', is_ai=True, ai_difficulty='expert'))
+    room.game = room.game_state = GameEngine(room.players)
+    room.game.start_game()
+    attach_trackers(room.game)
+    room.status = 'playing'
+    room.turn_number = 1
+    return room
+
+def state(room):
+    return room.game_state.to_snapshot(), [player.to_snapshot()['hand'] for player in room.players]
+
+def test_batch_leaves_the_room_game_alone_until_adopted(monkeypatch):
+    monkeypatch.setattr(simple_ai_handler, 'UNWATCHED_BATCH', 6)
+    room = bot_room('UNWAT1')
+    live = room.game_state
+    before = state(room)
+
+    outcome = play_unwatched(room, room.code, gs.socketio, 1, None)
+    moves, winner, more, game, played = outcome
+    assert moves == 6 and winner is None and more
+    assert game is live and played is not live
+    assert state(room) == before
+
+    moved = []
+    unwatched_played(room, room.code, gs.socketio, 1, lambda *args: moved.append(args), outcome)
+    assert room.game_state is played and room.game is played
+    assert played.players is room.players
+    assert state(room) != before
+    assert all(observer.game is played for observer in played.observers)
+    assert [player.ai.tracker for player in room.players] == played.observers
+    assert moved == [(room, room.code)]
+
+def test_batch_of_a_replaced_game_is_dropped(monkeypatch):
+    monkeypatch.setattr(simple_ai_handler, 'UNWATCHED_BATCH', 4)
+    room = bot_room('UNWAT2')
+    outcome = play_unwatched(room, room.code, gs.socketio, 1, None)
+
+    room.game = room.game_state = GameEngine(room.players)
+    replaced = state(room)
+    unwatched_played(room, room.code, gs.socketio, 1, lambda *args: None, outcome)
+    assert state(room) == replaced
\ No newline at end of file
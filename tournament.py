@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Bot tournament runner for Tschau-Sepp
+Pits AIPlayer configurations against each other in round-robin or Swiss
+tournaments on the headless engine, spread over a process pool. Results
+are streamed to CSV (or Parquet if pyarrow is installed) and summarized
+as Elo ratings with bootstrap confidence intervals.
+
+Example:
+    python tournament.py --bots easy medium hard --games 2000 --out results.csv
+"""
+
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from headless import play_game, MAX_TURNS
+
+RESULT_FIELDS = ['round', 'game', 'seed', 'first', 'second', 'winner', 'turns',
+                 'first_cards_left', 'second_cards_left']
+
+# Games per work unit sent to a worker process
+CHUNK_SIZE = 250
+
+def play_chunk(round_no, bot_a, bot_b, first_game, count, base_seed, max_turns):
+    """Play a chunk of games between two bots, alternating who starts"""
+    rows = []
+    for game_no in range(first_game, first_game + count):
+        seed = base_seed + game_no
+        # Alternate seats so neither bot profits from always starting
+        first, second = (bot_a, bot_b) if game_no % 2 == 0 else (bot_b, bot_a)
+        result = play_game([first, second], seed=seed, max_turns=max_turns)
+
+        winner = None
+        if result['winner'] is not None:
+            winner = (first, second)[result['winner']]
+
+        rows.append({
+            'round': round_no,
+            'game': game_no,
+            'seed': seed,
+            'first': first,
+            'second': second,
+            'winner': winner or '',
+            'turns': result['turns'],
+            'first_cards_left': result['cards_left'][0],
+            'second_cards_left': result['cards_left'][1]
+        })
+    return rows
+
+class ResultWriter:
+    """Streams result rows to CSV, or to Parquet row groups if requested"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self._file = None
+        self._writer = None
+
+        if self.parquet:
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                sys.exit('Parquet output requires pyarrow (pip install pyarrow)')
+            self._pa = pyarrow
+            self._pq = pyarrow.parquet
+        else:
+            self._file = open(path, 'w', newline='')
+            self._writer = csv.DictWriter(self._file, fieldnames=RESULT_FIELDS)
+            self._writer.writeheader()
+
+    def write(self, rows):
+        if not rows:
+            return
+        if self.parquet:
+            table = self._pa.Table.from_pylist(rows)
+            if self._writer is None:
+                self._writer = self._pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            self._writer.writerows(rows)
+            self._file.flush()
+
+    def close(self):
+        if self.parquet:
+            if self._writer is not None:
+                self._writer.close()
+        else:
+            self._file.close()
+
+class Standings:
+    """Pairwise results: wins[a][b] counts games a won against b, draws are halves"""
+
+    def __init__(self, bots):
+        self.bots = list(bots)
+        self.wins = {a: {b: 0.0 for b in bots} for a in bots}
+        self.games = {a: {b: 0 for b in bots} for a in bots}
+        self.score = {a: 0.0 for a in bots}
+
+    def add(self, row):
+        a, b, winner = row['first'], row['second'], row['winner']
+        self.games[a][b] += 1
+        self.games[b][a] += 1
+        if winner:
+            loser = b if winner == a else a
+            self.wins[winner][loser] += 1
+            self.score[winner] += 1
+        else:
+            self.wins[a][b] += 0.5
+            self.wins[b][a] += 0.5
+            self.score[a] += 0.5
+            self.score[b] += 0.5
+
+    def played(self, a, b):
+        return self.games[a][b] > 0
+
+def fit_elo(bots, wins, games, iterations=200):
+    """
+    Bradley-Terry maximum likelihood fit (MM algorithm), returned on the Elo
+    scale with the mean rating anchored at 1500.
+    """
+    strength = {bot: 1.0 for bot in bots}
+    for _ in range(iterations):
+        updated = {}
+        for a in bots:
+            total_wins = sum(wins[a][b] for b in bots if b != a)
+            denom = sum(games[a][b] / (strength[a] + strength[b])
+                        for b in bots if b != a and games[a][b])
+            # Prior of one drawn game against a reference bot keeps ratings finite
+            updated[a] = (total_wins + 0.5) / (denom + 1.0 / (strength[a] + 1.0))
+        strength = updated
+
+    ratings = {bot: 400 * math.log10(s) for bot, s in strength.items()}
+    mean = sum(ratings.values()) / len(ratings)
+    return {bot: 1500 + r - mean for bot, r in ratings.items()}
+
+def bootstrap_elo(standings, samples=200, seed=0):
+    """95% confidence intervals by resampling the games of every pairing"""
+    rng = random.Random(seed)
+    bots = standings.bots
+    estimates = {bot: [] for bot in bots}
+
+    for _ in range(samples):
+        wins = {a: {b: 0.0 for b in bots} for a in bots}
+        for i, a in enumerate(bots):
+            for b in bots[i + 1:]:
+                n = standings.games[a][b]
+                if not n:
+                    continue
+                p_a = standings.wins[a][b] / n
+                won = sum(1 for _ in range(n) if rng.random() < p_a)
+                wins[a][b] = won
+                wins[b][a] = n - won
+        for bot, rating in fit_elo(bots, wins, standings.games, iterations=50).items():
+            estimates[bot].append(rating)
+
+    intervals = {}
+    for bot, values in estimates.items():
+        values.sort()
+        intervals[bot] = (values[int(0.025 * len(values))], values[int(0.975 * len(values)) - 1])
+    return intervals
+
+def round_robin_pairings(bots):
+    return [(a, b) for i, a in enumerate(bots) for b in bots[i + 1:]]
+
+def swiss_pairings(bots, standings):
+    """Pair bots with similar scores, avoiding rematches where possible"""
+    ranked = sorted(bots, key=lambda bot: standings.score[bot], reverse=True)
+    pairings = []
+    while len(ranked) > 1:
+        a = ranked.pop(0)
+        opponent = next((b for b in ranked if not standings.played(a, b)), ranked[0])
+        ranked.remove(opponent)
+        pairings.append((a, opponent))
+    # With an odd field the lowest ranked bot gets a bye
+    return pairings
+
+def run_tournament(args):
+    bots = args.bots
+    standings = Standings(bots)
+    writer = ResultWriter(args.out)
+    rounds = 1 if args.format == 'round-robin' else args.rounds
+    started = time.time()
+    total = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for round_no in range(1, rounds + 1):
+            if args.format == 'round-robin':
+                pairings = round_robin_pairings(bots)
+            else:
+                pairings = swiss_pairings(bots, standings)
+
+            futures = []
+            for pairing_no, (a, b) in enumerate(pairings):
+                base_seed = args.seed + (round_no * 1000 + pairing_no) * 1_000_000
+                for first_game in range(0, args.games, CHUNK_SIZE):
+                    count = min(CHUNK_SIZE, args.games - first_game)
+                    futures.append(pool.submit(play_chunk, round_no, a, b, first_game,
+                                               count, base_seed, args.max_turns))
+
+            for future in as_completed(futures):
+                rows = future.result()
+                writer.write(rows)
+                for row in rows:
+                    standings.add(row)
+                total += len(rows)
+
+            print(f"Runde {round_no}/{rounds}: {len(pairings)} Paarungen, {total} Spiele gesamt")
+
+    writer.close()
+    elapsed = time.time() - started
+    print(f"\n{total} Spiele in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} Spiele/s) -> {args.out}\n")
+    return standings
+
+def print_report(standings, samples):
+    ratings = fit_elo(standings.bots, standings.wins, standings.games)
+    intervals = bootstrap_elo(standings, samples=samples)
+
+    print(f"{'Bot':<12} {'Elo':>6}   {'95% CI':<15} {'Score':>9}")
+    for bot in sorted(ratings, key=ratings.get, reverse=True):
+        low, high = intervals[bot]
+        games = sum(standings.games[bot].values())
+        print(f"{bot:<12} {ratings[bot]:6.0f}   [{low:5.0f}, {high:5.0f}]  "
+              f"{standings.score[bot]:5.0f}/{games}")
+
+    print("\nPaarungen (Siegquote Zeile gegen Spalte):")
+    print(' ' * 12 + ''.join(f"{b:>10}" for b in standings.bots))
+    for a in standings.bots:
+        cells = []
+        for b in standings.bots:
+            n = standings.games[a][b]
+            cells.append(f"{standings.wins[a][b] / n:10.1%}" if n and a != b else f"{'-':>10}")
+        print(f"{a:<12}" + ''.join(cells))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Tschau-Sepp Bot-Turnier')
+    parser.add_argument('--bots', nargs='+', default=['easy', 'medium', 'hard'],
+                        help='AIPlayer difficulties to enter (default: easy medium hard)')
+    parser.add_argument('--format', choices=['round-robin', 'swiss'], default='round-robin')
+    parser.add_argument('--games', type=int, default=1000,
+                        help='games per pairing and round (default: 1000)')
+    parser.add_argument('--rounds', type=int, default=3, help='rounds for Swiss format (default: 3)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=0, help='base random seed')
+    parser.add_argument('--max-turns', type=int, default=MAX_TURNS,
+                        help='turn limit per game, counted as a draw')
+    parser.add_argument('--bootstrap', type=int, default=200,
+                        help='bootstrap samples for confidence intervals')
+    parser.add_argument('--out', default='tournament_results.csv',
+                        help='output file, .csv or .parquet')
+    args = parser.parse_args(argv)
+
+    if len(set(args.bots)) != len(args.bots) or len(args.bots) < 2:
+        parser.error('--bots needs at least two distinct entries')
+    return args
+
+if __name__ == '__main__':
+    args = parse_args()
+    standings = run_tournament(args)
+    print_report(standings, args.bootstrap)
\ No newline at end of file
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Policy model trainer for Tschau-Sepp
+Fits the learned bot's linear policy (policy_model.py) with REINFORCE on
+self-play games against a fixed opponent on the headless engine, NumPy
+only. Every iteration plays --batch games with the current weights,
+spread over a process pool. The learning seat samples its options from
+a softmax over the model's scores. Each decision's log-probability
+gradient is weighted by the game's outcome (+1 win, -1 loss) minus a
+running baseline, and Adam updates the weights. The weights are written
+as .npy after every iteration. The bot itself always takes the best
+option.
+
+Example:
+    python train_model.py --iterations 200 --batch 2000 --out policy_model.npy
+    python tournament.py --bots learned hard --games 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ai_player import AIPlayer
+from card_tracker import attach_trackers
+from game_logic import GameEngine
+from headless import HeadlessPlayer, play_ai_turn, MAX_TURNS
+from policy_model import FEATURES, POLICY_MODEL_PATH, option_features
+
+try:
+    import numpy as np
+except ImportError:
+    sys.exit('Training the policy model requires NumPy (pip install numpy)')
+
+# Games per work unit sent to a worker process
+CHUNK_SIZE = 250
+
+class SamplingAI(AIPlayer):
+    """Learned bot that samples its options and keeps the score gradients"""
+
+    def __init__(self, weights, name=None):
+        super().__init__(difficulty='learned', name=name)
+        self.weights = weights
+        self.gradient = np.zeros(len(FEATURES))
+
+    def choose_card(self, hand, current_color, current_value, must_draw_cards, special_effect=None,
+                    opponent_cards=None, deck_size=None):
+        playable = self._get_playable_cards(hand, current_color, current_value, must_draw_cards, special_effect)
+        if not playable:
+            return None
+        rows, options = option_features(hand, playable, current_color, must_draw_cards, special_effect,
+                                        opponent_cards, deck_size, self._follow_chances())
+        matrix = np.asarray(rows)
+        scores = matrix @ self.weights
+        probabilities = np.exp(scores - scores.max())
+        probabilities /= probabilities.sum()
+        choice = random.choices(range(len(options)), weights=probabilities)[0]
+        # d log softmax(choice) / d weights
+        self.gradient += matrix[choice] - probabilities @ matrix
+        return options[choice]
+
+def play_chunk(weights, baseline, opponent, first_game, count, base_seed, max_turns):
+    """Play a chunk of games, returns the summed outcome-weighted gradient, the outcome sum and the games"""
+    weighted = np.zeros(len(FEATURES))
+    outcomes = 0.0
+    for game_no in range(first_game, first_game + count):
+        random.seed(base_seed + game_no)
+        learner = HeadlessPlayer('learner', name='learner')
+        learner.ai = SamplingAI(weights, name='learner')
+        other = HeadlessPlayer('opponent', opponent)
+        players = [learner, other] if game_no % 2 == 0 else [other, learner]
+        game = GameEngine(players)
+        game.start_game()
+        attach_trackers(game)
+
+        turns = 0
+        while game.winner is None and turns < max_turns:
+            play_ai_turn(game, game.get_current_player())
+            turns += 1
+
+        if game.winner is None:
+            continue
+        outcome = 1.0 if game.winner == learner.id else -1.0
+        weighted += (outcome - baseline) * learner.ai.gradient
+        outcomes += outcome
+    return weighted, outcomes, count
+
+def train(args):
+    weights = np.zeros(len(FEATURES))
+    if args.resume and os.path.exists(args.out):
+        weights = np.load(args.out).astype(np.float64)
+    moment = np.zeros_like(weights)
+    velocity = np.zeros_like(weights)
+    baseline = 0.0  # Running mean outcome, lowers the variance of the gradient
+    started = time.time()
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for iteration in range(1, args.iterations + 1):
+            base_seed = args.seed + iteration * 10_000_000
+            futures = [pool.submit(play_chunk, weights, baseline, args.opponent, first_game,
+                                   min(CHUNK_SIZE, args.batch - first_game), base_seed, args.max_turns)
+                       for first_game in range(0, args.batch, CHUNK_SIZE)]
+            gradient = np.zeros_like(weights)
+            outcomes = 0.0
+            games = 0
+            for future in futures:
+                weighted, outcome_sum, count = future.result()
+                gradient += weighted
+                outcomes += outcome_sum
+                games += count
+            gradient /= games
+            baseline = 0.8 * baseline + 0.2 * outcomes / games
+
+            # Adam, ascending the expected outcome
+            moment = 0.9 * moment + 0.1 * gradient
+            velocity = 0.999 * velocity + 0.001 * gradient ** 2
+            step = moment / (1 - 0.9 ** iteration) / (np.sqrt(velocity / (1 - 0.999 ** iteration)) + 1e-8)
+            weights += args.learning_rate * step
+            np.save(args.out, weights.astype(np.float32))
+
+            win_rate = (outcomes / games + 1) / 2
+            print(f"Iteration {iteration}/{args.iterations}: Siegquote {win_rate:.1%} "
+                  f"gegen {args.opponent} ({time.time() - started:.0f}s)")
+
+    print('\nGewichte -> ' + args.out)
+    for name, weight in sorted(zip(FEATURES, weights), key=lambda item: -abs(item[1])):
+        print(f"  {name:<20} {weight:+.3f}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Tschau-Sepp Policy-Modell trainieren')
+    parser.add_argument('--iterations', type=int, default=200, help='gradient steps (default: 200)')
+    parser.add_argument('--batch', type=int, default=2000, help='games per step (default: 2000)')
+    parser.add_argument('--opponent', default='hard', choices=['easy', 'medium', 'hard', 'expert'],
+                        help='AIPlayer difficulty of the opponent (default: hard)')
+    parser.add_argument('--learning-rate', type=float, default=0.05, help='Adam step size (default: 0.05)')
+    parser.add_argument('--resume', action='store_true', help='start from the weights in --out')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=0, help='base random seed')
+    parser.add_argument('--max-turns', type=int, default=MAX_TURNS, help='turn limit per game')
+    parser.add_argument('--out', default=POLICY_MODEL_PATH, help='weights file (default: POLICY_MODEL_PATH)')
+    return parser.parse_args(argv)
+
+if __name__ == '__main__':
+    train(parse_args())
\ No newline at end of file
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Policy table trainer for Tschau-Sepp
+Plays self-play batches on the headless engine against a fixed opponent,
+spread over a process pool. The learning seat mostly plays like the hard
+bot but tries a random move kind with probability --explore. Every
+(state_key, move kind) it chose is credited with the outcome of the game.
+Per state the move kind with the best win rate (its lower confidence
+bound), over at least --min-visits tries, is written to the policy table
+the expert bot reads (policy_table.py).
+
+Example:
+    python train_policy.py --games 400000 --out policy_table.bin
+    python tournament.py --bots expert hard --games 5000
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ai_player import AIPlayer
+from game_logic import GameEngine
+from headless import HeadlessPlayer, play_ai_turn, MAX_TURNS
+from policy_table import ACTIONS, POLICY_TABLE_PATH, card_kind, pick_card, state_key, write_table
+
+# Games per work unit sent to a worker process
+CHUNK_SIZE = 2000
+
+class ExploringAI(AIPlayer):
+    """Hard bot that sometimes tries another move kind and remembers what it chose"""
+
+    def __init__(self, explore, name=None):
+        super().__init__(difficulty='hard', name=name)
+        self.explore = explore
+        self.choices = []
+
+    def choose_card(self, hand, current_color, current_value, must_draw_cards, special_effect=None,
+                    opponent_cards=None, deck_size=None):
+        playable = self._get_playable_cards(hand, current_color, current_value, must_draw_cards, special_effect)
+        if not playable:
+            return None
+
+        if random.random() < self.explore:
+            kinds = sorted({card_kind(card) for card in playable}) + ['draw']
+            action = random.choice(kinds)
+            card = pick_card(action, playable, hand)
+        else:
+            card = self._hard_strategy(playable, hand, current_color)
+            action = card_kind(card)
+
+        key = state_key(hand, playable, current_color, must_draw_cards, special_effect,
+                        opponent_cards, deck_size)
+        self.choices.append((key, action))
+        return card
+
+def play_chunk(opponent, first_game, count, base_seed, explore, max_turns):
+    """Play a chunk of training games, returns {state_key: {action: [tries, wins]}}"""
+    stats = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+    for game_no in range(first_game, first_game + count):
+        random.seed(base_seed + game_no)
+        learner = HeadlessPlayer('learner', name='learner')
+        learner.ai = ExploringAI(explore, name='learner')
+        other = HeadlessPlayer('opponent', opponent)
+        # Alternate seats so the table is not tuned for one of them
+        players = [learner, other] if game_no % 2 == 0 else [other, learner]
+        game = GameEngine(players)
+        game.start_game()
+
+        turns = 0
+        while game.winner is None and turns < max_turns:
+            play_ai_turn(game, game.get_current_player())
+            turns += 1
+
+        won = game.winner == learner.id
+        for key, action in learner.ai.choices:
+            entry = stats[key][action]
+            entry[0] += 1
+            entry[1] += won
+    # Plain dicts, defaultdicts with lambdas cannot be pickled back
+    return {key: dict(actions) for key, actions in stats.items()}
+
+def merge(total, stats):
+    for key, actions in stats.items():
+        for action, (tries, wins) in actions.items():
+            entry = total[key][action]
+            entry[0] += tries
+            entry[1] += wins
+
+def distill(total, min_visits, z):
+    """
+    Best move kind per state by the lower bound of its win rate, so a kind
+    that was tried less often has to be clearly better to be chosen.
+    States without a well-tried alternative are left out
+    """
+    policy = {}
+    for key, actions in total.items():
+        bounds = {}
+        for action, (tries, wins) in actions.items():
+            if tries >= min_visits:
+                rate = wins / tries
+                bounds[action] = rate - z * math.sqrt(rate * (1 - rate) / tries)
+        if len(bounds) > 1:
+            policy[key] = max(sorted(bounds), key=bounds.get)
+    return policy
+
+def run_training(args):
+    total = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+    started = time.time()
+    played = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = []
+        for first_game in range(0, args.games, CHUNK_SIZE):
+            count = min(CHUNK_SIZE, args.games - first_game)
+            futures.append(pool.submit(play_chunk, args.opponent, first_game, count,
+                                       args.seed, args.explore, args.max_turns))
+
+        for future in as_completed(futures):
+            merge(total, future.result())
+            played += CHUNK_SIZE
+            print(f"{min(played, args.games)}/{args.games} Spiele, {len(total)} Zustände", end='\r')
+
+    elapsed = time.time() - started
+    policy = distill(total, args.min_visits, args.z)
+    write_table(args.out, policy)
+
+    counts = defaultdict(int)
+    for action in policy.values():
+        counts[action] += 1
+    print(f"\n{args.games} Spiele in {elapsed:.1f}s ({args.games / max(elapsed, 1e-9):.0f} Spiele/s)")
+    print(f"{len(total)} Zustände gesehen, {len(policy)} in der Tabelle -> {args.out}")
+    print('Züge: ' + ', '.join(f"{action} {counts[action]}" for action in ACTIONS if counts[action]))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Tschau-Sepp Policy-Tabelle trainieren')
+    parser.add_argument('--games', type=int, default=400000, help='training games (default: 400000)')
+    parser.add_argument('--opponent', default='hard', choices=['easy', 'medium', 'hard'],
+                        help='AIPlayer difficulty of the opponent (default: hard)')
+    parser.add_argument('--explore', type=float, default=0.3,
+                        help='probability of a random move kind (default: 0.3)')
+    parser.add_argument('--min-visits', type=int, default=30,
+                        help='tries a move kind needs in a state to be compared (default: 30)')
+    parser.add_argument('--z', type=float, default=1.64,
+                        help='standard errors subtracted from a win rate (default: 1.64)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=0, help='base random seed')
+    parser.add_argument('--max-turns', type=int, default=MAX_TURNS, help='turn limit per game')
+    parser.add_argument('--out', default=POLICY_TABLE_PATH, help='table file (default: POLICY_TABLE_PATH)')
+    args = parser.parse_args(argv)
+
+    if not 0 < args.explore <= 1:
+        parser.error('--explore must be in (0, 1]')
+    return args
+
+if __name__ == '__main__':
+    run_training(parse_args())
\ No newline at end of file